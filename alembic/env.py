@@ -9,11 +9,15 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # 2. استيراد المودلز والـ Base
-from database import Base
-import models  # ضروري جداً
+from app.core.config import settings
+from app.db.base import Base
+import app.models  # noqa: F401 ضروري جداً
 
 config = context.config
 
+# نفس قاعدة البيانات اللى التطبيق شغال عليها (DATABASE_URL لو متحدد)
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
@@ -0,0 +1,154 @@
+"""Baseline schema (projects, BOQ, invoices, staging, ledger)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INVOICE_STATUS = sa.Enum("DRAFT", "REVIEW", "APPROVED", name="invoicestatus")
+TRADE_VALUES = ("CIVIL", "ELEC", "MECH", "ARCH", "GENERAL")
+# tradetype مستخدم فى أكتر من جدول؛ على PostgreSQL بيتعمل مرة واحدة فى
+# upgrade والجداول متحاولش تعمل CREATE TYPE تانى
+TRADE_TYPE = sa.Enum(*TRADE_VALUES, name="tradetype").with_variant(
+    postgresql.ENUM(*TRADE_VALUES, name="tradetype", create_type=False),
+    "postgresql",
+)
+ROW_TYPE = sa.Enum(
+    "ITEM", "HEADER", "TOTAL", "NOTE", "SIGNATURE", "OTHER", name="rowtype"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # القواعد اللى اتعملت قبل alembic (init_db.py / construction_system.db)
+    # فيها الجداول دى من غير alembic_version، فبيتعمل اللى ناقص بس
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(*TRADE_VALUES, name="tradetype").create(bind, checkfirst=True)
+
+    if "projects" not in tables:
+        op.create_table(
+            "projects",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("location", sa.String(), nullable=True),
+        )
+        op.create_index("ix_projects_id", "projects", ["id"])
+        op.create_index("ix_projects_name", "projects", ["name"])
+
+    if "boq_items" not in tables:
+        op.create_table(
+            "boq_items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id")),
+            sa.Column("item_code", sa.String()),
+            sa.Column("description", sa.String()),
+            sa.Column("unit", sa.String()),
+            sa.Column("unit_price", sa.Float()),
+            sa.Column("is_partial", sa.Boolean()),
+        )
+        op.create_index("ix_boq_items_id", "boq_items", ["id"])
+        op.create_index("ix_boq_items_item_code", "boq_items", ["item_code"])
+
+    if "invoices_log" not in tables:
+        op.create_table(
+            "invoices_log",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id")),
+            sa.Column("invoice_number", sa.Integer()),
+            sa.Column("status", INVOICE_STATUS),
+            sa.Column("period_start", sa.Date()),
+            sa.Column("period_end", sa.Date()),
+            sa.Column(
+                "previous_invoice_id",
+                sa.Integer(),
+                sa.ForeignKey("invoices_log.id"),
+                nullable=True,
+            ),
+            sa.UniqueConstraint(
+                "project_id", "invoice_number", name="uix_project_invoice_number"
+            ),
+        )
+        op.create_index("ix_invoices_log_id", "invoices_log", ["id"])
+        op.create_index("ix_invoices_log_invoice_number", "invoices_log", ["invoice_number"])
+
+    if "staging_invoice_details" not in tables:
+        op.create_table(
+            "staging_invoice_details",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices_log.id")),
+            sa.Column("row_index", sa.Integer()),
+            sa.Column("raw_item_code", sa.String(), nullable=True),
+            sa.Column("raw_description", sa.String(), nullable=True),
+            sa.Column("raw_qty", sa.String(), nullable=True),
+            sa.Column("raw_percentage", sa.String(), nullable=True),
+            sa.Column("trade", TRADE_TYPE),
+            sa.Column("row_type", ROW_TYPE),
+            sa.Column("include_in_invoice", sa.Boolean()),
+            sa.Column("is_valid", sa.Boolean()),
+            sa.Column("error_message", sa.Text(), nullable=True),
+        )
+        op.create_index(
+            "ix_staging_invoice_details_id", "staging_invoice_details", ["id"]
+        )
+
+    if "invoice_details" not in tables:
+        op.create_table(
+            "invoice_details",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices_log.id")),
+            sa.Column("boq_item_id", sa.Integer(), sa.ForeignKey("boq_items.id")),
+            sa.Column("row_description", sa.String(), nullable=True),
+            sa.Column("current_percentage", sa.Float()),
+            sa.Column("claimed_qty", sa.Float()),
+            sa.Column("approved_qty", sa.Float()),
+            sa.Column("equivalent_qty", sa.Float()),
+            sa.Column("previous_cumulative_qty", sa.Float()),
+            sa.Column("total_cumulative_qty", sa.Float()),
+            sa.Column("unit_price_at_time", sa.Float()),
+            sa.Column("total_value", sa.Float()),
+            sa.Column("notes", sa.Text()),
+            sa.Column("trade", TRADE_TYPE),
+        )
+        op.create_index("ix_invoice_details_id", "invoice_details", ["id"])
+
+    if "daily_ledger" not in tables:
+        op.create_table(
+            "daily_ledger",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id")),
+            sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices_log.id")),
+            sa.Column("boq_item_id", sa.Integer(), sa.ForeignKey("boq_items.id")),
+            sa.Column("entry_date", sa.Date()),
+            sa.Column("distributed_qty", sa.Float()),
+        )
+        op.create_index("ix_daily_ledger_id", "daily_ledger", ["id"])
+        op.create_index("ix_daily_ledger_entry_date", "daily_ledger", ["entry_date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_ledger")
+    op.drop_table("invoice_details")
+    op.drop_table("staging_invoice_details")
+    op.drop_table("invoices_log")
+    op.drop_table("boq_items")
+    op.drop_table("projects")
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for enum_name in ("rowtype", "tradetype", "invoicestatus"):
+            postgresql.ENUM(name=enum_name).drop(bind, checkfirst=True)
@@ -0,0 +1,62 @@
+"""Materialized-path BOQ code tree (path / parent_code / depth)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# subtree_range محتاج ترتيب ASCII للـ path (نفس تعريف BOQItem.path)
+BOQ_PATH = sa.String().with_variant(sa.String(collation="C"), "postgresql")
+
+
+def _backfill_boq_paths() -> None:
+    """حساب path / parent_code / depth للبنود الموجودة قبل الـ migration"""
+    from app.utils.boq_codes import build_boq_path
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, item_code FROM boq_items")).fetchall()
+    params = []
+    for row in rows:
+        path, parent_code, depth = build_boq_path(row.item_code)
+        params.append(
+            {"id": row.id, "path": path, "parent_code": parent_code, "depth": depth}
+        )
+    if params:
+        bind.execute(
+            sa.text(
+                "UPDATE boq_items SET path = :path, parent_code = :parent_code, "
+                "depth = :depth WHERE id = :id"
+            ),
+            params,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("boq_items") as batch:
+        batch.add_column(sa.Column("path", BOQ_PATH, nullable=True))
+        batch.add_column(sa.Column("parent_code", sa.String(), nullable=True))
+        batch.add_column(sa.Column("depth", sa.Integer(), nullable=True))
+    _backfill_boq_paths()
+    op.create_index("ix_boq_items_project_path", "boq_items", ["project_id", "path"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_boq_items_project_path", table_name="boq_items")
+    with op.batch_alter_table("boq_items") as batch:
+        batch.drop_column("depth")
+        batch.drop_column("parent_code")
+        batch.drop_column("path")
@@ -0,0 +1,85 @@
+"""Unique (project_id, item_code) on boq_items (conflict target of the BOQ upsert)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# الجداول اللى بتشاور على boq_items.id وقت الـ revision دى
+BOQ_REFERENCES = ("invoice_details", "daily_ledger")
+
+
+def _merge_duplicate_codes() -> None:
+    """
+    add_boq_item القديم كان بيسمح بنفس الكود مرتين فى المشروع
+
+    التكرار المتطابق (نفس الوصف والوحدة والسعر) بيتدمج فى أقدم بند
+    والـ references بتتنقل له. لو فيه تكرار بقيم مختلفة الـ migration
+    بتقف من غير ما تعدل حاجة وبتطبع البنود عشان تتصلح يدوياً.
+
+    Raises:
+        RuntimeError: لو فيه كود متكرر بقيم مختلفة
+    """
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT project_id, item_code FROM boq_items WHERE item_code IS NOT NULL "
+        "GROUP BY project_id, item_code HAVING COUNT(*) > 1"
+    )).fetchall()
+    if not duplicates:
+        return
+
+    merges = []
+    conflicts = []
+    for project_id, item_code in duplicates:
+        items = bind.execute(
+            sa.text(
+                "SELECT id, description, unit, unit_price, is_partial FROM boq_items "
+                "WHERE project_id = :project_id AND item_code = :item_code ORDER BY id"
+            ),
+            {"project_id": project_id, "item_code": item_code},
+        ).fetchall()
+        if len({tuple(item[1:]) for item in items}) > 1:
+            ids = ", ".join(str(item.id) for item in items)
+            conflicts.append(f"project {project_id}: {item_code} (ids {ids})")
+        else:
+            merges.append((items[0].id, [item.id for item in items[1:]]))
+
+    if conflicts:
+        raise RuntimeError(
+            "boq_items فيها أكواد متكررة بقيم مختلفة؛ وحّدها أو امسح الزيادة "
+            "وبعدين شغّل alembic upgrade head تانى:\n  " + "\n  ".join(conflicts)
+        )
+
+    for keep_id, drop_ids in merges:
+        params = [{"keep_id": keep_id, "drop_id": drop_id} for drop_id in drop_ids]
+        for table in BOQ_REFERENCES:
+            bind.execute(
+                sa.text(f"UPDATE {table} SET boq_item_id = :keep_id WHERE boq_item_id = :drop_id"),
+                params,
+            )
+        bind.execute(sa.text("DELETE FROM boq_items WHERE id = :drop_id"), params)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _merge_duplicate_codes()
+    with op.batch_alter_table("boq_items") as batch:
+        batch.create_unique_constraint("uix_project_item_code", ["project_id", "item_code"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("boq_items") as batch:
+        batch.drop_constraint("uix_project_item_code", type_="unique")
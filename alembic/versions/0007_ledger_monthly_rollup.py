@@ -0,0 +1,51 @@
+"""Monthly ledger roll-up table (schedule report)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRADE_VALUES = ("CIVIL", "ELEC", "MECH", "ARCH", "GENERAL")
+# الـ type اتعمل فى 0001
+TRADE_TYPE = sa.Enum(*TRADE_VALUES, name="tradetype").with_variant(
+    postgresql.ENUM(*TRADE_VALUES, name="tradetype", create_type=False),
+    "postgresql",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ledger_monthly_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("boq_item_id", sa.Integer(), sa.ForeignKey("boq_items.id"), nullable=False),
+        sa.Column("trade", TRADE_TYPE, nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("total_qty", sa.Float()),
+        sa.Column("total_value", sa.Float()),
+        sa.UniqueConstraint(
+            "project_id", "year", "month", "boq_item_id", "trade",
+            name="uix_ledger_monthly_rollup_key",
+        ),
+    )
+    op.create_index("ix_ledger_monthly_rollup_id", "ledger_monthly_rollup", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ledger_monthly_rollup")
@@ -0,0 +1,43 @@
+"""Ledger prefix sums per BOQ item (date-range reports)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ledger_prefix_sums",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("boq_item_id", sa.Integer(), sa.ForeignKey("boq_items.id"), nullable=False),
+        sa.Column("boundary_date", sa.Date(), nullable=False),
+        sa.Column("cum_qty", sa.Float()),
+        sa.Column("daily_qty", sa.Float()),
+        sa.Column("cum_value", sa.Float()),
+        sa.Column("daily_value", sa.Float()),
+        sa.UniqueConstraint(
+            "project_id", "boq_item_id", "boundary_date",
+            name="uix_ledger_prefix_sums_key",
+        ),
+    )
+    op.create_index("ix_ledger_prefix_sums_id", "ledger_prefix_sums", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ledger_prefix_sums")
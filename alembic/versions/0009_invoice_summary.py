@@ -0,0 +1,53 @@
+"""Per-trade invoice summary table (invoice list totals)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRADE_VALUES = ("CIVIL", "ELEC", "MECH", "ARCH", "GENERAL")
+# الـ type اتعمل فى 0001
+TRADE_TYPE = sa.Enum(*TRADE_VALUES, name="tradetype").with_variant(
+    postgresql.ENUM(*TRADE_VALUES, name="tradetype", create_type=False),
+    "postgresql",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "invoice_summary",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices_log.id"), nullable=False),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("trade", TRADE_TYPE, nullable=False),
+        sa.Column("total_value", sa.Float()),
+        sa.Column("line_count", sa.Integer()),
+        sa.Column("error_count", sa.Integer()),
+        sa.Column("cumulative_value", sa.Float()),
+        sa.UniqueConstraint("invoice_id", "trade", name="uix_invoice_summary_trade"),
+    )
+    op.create_index("ix_invoice_summary_id", "invoice_summary", ["id"])
+    op.create_index(
+        "ix_invoice_summary_project_invoice",
+        "invoice_summary",
+        ["project_id", "invoice_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("invoice_summary")
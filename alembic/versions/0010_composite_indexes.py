@@ -0,0 +1,42 @@
+"""Composite indexes for the hot query paths
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns); (project_id, item_code) على boq_items هو uix_project_item_code
+INDEXES = [
+    ("ix_daily_ledger_project_date", "daily_ledger", ["project_id", "entry_date"]),
+    ("ix_daily_ledger_invoice", "daily_ledger", ["invoice_id"]),
+    ("ix_staging_invoice_trade", "staging_invoice_details", ["invoice_id", "trade"]),
+    ("ix_staging_invoice_row", "staging_invoice_details", ["invoice_id", "row_index"]),
+    ("ix_invoice_details_item_invoice", "invoice_details", ["boq_item_id", "invoice_id"]),
+    ("ix_invoice_details_invoice_trade", "invoice_details", ["invoice_id", "trade"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    # إحصائيات جديدة للـ planner بعد الـ indexes
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,66 @@
+"""Staging retention: approval time, compaction flag and snapshot table
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRADE_VALUES = ("CIVIL", "ELEC", "MECH", "ARCH", "GENERAL")
+# الـ type موجود من 0001
+TRADE_TYPE = sa.Enum(*TRADE_VALUES, name="tradetype").with_variant(
+    postgresql.ENUM(*TRADE_VALUES, name="tradetype", create_type=False),
+    "postgresql",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("invoices_log", sa.Column("approved_at", sa.DateTime(), nullable=True))
+    op.add_column(
+        "invoices_log",
+        sa.Column("staging_compacted", sa.Boolean(), server_default="0", nullable=False),
+    )
+    # المستخلصات المعتمدة قبل الـ migration: مدة الـ retention بتبدأ من دلوقتى
+    op.execute(
+        "UPDATE invoices_log SET approved_at = CURRENT_TIMESTAMP WHERE status = 'APPROVED'"
+    )
+    op.create_index(
+        "ix_invoices_log_retention",
+        "invoices_log",
+        ["staging_compacted", "approved_at"],
+    )
+
+    op.create_table(
+        "staging_snapshots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices_log.id"), nullable=False),
+        sa.Column("trade", TRADE_TYPE, nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("raw_bytes", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("invoice_id", "trade", name="uix_staging_snapshot_trade"),
+    )
+    op.create_index("ix_staging_snapshots_id", "staging_snapshots", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("staging_snapshots")
+    op.drop_index("ix_invoices_log_retention", table_name="invoices_log")
+    with op.batch_alter_table("invoices_log") as batch:
+        batch.drop_column("staging_compacted")
+        batch.drop_column("approved_at")
@@ -0,0 +1,39 @@
+"""Maintenance log table
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, Sequence[str], None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "maintenance_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task", sa.String(), nullable=False),
+        sa.Column("trigger", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.Column("detail", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_maintenance_log_id", "maintenance_log", ["id"])
+    op.create_index("ix_maintenance_log_started_at", "maintenance_log", ["started_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("maintenance_log")
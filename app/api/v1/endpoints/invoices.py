@@ -2,23 +2,97 @@
 
 import os
 import shutil
-from typing import List
+from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import (
+    APIRouter,
+    Depends,
+    UploadFile,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db.archive import ProjectArchived
+from app.db.sharding import (
+    fan_out_writes,
+    get_async_invoice_db,
+    get_invoice_db,
+    invoice_session_factory,
+    invoice_writer,
+    project_writer,
+)
 from app.core.config import settings
-from app.schemas.staging import StagingRowRead, StagingRowUpdate
+from app.schemas.staging import StagingRowUpdate, StagingPatch
 from app.services import (
+    async_reports_service,
+    async_staging_service,
     invoice_import_service,
     invoice_approval_service,
+    reports_service,
+    staging_retention_service,
     staging_service,
 )
+from app.utils.exporters import export_response
+from app.utils.http_cache import etag_matches, not_modified, request_etag
+from app.utils.streaming import (
+    iter_query_rows,
+    negotiate_stream_format,
+    stream_query,
+)
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
 
+def _save_and_parse_upload(file: UploadFile, sheet_name: str):
+    """حفظ الملف وقراءة صفوفه (sync، بيشتغل فى الـ threadpool)"""
+    # حفظ الملف مؤقتاً
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
+
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    # تحويل اسم الشيت لرقم لو أمكن
+    final_sheet_name = sheet_name
+    if str(sheet_name).isdigit():
+        final_sheet_name = int(sheet_name)
+
+    return invoice_import_service.parse_invoice_excel(file_path, final_sheet_name)
+
+
+def _stage_upload(
+    db: Session,
+    project_id: int,
+    invoice_number: int,
+    start_date: date,
+    end_date: date,
+    rows,
+    trade_type: str,
+):
+    """إنشاء / تحديث المستخلص ورفع صفوفه (unit كتابة واحدة)"""
+    invoice = invoice_import_service.get_or_create_invoice(
+        db=db,
+        project_id=project_id,
+        invoice_number=invoice_number,
+        period_start=start_date,
+        period_end=end_date,
+    )
+    return invoice_import_service.stage_invoice_rows(
+        db=db,
+        invoice_id=invoice.id,
+        rows=rows,
+        trade_type=trade_type,
+    )
+
+
 @router.post("/upload")
 async def upload_invoice(
     project_id: int = Form(...),
@@ -28,46 +102,28 @@ async def upload_invoice(
     sheet_name: str = Form(...),
     trade_type: str = Form("general"),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
 ):
     """
     رفع ملف Excel لمستخلص جديد
-    """
-    # حفظ الملف مؤقتاً
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # تحويل اسم الشيت لرقم لو أمكن
-    final_sheet_name = sheet_name
-    if str(sheet_name).isdigit():
-        final_sheet_name = int(sheet_name)
 
+    كتابة الملف وقراءة الـ Excel (pandas) بيتعملوا فى الـ threadpool،
+    والكتابة فى القاعدة unit واحدة عن طريق كاتب المشروع (write_coordinator أو كاتب الـ shard).
+    """
     try:
         # تحويل رقم المستخلص
         invoice_number_int = int(invoice_number)
-        
-        # الحصول على المستخلص أو إنشاءه
-        invoice = invoice_import_service.get_or_create_invoice(
-            db=db,
-            project_id=project_id,
-            invoice_number=invoice_number_int,
-            period_start=start_date,
-            period_end=end_date,
-        )
-        
-        # استيراد البيانات
-        result = invoice_import_service.import_invoice_excel(
-            db=db,
-            invoice_id=invoice.id,
-            file_path=file_path,
-            trade_type=trade_type,
-            sheet_name=final_sheet_name,
+
+        writer = project_writer(project_id)
+        rows = await run_in_threadpool(_save_and_parse_upload, file, sheet_name)
+        return await writer.run_async(
+            _stage_upload,
+            project_id,
+            invoice_number_int,
+            start_date,
+            end_date,
+            rows,
+            trade_type,
         )
-        
-        return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -77,44 +133,274 @@ async def upload_invoice(
         )
 
 
-@router.get("/{invoice_id}/staging", response_model=List[StagingRowRead])
-def get_invoice_staging(invoice_id: int, db: Session = Depends(get_db)):
+@router.get("/{invoice_id}/staging")
+async def get_invoice_staging(
+    invoice_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(
+        None, description="أعمدة مفصولة بفاصلة (مثال: id,raw_qty,error_message)"
+    ),
+    cursor: Optional[str] = Query(None, description="row_index:id من X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.STAGING_PAGE_MAX_SIZE),
+    include_in_invoice: Optional[bool] = None,
+    row_type: Optional[str] = None,
+    is_valid: Optional[bool] = None,
+    trade: Optional[str] = None,
+    errors_only: bool = False,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_invoice_db),
+):
     """
-    الحصول على بيانات staging لمستخلص
+    الحصول على بيانات staging لمستخلص (صفحات + فلاتر + أعمدة محددة)
+    
+    Accept: application/x-ndjson أو application/vnd.apache.arrow.stream
+    بيرجع الصفوف كـ stream بدل JSON واحد.
+    If-None-Match بالـ ETag السابق بيرجع 304 لو مفيش تغيير.
     """
-    rows = staging_service.get_staging_rows(db, invoice_id)
+    version = await async_staging_service.get_staging_version(db, invoice_id)
+    etag = None
+    if version is not None:
+        etag = request_etag(request, "staging", invoice_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    stream_format = negotiate_stream_format(accept)
+
+    try:
+        field_list = (
+            [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        )
+        filters = dict(
+            include_in_invoice=include_in_invoice,
+            row_type=row_type,
+            is_valid=is_valid,
+            trade=trade,
+            errors_only=errors_only,
+        )
+        after = staging_service.parse_cursor(cursor)
+
+        if stream_format:
+            stmt = staging_service.build_staging_query(
+                invoice_id, fields=field_list, after=after, limit=limit, **filters
+            )
+            streaming = stream_query(
+                stmt, stream_format, session_factory=invoice_session_factory(invoice_id)
+            )
+            if version is not None:
+                streaming.headers["X-Staging-Version"] = str(version)
+                streaming.headers["ETag"] = etag
+            return streaming
+
+        rows, next_cursor = await async_staging_service.get_staging_page(
+            db, invoice_id, fields=field_list, after=after, limit=limit, **filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if version is not None:
+        response.headers["X-Staging-Version"] = str(version)
+        response.headers["ETag"] = etag
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return rows
 
 
+@router.get("/{invoice_id}/details")
+async def get_invoice_details(
+    invoice_id: int,
+    request: Request,
+    response: Response,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_invoice_db),
+):
+    """
+    بنود المستخلص المعتمدة (InvoiceDetail) مع الكميات التراكمية
+    """
+    # البنود بتتبنى عند الاعتماد، والاعتماد بيزود staging_version
+    version = await async_staging_service.get_staging_version(db, invoice_id)
+    etag = None
+    if version is not None:
+        etag = request_etag(request, "details", invoice_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    stmt = reports_service.invoice_details_query(invoice_id)
+    stream_format = negotiate_stream_format(accept)
+    if stream_format:
+        streaming = stream_query(
+            stmt, stream_format, session_factory=invoice_session_factory(invoice_id)
+        )
+        if etag:
+            streaming.headers["ETag"] = etag
+        return streaming
+
+    if etag:
+        response.headers["ETag"] = etag
+    return await async_reports_service.query_rows(db, stmt)
+
+
+@router.get("/{invoice_id}/details/export")
+def export_invoice_details(
+    invoice_id: int,
+    fmt: str = Query("xlsx", alias="format"),
+    db: Session = Depends(get_invoice_db),
+):
+    """
+    تصدير بنود المستخلص المعتمدة مع الأعمدة التراكمية (xlsx / csv)
+
+    الصفوف بتتقرا من الـ cursor على batches (yield_per) وبتتكتب أول
+    بأول، فالمستخلص الكبير مبيتحملش كله فى الذاكرة.
+    """
+    if staging_service.get_staging_version(db, invoice_id) is None:
+        raise HTTPException(status_code=404, detail="المستخلص غير موجود")
+
+    stmt = reports_service.invoice_details_query(invoice_id)
+    columns = [column.key for column in stmt.selected_columns]
+    return export_response(
+        fmt,
+        columns,
+        iter_query_rows(stmt, session_factory=invoice_session_factory(invoice_id)),
+        filename=f"invoice_{invoice_id}_details",
+        sheet_name="details",
+    )
+
+
 @router.put("/{invoice_id}/staging")
-def update_staging_rows(
+async def update_staging_rows(
     invoice_id: int,
     updates: List[StagingRowUpdate],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_invoice_db),
 ):
     """
     تعديل صفوف staging
     """
     try:
-        updated_count = staging_service.update_staging_rows_bulk(db, updates)
+        writer = invoice_writer(invoice_id)
+        if writer.enabled:
+            updated_ids = await writer.run_async(
+                staging_service.update_staging_rows_bulk, invoice_id, updates
+            )
+        else:
+            updated_ids = await async_staging_service.update_staging_rows_bulk(
+                db, invoice_id, updates
+            )
         return {
             "status": "success",
-            "updated_count": updated_count,
-            "message": f"تم تحديث {updated_count} صف بنجاح"
+            "updated_count": len(updated_ids),
+            "updated_ids": updated_ids,
+            "message": f"تم تحديث {len(updated_ids)} صف بنجاح"
         }
-    except Exception as e:
+    except ProjectArchived as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.patch("/{invoice_id}/staging")
+async def patch_staging_rows(
+    invoice_id: int,
+    patch: StagingPatch,
+    db: AsyncSession = Depends(get_async_invoice_db),
+):
+    """
+    حفظ الخلايا المعدّلة فقط فى الـ staging (مع التحقق من الـ version)
+    """
+    try:
+        writer = invoice_writer(invoice_id)
+        if writer.enabled:
+            result = await writer.run_async(
+                staging_service.apply_staging_patch, invoice_id, patch
+            )
+        else:
+            result = await async_staging_service.apply_staging_patch(
+                db, invoice_id, patch
+            )
+    except staging_service.StagingVersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ProjectArchived as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    updated_ids = result["updated_ids"]
+    return {
+        "status": "success",
+        "updated_count": len(updated_ids),
+        "updated_ids": updated_ids,
+        "version": result["version"],
+        "message": f"تم تحديث {len(updated_ids)} صف بنجاح"
+    }
 
 
 @router.post("/{invoice_id}/approve")
-def approve_invoice(invoice_id: int, db: Session = Depends(get_db)):
+async def approve_invoice(invoice_id: int):
     """
     اعتماد المستخلص ونقل البيانات من Staging إلى InvoiceDetail
     """
     try:
-        result = invoice_approval_service.build_invoice_details_from_staging(
-            db, invoice_id
+        result = await invoice_writer(invoice_id).run_async(
+            invoice_approval_service.build_invoice_details_from_staging, invoice_id
         )
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{invoice_id}/staging/compact")
+async def compact_staging(invoice_id: int):
+    """
+    ضغط staging مستخلص معتمد فى snapshots (من غير انتظار الـ retention)
+    """
+    try:
+        return await invoice_writer(invoice_id).run_async(
+            staging_retention_service.compact_invoice_staging, invoice_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{invoice_id}/staging/snapshot")
+def get_staging_snapshot(invoice_id: int, db: Session = Depends(get_invoice_db)):
+    """
+    صفوف staging مستخلص مضغوط من غير استرجاع (متاحة للمشاريع المؤرشفة)
+    """
+    try:
+        return staging_retention_service.get_snapshot_rows(db, invoice_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{invoice_id}/staging/restore")
+async def restore_staging(invoice_id: int):
+    """
+    استرجاع صفوف staging مستخلص مضغوط من الـ snapshots
+    """
+    try:
+        return await invoice_writer(invoice_id).run_async(
+            staging_retention_service.restore_invoice_staging, invoice_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/staging/retention")
+async def run_staging_retention(
+    older_than_days: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    تشغيل الـ retention: ضغط staging المستخلصات المعتمدة من أكتر من
+    STAGING_RETENTION_DAYS يوم (على كل الـ shards، عن طريق كاتب كل قاعدة)
+    """
+    results = await fan_out_writes(
+        lambda db, project_ids: staging_retention_service.compact_approved_staging(
+            db, older_than_days=older_than_days, limit=limit, project_ids=project_ids
+        )
+    )
+    totals = {"invoices": 0, "rows": 0, "raw_bytes": 0, "compressed_bytes": 0}
+    for result in results:
+        for key in totals:
+            totals[key] += result[key]
+    return totals
@@ -1,55 +1,159 @@
 """Projects API endpoints"""
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db.archive import ProjectArchived
+from app.db.async_session import get_async_db
+from app.db import sharding
+from app.db.sharding import get_async_project_db, get_project_db, project_writer
+from app.db.write_coordinator import write_coordinator
+from app.core.config import settings
 from app.schemas.project import ProjectCreate, ProjectRead
-from app.schemas.boq import BOQItemCreate, BOQItemRead
-from app.services import projects_service, boq_service
+from app.schemas.boq import BOQItemCreate, BOQItemRead, BOQRollupRead
+from app.schemas.invoice import InvoiceSummaryRead
+from app.services import async_projects_service, boq_service, projects_service
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
 @router.get("/", response_model=List[ProjectRead])
-def list_projects(db: Session = Depends(get_db)):
+async def list_projects(
+    archived: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    الحصول على قائمة كل المشاريع
+    الحصول على قائمة كل المشاريع (من الـ catalog فى وضع sharding)
+
+    ?archived=true / false: المؤرشفة / الشغالة بس
     """
-    projects = projects_service.get_projects(db)
+    if sharding.shard_router is not None:
+        return await run_in_threadpool(sharding.shard_router.list_projects, archived)
+    projects = await async_projects_service.get_projects(db, archived)
     return projects
 
 
 @router.post("/", response_model=ProjectRead)
-def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
+async def create_project(project: ProjectCreate, db: AsyncSession = Depends(get_async_db)):
     """
     إنشاء مشروع جديد
+
+    فى وضع sharding المشروع بيتسجل فى الـ catalog الأول (id + shard)
+    وبعدين بيتعمل فى الـ shard بتاعه بنفس الـ id عن طريق كاتب الـ shard؛
+    لو الخطوة التانية فشلت المشروع بيتشال من الـ catalog.
     """
-    new_project = projects_service.create_project(db, project)
+    if sharding.shard_router is not None:
+        router = sharding.shard_router
+        project_id = await run_in_threadpool(
+            router.register_project, project.name, project.location
+        )
+        try:
+            shard = await run_in_threadpool(router.project_shard, project_id)
+            return await shard.writer.run_async(
+                projects_service.create_project, project, project_id=project_id
+            )
+        except Exception:
+            await run_in_threadpool(router.unregister_project, project_id)
+            raise
+    if write_coordinator.enabled:
+        return await write_coordinator.run_async(projects_service.create_project, project)
+    new_project = await async_projects_service.create_project(db, project)
     return new_project
 
 
+def _project_writer(project_id: int):
+    """كاتب المشروع أو 400 (مؤرشف) / 404 (مش فى الـ catalog)"""
+    try:
+        return project_writer(project_id)
+    except ProjectArchived as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/{project_id}/boq", response_model=BOQItemRead)
-def add_boq_item(
-    project_id: int,
-    item: BOQItemCreate,
-    db: Session = Depends(get_db)
-):
+async def add_boq_item(project_id: int, item: BOQItemCreate):
     """
     إضافة بند BOQ لمشروع
     """
+    writer = _project_writer(project_id)
     try:
-        new_item = boq_service.add_boq_item(db, project_id, item)
-        return new_item
+        return await writer.run_async(boq_service.add_boq_item, project_id, item)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+def _save_and_read_boq(file: UploadFile, sheet_name: str):
+    """حفظ الملف فى ملف مؤقت وقراءة المقايسة (sync، بيشتغل فى الـ threadpool)"""
+    # اسم الملف من الـ client بيتاخد منه الامتداد بس (csv / xlsx)
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    suffix = os.path.splitext(os.path.basename(file.filename or ""))[1]
+    fd, file_path = tempfile.mkstemp(suffix=suffix, dir=settings.UPLOAD_DIR)
+
+    final_sheet_name = sheet_name
+    if str(sheet_name).isdigit():
+        final_sheet_name = int(sheet_name)
+
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        return boq_service.read_boq_file(file_path, sheet_name=final_sheet_name)
+    finally:
+        os.remove(file_path)
+
+
+@router.post("/{project_id}/boq/upload")
+async def upload_boq(
+    project_id: int,
+    sheet_name: str = Form("0"),
+    file: UploadFile = File(...),
+):
+    """
+    رفع مقايسة كاملة (Excel/CSV) مع تحديث البنود الموجودة
+
+    قراءة الملف فى الـ threadpool، والـ upsert unit واحدة عن طريق كاتب المشروع.
+    """
+    writer = _project_writer(project_id)
+    try:
+        parsed = await run_in_threadpool(_save_and_read_boq, file, sheet_name)
+        return await writer.run_async(boq_service.upsert_boq_items, project_id, parsed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{project_id}/boq", response_model=List[BOQItemRead])
-def get_boq_items(project_id: int, db: Session = Depends(get_db)):
+def get_boq_items(project_id: int, db: Session = Depends(get_project_db)):
     """
     الحصول على بنود BOQ لمشروع
     """
     items = boq_service.get_boq_items(db, project_id)
     return items
+
+
+@router.get("/{project_id}/boq/rollup", response_model=List[BOQRollupRead])
+def get_boq_rollup(
+    project_id: int,
+    prefix: Optional[str] = None,
+    levels: int = Query(2, ge=1, le=10),
+    db: Session = Depends(get_project_db),
+):
+    """
+    إجماليات الفصول والفصول الفرعية لبنود BOQ
+    """
+    return boq_service.get_boq_rollup(db, project_id, prefix=prefix, levels=levels)
+
+
+@router.get("/{project_id}/invoices", response_model=List[InvoiceSummaryRead])
+async def list_project_invoices(project_id: int, db: AsyncSession = Depends(get_async_project_db)):
+    """
+    مستخلصات المشروع مع إجمالياتها لكل تخصص
+    """
+    if await async_projects_service.get_project_by_id(db, project_id) is None:
+        raise HTTPException(status_code=404, detail="المشروع غير موجود")
+    return await async_projects_service.list_project_invoices(db, project_id)
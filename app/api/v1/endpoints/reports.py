@@ -1,55 +1,315 @@
 """Reports API endpoints"""
 
-import calendar
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from app.db import get_db
-from app.models import BOQItem, DailyLedger
+from app.db.sharding import (
+    fan_out,
+    get_async_project_db,
+    get_project_db,
+    project_session_factory,
+)
+from app.services import (
+    async_projects_service,
+    async_reports_service,
+    projects_service,
+    reports_service,
+)
+from app.services.report_cache import report_cache
+from app.utils.exporters import export_response
+from app.utils.http_cache import etag_matches, not_modified, request_etag
+from app.utils.streaming import negotiate_stream_format, stream_query
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
+async def _project_etag(db: AsyncSession, request: Request, project_id: int) -> Optional[str]:
+    """ETag للتقرير مبنى على data_version بتاع المشروع"""
+    version = await async_projects_service.get_data_version(db, project_id)
+    if version is None:
+        return None
+    return request_etag(request, "project", project_id, version)
+
+
+def _report_data(
+    version: Optional[str],
+    project_id: int,
+    endpoint: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any],
+):
+    """نتيجة التقرير من report_cache أو من compute"""
+    if version is None:
+        return compute()
+    key = report_cache.make_key(endpoint, project_id, version, params)
+    return report_cache.get_or_compute(key, compute)
+
+
+async def _cached_report(
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str],
+    project_id: int,
+    endpoint: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Awaitable[Any]],
+):
+    """
+    تنفيذ تقرير عبر الـ ETag ثم report_cache ثم الحساب الفعلى
+
+    Raises:
+        HTTPException: 400 لو الحساب رفع ValueError
+    """
+    version = await async_projects_service.get_data_version(db, project_id)
+    if version is not None:
+        etag = request_etag(request, "project", project_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+
+    try:
+        if version is None:
+            return await compute()
+        key = report_cache.make_key(endpoint, project_id, version, params)
+        return await report_cache.aget_or_compute(key, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/schedule/{project_id}")
-def schedule_report(
+async def schedule_report(
     project_id: int,
     month: int,
     year: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    trade: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_project_db),
 ):
     """
     تقرير الجدول الزمني لمشروع في شهر معين
+
+    بيقرا من ledger_monthly_rollup؛ التفاصيل اليومية من /reports/ledger
     """
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Invalid month")
 
-    last_day = calendar.monthrange(year, month)[1]
-    start_date = date(year, month, 1)
-    end_date = date(year, month, last_day)
+    return await _cached_report(
+        db, request, response, if_none_match, project_id,
+        "schedule",
+        {"year": year, "month": month, "trade": trade},
+        lambda: async_reports_service.schedule_report(
+            db, project_id, year=year, month=month, trade=trade
+        ),
+    )
+
 
-    q = (
-        db.query(
-            BOQItem.item_code,
-            BOQItem.description,
-            func.sum(DailyLedger.distributed_qty).label("total_qty"),
+@router.get("/schedule-matrix/{project_id}")
+async def schedule_matrix_report(
+    project_id: int,
+    year: int,
+    request: Request,
+    response: Response,
+    trade: Optional[str] = None,
+    cumulative: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_project_db),
+):
+    """
+    مصفوفة بند × شهر لسنة كاملة (بديل 12 طلب لـ /schedule)
+    """
+    return await _cached_report(
+        db, request, response, if_none_match, project_id,
+        "schedule-matrix",
+        {"year": year, "trade": trade, "cumulative": cumulative},
+        lambda: async_reports_service.schedule_matrix(
+            db, project_id, year=year, trade=trade, cumulative=cumulative
+        ),
+    )
+
+
+@router.get("/schedule/{project_id}/export")
+def export_schedule_report(
+    project_id: int,
+    month: int,
+    year: int,
+    trade: Optional[str] = None,
+    fmt: str = Query("xlsx", alias="format"),
+    db: Session = Depends(get_project_db),
+):
+    """
+    تصدير تقرير الشهر (xlsx / csv)
+    """
+    version = projects_service.get_data_version(db, project_id)
+    try:
+        rows = _report_data(
+            version, project_id,
+            "schedule",
+            {"year": year, "month": month, "trade": trade},
+            lambda: reports_service.schedule_report(
+                db, project_id, year=year, month=month, trade=trade
+            ),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return export_response(
+        fmt,
+        reports_service.SCHEDULE_EXPORT_COLUMNS,
+        rows,
+        filename=f"schedule_{project_id}_{year}_{month:02d}",
+    )
+
+
+@router.get("/schedule-matrix/{project_id}/export")
+def export_schedule_matrix(
+    project_id: int,
+    year: int,
+    trade: Optional[str] = None,
+    cumulative: bool = False,
+    fmt: str = Query("xlsx", alias="format"),
+    db: Session = Depends(get_project_db),
+):
+    """
+    تصدير مصفوفة السنة (بند × شهر) كجدول مسطح (xlsx / csv)
+    """
+    version = projects_service.get_data_version(db, project_id)
+    try:
+        matrix = _report_data(
+            version, project_id,
+            "schedule-matrix",
+            {"year": year, "trade": trade, "cumulative": cumulative},
+            lambda: reports_service.schedule_matrix(
+                db, project_id, year=year, trade=trade, cumulative=cumulative
+            ),
         )
-        .join(DailyLedger, DailyLedger.boq_item_id == BOQItem.id)
-        .filter(
-            DailyLedger.project_id == project_id,
-            DailyLedger.entry_date >= start_date,
-            DailyLedger.entry_date <= end_date,
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    columns, rows = reports_service.schedule_matrix_table(matrix)
+    return export_response(
+        fmt, columns, rows, filename=f"schedule_matrix_{project_id}_{year}"
+    )
+
+
+@router.get("/range/{project_id}")
+async def range_report(
+    project_id: int,
+    date_from: date,
+    date_to: date,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_project_db),
+):
+    """
+    إجمالى كل بند فى أى مدة [date_from, date_to]
+    """
+    return await _cached_report(
+        db, request, response, if_none_match, project_id,
+        "range",
+        {"date_from": date_from, "date_to": date_to},
+        lambda: async_reports_service.range_report(db, project_id, date_from, date_to),
+    )
+
+
+@router.get("/weekly/{project_id}")
+async def weekly_report(
+    project_id: int,
+    date_from: date,
+    date_to: date,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_project_db),
+):
+    """
+    تقرير أسبوع بأسبوع (بند × أسبوع) لمدة معينة
+    """
+    return await _cached_report(
+        db, request, response, if_none_match, project_id,
+        "weekly",
+        {"date_from": date_from, "date_to": date_to},
+        lambda: async_reports_service.weekly_report(db, project_id, date_from, date_to),
+    )
+
+
+@router.get("/s-curve/{project_id}")
+async def s_curve_report(
+    project_id: int,
+    request: Request,
+    response: Response,
+    trade: Optional[str] = None,
+    by_trade: bool = False,
+    points: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_project_db),
+):
+    """
+    منحنى القيمة التراكمية الفعلية (S-curve) للمشروع أو لكل تخصص
+    """
+    return await _cached_report(
+        db, request, response, if_none_match, project_id,
+        "s-curve",
+        {"trade": trade, "by_trade": by_trade, "points": points},
+        lambda: async_reports_service.s_curve(
+            db, project_id, trade=trade, by_trade=by_trade, points=points
+        ),
+    )
+
+
+@router.get("/ledger/{project_id}")
+async def ledger_report(
+    project_id: int,
+    request: Request,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    boq_item_id: Optional[int] = None,
+    invoice_id: Optional[int] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_project_db),
+):
+    """
+    صفوف الـ DailyLedger لمشروع (drill-down يومى)
+    """
+    etag = await _project_etag(db, request, project_id)
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    stmt = reports_service.ledger_query(
+        project_id,
+        date_from=date_from,
+        date_to=date_to,
+        boq_item_id=boq_item_id,
+        invoice_id=invoice_id,
+    )
+    stream_format = negotiate_stream_format(accept)
+    if stream_format:
+        streaming = stream_query(
+            stmt, stream_format, session_factory=project_session_factory(project_id)
         )
-        .group_by(BOQItem.item_code, BOQItem.description)
-        .all()
-    )
-
-    return [
-        {
-            "item_code": row.item_code,
-            "description": row.description,
-            "total_qty": float(row.total_qty) if row.total_qty is not None else 0.0,
-        }
-        for row in q
-    ]
+        if etag:
+            streaming.headers["ETag"] = etag
+        return streaming
+
+    if etag:
+        response.headers["ETag"] = etag
+    return await async_reports_service.query_rows(db, stmt)
+
+
+@router.get("/portfolio")
+def portfolio_report():
+    """
+    ملخص كل المشاريع (مستخلصات + قيم لكل تخصص)
+
+    فى وضع sharding الاستعلام بيتنفذ على كل الـ shards بالتوازى
+    والنتايج بتتجمع فى رد واحد.
+    """
+    return reports_service.merge_portfolio(fan_out(reports_service.portfolio_summary))
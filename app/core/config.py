@@ -11,6 +11,40 @@ class Settings:
     SQLITE_FILE_NAME: str = "construction_system.db"
     DATABASE_URL: str = f"sqlite:///{SQLITE_FILE_NAME}"
     
+    # SQLite PRAGMAs بتتطبق على كل connection جديدة (SQLITE_PROFILE)
+    SQLITE_PROFILE: str = "balanced"
+    SQLITE_PROFILES: dict = {
+        # إعدادات SQLite الافتراضية (rollback journal)
+        "legacy": {},
+        # WAL: القراءة مبتستناش الكتابة، و NORMAL آمن مع WAL
+        "balanced": {
+            # incremental vacuum (بيتطبق على القواعد الجديدة؛ القديمة محتاجة VACUUM مرة)
+            "auto_vacuum": "INCREMENTAL",
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "temp_store": "MEMORY",
+            "cache_size": -64000,  # KB (سالب = بالكيلوبايت)
+        },
+        # أسرع، لكن آخر transactions ممكن تضيع لو الجهاز فصل (مش للإنتاج)
+        "fast": {
+            "auto_vacuum": "INCREMENTAL",
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "busy_timeout": 5000,
+            "temp_store": "MEMORY",
+            "cache_size": -131072,
+            "mmap_size": 268435456,  # 256MB
+        },
+        # أقصى أمان للبيانات
+        "safe": {
+            "auto_vacuum": "INCREMENTAL",
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "busy_timeout": 10000,
+        },
+    }
+    
     # API
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "Construction Cost Control API"
@@ -19,6 +53,63 @@ class Settings:
     UPLOAD_DIR: str = "temp_uploads"
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
     
+    # Bulk writes (عدد الصفوف فى كل INSERT مجمع)
+    BULK_BATCH_SIZE: int = 500
+    
+    # عدد الصفوف فى كل COPY / executemany (staging و ledger)
+    BULK_COPY_BATCH_SIZE: int = 50000
+    
+    # PostgreSQL connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # ثوانى
+    DB_POOL_TIMEOUT: int = 30
+    
+    # Write coordinator: كاتب واحد + group commit
+    # auto = شغال على SQLite بس / on / off
+    WRITE_COORDINATOR: str = "auto"
+    WRITE_BATCH_MAX_UNITS: int = 32  # أقصى عدد units فى commit واحد
+    # انتظار units إضافية قبل الـ commit. 0 = الـ batch بتاخد اللى اتجمع فى الطابور
+    # بس وقت الـ commit اللى قبلها؛ الانتظار يفيد لو الـ fsync تقيل (synchronous=FULL
+    # على disk بطئ)، وعلى fsync سريع بيقلل الـ throughput
+    WRITE_BATCH_WAIT_MS: int = 0
+    
+    # Sharding: ملف SQLite لكل مشروع (أو مجموعة مشاريع) + catalog للمشاريع
+    SHARDING_ENABLED: bool = False
+    SHARD_DIR: str = "shards"
+    SHARD_GROUP_SIZE: int = 1  # عدد المشاريع فى كل shard
+    CATALOG_DATABASE_URL: str = "sqlite:///catalog.db"
+    SHARD_FANOUT_WORKERS: int = 8  # threads التقارير المجمعة على كل الـ shards
+    
+    # صيانة SQLite: PRAGMA optimize + incremental vacuum + quick_check
+    # auto = scheduler شغال فى الـ API على SQLite بس / on / off
+    MAINTENANCE_SCHEDULER: str = "auto"
+    MAINTENANCE_INTERVAL_SECONDS: int = 6 * 3600
+    MAINTENANCE_DELETE_THRESHOLD: int = 100000  # صفوف ممسوحة تستدعى صيانة بدرى
+    MAINTENANCE_VACUUM_PAGES: int = 0  # صفحات كل incremental vacuum (0 = كل الفاضى)
+    
+    # قياس زمن الاستعلامات (app/db/instrumentation.py)
+    QUERY_INSTRUMENTATION: bool = False
+    SLOW_QUERY_MS: float = 200.0  # أبطأ من كده بيتسجل فى SLOW_QUERY_LOG
+    SLOW_QUERY_LOG: str = "slow_queries.jsonl"
+    
+    # أقصى عدد صفوف فى صفحة الـ staging
+    STAGING_PAGE_MAX_SIZE: int = 5000
+    
+    # Retention: ضغط staging المستخلصات المعتمدة بعد عدد أيام (None = مقفول)
+    STAGING_RETENTION_DAYS: Optional[int] = 30
+    STAGING_COMPACTION_BATCH: int = 100  # أقصى عدد مستخلصات فى كل تشغيل
+    
+    # Streaming responses (عدد الصفوف فى كل fetch / Arrow batch)
+    STREAM_BATCH_SIZE: int = 1000
+    
+    # Caches
+    BOQ_CACHE_MAX_PROJECTS: int = 64
+    REPORT_CACHE_MAX_ENTRIES: int = 256
+    REPORT_CACHE_TTL_SECONDS: int = 600
+    REPORT_CACHE_DIR: Optional[str] = "report_cache"  # None = ذاكرة فقط
+    REPORT_CACHE_DISK_MAX_ENTRIES: int = 2048
+    
     # CORS
     ALLOWED_ORIGINS: list = ["*"]
     
@@ -28,6 +119,35 @@ class Settings:
         env_db_url = os.getenv("DATABASE_URL")
         if env_db_url:
             self.DATABASE_URL = env_db_url
+        env_sqlite_profile = os.getenv("SQLITE_PROFILE")
+        if env_sqlite_profile:
+            self.SQLITE_PROFILE = env_sqlite_profile
+        env_sharding = os.getenv("SHARDING_ENABLED")
+        if env_sharding:
+            self.SHARDING_ENABLED = env_sharding.lower() in ("1", "true", "yes", "on")
+        env_shard_dir = os.getenv("SHARD_DIR")
+        if env_shard_dir:
+            self.SHARD_DIR = env_shard_dir
+        env_catalog_url = os.getenv("CATALOG_DATABASE_URL")
+        if env_catalog_url:
+            self.CATALOG_DATABASE_URL = env_catalog_url
+        env_write_coordinator = os.getenv("WRITE_COORDINATOR")
+        if env_write_coordinator:
+            self.WRITE_COORDINATOR = env_write_coordinator
+        env_maintenance = os.getenv("MAINTENANCE_SCHEDULER")
+        if env_maintenance:
+            self.MAINTENANCE_SCHEDULER = env_maintenance
+        env_instrumentation = os.getenv("QUERY_INSTRUMENTATION")
+        if env_instrumentation:
+            self.QUERY_INSTRUMENTATION = env_instrumentation.lower() in ("1", "true", "yes", "on")
+        env_slow_query_ms = os.getenv("SLOW_QUERY_MS")
+        if env_slow_query_ms:
+            self.SLOW_QUERY_MS = float(env_slow_query_ms)
+        env_retention = os.getenv("STAGING_RETENTION_DAYS")
+        if env_retention:
+            self.STAGING_RETENTION_DAYS = (
+                None if env_retention.lower() in ("off", "none") else int(env_retention)
+            )
 
 
 # Singleton instance
@@ -0,0 +1,282 @@
+"""
+Archive tier: نقل بيانات المشاريع المقفولة لقاعدة أرشيف مربوطة بـ ATTACH
+
+الأرشيف ملف SQLite جنب القاعدة (construction_system.archive.db أو
+shard_0000.archive.db) بنفس الـ schema. الأرشفة بتضغط الـ staging بتاع
+المستخلصات المعتمدة فى staging_snapshots (JSON + zlib، زى الـ retention)،
+وبتنسخ كل صفوف المشروع للأرشيف، وبتمسح الجداول الكبيرة (ARCHIVED_TABLES)
+من القاعدة الأساسية، وبتعلّم المشروع archived. كل connection بتعمل ATTACH للأرشيف read-only
+(app/db/session.py)، والقراءة لمشروع مؤرشف بتعدى على session مربوطة بـ
+schema_translate_map فنفس الاستعلامات بتقرا من archive.* من غير تعديل.
+
+Usage:
+    python -m app.db.archive 12       # أرشفة المشروع 12
+"""
+
+import argparse
+import os
+import sys
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import create_engine, delete, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import ARCHIVE_SCHEMA, archive_path, engine as hot_engine
+from app.db.write_coordinator import WriteCoordinator, write_coordinator
+
+# الجداول اللى بتتمسح من القاعدة الأساسية بعد الأرشفة (الباقى صغير وبيفضل)
+ARCHIVED_TABLES = (
+    "daily_ledger",
+    "invoice_details",
+    "staging_invoice_details",
+    "staging_snapshots",
+)
+
+# execution options لقراءة مشروع مؤرشف من الأرشيف
+ARCHIVE_OPTIONS = {"schema_translate_map": {None: ARCHIVE_SCHEMA}}
+
+
+class ProjectArchived(ValueError):
+    """كتابة على مشروع مؤرشف (الأرشيف قراءة بس)"""
+
+
+# {archive path: (mtime, archived project ids)}
+_archived: Dict[str, Tuple[float, FrozenSet[int]]] = {}
+_factories: Dict[int, Any] = {}
+_lock = threading.Lock()
+
+
+def archived_projects(engine: Engine) -> FrozenSet[int]:
+    """
+    المشاريع المؤرشفة فى قاعدة
+
+    القائمة بتتقرا تانى بس لما ملف الأرشيف يتغير (mtime)، فأرشفة من
+    process تانية (الـ CLI) بتبان للسيرفر من غير restart.
+
+    Args:
+        engine: engine القاعدة الأساسية
+
+    Returns:
+        FrozenSet[int]: فاضية لو مفيش أرشيف
+    """
+    path = archive_path(engine.url.render_as_string(hide_password=False))
+    if path is None or not os.path.exists(path):
+        return frozenset()
+    mtime = os.path.getmtime(path)
+    cached = _archived.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    projects = Base.metadata.tables["projects"]
+    with engine.connect() as conn:
+        ids = frozenset(conn.scalars(select(projects.c.id).where(projects.c.archived.is_(True))))
+    _archived[path] = (mtime, ids)
+    return ids
+
+
+def invoice_project_id(engine: Engine, invoice_id: int) -> Optional[int]:
+    """المشروع بتاع مستخلص (invoices_log بيفضل فى القاعدة الأساسية)"""
+    invoices = Base.metadata.tables["invoices_log"]
+    with engine.connect() as conn:
+        return conn.scalar(select(invoices.c.project_id).where(invoices.c.id == invoice_id))
+
+
+def archive_factory(factory):
+    """
+    نسخة من sessionmaker / async_sessionmaker بتقرا من الأرشيف
+
+    Args:
+        factory: الـ session factory الأصلى
+
+    Returns:
+        نفس نوع الـ factory مربوط بـ engine.execution_options(ARCHIVE_OPTIONS)
+    """
+    archived = _factories.get(id(factory))
+    if archived is None:
+        with _lock:
+            archived = _factories.get(id(factory))
+            if archived is None:
+                kw = dict(factory.kw)
+                kw["bind"] = kw["bind"].execution_options(**ARCHIVE_OPTIONS)
+                archived = type(factory)(class_=factory.class_, **kw)
+                _factories[id(factory)] = archived
+    return archived
+
+
+def route_project(factory, engine: Engine, project_id: int):
+    """الـ factory المناسب لمشروع (الأرشيف لو مؤرشف)"""
+    if project_id in archived_projects(engine):
+        return archive_factory(factory)
+    return factory
+
+
+def route_invoice(factory, engine: Engine, invoice_id: int):
+    """الـ factory المناسب لمستخلص (الأرشيف لو مشروعه مؤرشف)"""
+    archived = archived_projects(engine)
+    if archived and invoice_project_id(engine, invoice_id) in archived:
+        return archive_factory(factory)
+    return factory
+
+
+def ensure_writable(engine: Engine, project_id: int) -> None:
+    """
+    Raises:
+        ProjectArchived: لو المشروع مؤرشف (الأرشيف قراءة بس)
+    """
+    if project_id in archived_projects(engine):
+        raise ProjectArchived(f"المشروع مؤرشف وللقراءة فقط (ID: {project_id})")
+
+
+def _compact_project_staging(db: Session, project_id: int) -> Dict[str, int]:
+    """ضغط staging كل المستخلصات المعتمدة فى المشروع (قبل النسخ للأرشيف)"""
+    # import هنا عشان الـ services بتستخدم الـ db layer
+    from app.models import InvoiceLog, InvoiceStatus
+    from app.services.staging_retention_service import compact_invoice_staging
+
+    totals = {"compacted_rows": 0, "raw_bytes": 0, "compressed_bytes": 0}
+    invoice_ids = db.scalars(
+        select(InvoiceLog.id).where(
+            InvoiceLog.project_id == project_id,
+            InvoiceLog.status == InvoiceStatus.APPROVED,
+            InvoiceLog.staging_compacted.is_(False),
+        )
+    ).all()
+    for invoice_id in invoice_ids:
+        result = compact_invoice_staging(db, invoice_id)
+        totals["compacted_rows"] += result["rows"]
+        totals["raw_bytes"] += result["raw_bytes"]
+        totals["compressed_bytes"] += result["compressed_bytes"]
+    return totals
+
+
+def _move_to_archive(db: Session, project_id: int, archive_engine: Engine) -> Dict[str, int]:
+    """
+    ضغط الـ staging، نسخ صفوف المشروع للأرشيف ومسح الجداول الكبيرة (unit كتابة واحدة)
+
+    القراءة والمسح على connection الكاتب (BEGIN IMMEDIATE على SQLite)،
+    فمفيش كتابة على المشروع تدخل بين النسخ والمسح وتضيع.
+
+    Returns:
+        Dict: {archived_rows, removed_rows, compacted_rows, raw_bytes, compressed_bytes}
+    """
+    # import هنا عشان sharding بيستخدم الـ routing اللى فوق
+    from app.db.sharding import copy_project_rows, project_rows_filter
+
+    totals = _compact_project_staging(db, project_id)
+    projects = Base.metadata.tables["projects"]
+    with archive_engine.begin() as dst:
+        # بقايا محاولة سابقة فشلت قبل ما المشروع يتعلّم archived
+        for table in reversed(Base.metadata.sorted_tables):
+            condition = project_rows_filter(table, project_id)
+            if condition is not None:
+                dst.execute(delete(table).where(condition))
+        archived_rows = copy_project_rows(db.connection(), dst, project_id)
+        dst.execute(update(projects).where(projects.c.id == project_id).values(archived=True))
+
+    removed_rows = 0
+    for name in ARCHIVED_TABLES:
+        table = Base.metadata.tables[name]
+        result = db.execute(delete(table).where(project_rows_filter(table, project_id)))
+        removed_rows += result.rowcount
+    db.execute(update(projects).where(projects.c.id == project_id).values(archived=True))
+    db.commit()
+    totals.update(archived_rows=archived_rows, removed_rows=removed_rows)
+    return totals
+
+
+def archive_project(
+    project_id: int,
+    engine: Optional[Engine] = None,
+    writer: Optional[WriteCoordinator] = None,
+) -> Dict[str, int]:
+    """
+    أرشفة مشروع: نسخه للأرشيف ومسح الجداول الكبيرة من القاعدة الأساسية
+
+    صفوف الـ staging للمستخلصات المعتمدة بتتنسخ مضغوطة (staging_snapshots)؛
+    الـ ledger و invoice_details بيفضلوا صفوف عشان التقارير بتقراهم بـ SQL.
+    الضغط والنسخ والمسح unit واحدة عن طريق كاتب القاعدة. النسخ للأرشيف بيتعمل
+    commit الأول، وبعده المسح من القاعدة الأساسية + علامة archived مع
+    الـ batch، فلو حصل فشل فى النص المشروع بيفضل شغال عادى وإعادة
+    الأرشفة بتبدأ من جديد.
+
+    Args:
+        project_id: معرّف المشروع
+        engine: engine القاعدة الأساسية (None = القاعدة الرئيسية)
+        writer: كاتب نفس القاعدة (None = write_coordinator)
+
+    Returns:
+        Dict: {project_id, archived_rows, removed_rows, compacted_rows, raw_bytes, compressed_bytes}
+
+    Raises:
+        ValueError: لو المشروع مش موجود / مؤرشف بالفعل / القاعدة مش ملف SQLite
+    """
+    engine = engine or hot_engine
+    writer = writer or write_coordinator
+    path = archive_path(engine.url.render_as_string(hide_password=False))
+    if path is None:
+        raise ValueError("الأرشيف متاح لقواعد SQLite (ملف) بس")
+
+    projects = Base.metadata.tables["projects"]
+    with engine.connect() as conn:
+        row = conn.execute(select(projects.c.archived).where(projects.c.id == project_id)).first()
+    if row is None:
+        raise ValueError(f"المشروع غير موجود (ID: {project_id})")
+    if row.archived:
+        raise ValueError(f"المشروع مؤرشف بالفعل (ID: {project_id})")
+
+    archive_engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(archive_engine)
+        result = writer.run(_move_to_archive, project_id, archive_engine)
+
+        # ملف الأرشيف من غير صفحات فاضية
+        with archive_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+    finally:
+        archive_engine.dispose()
+
+    # mtime جديد = archived_projects بتقرا القائمة تانى (فى كل الـ processes)
+    os.utime(path)
+    _archived.pop(path, None)
+    return {"project_id": project_id, **result}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Move a closed project to the archive DB")
+    parser.add_argument("project_id", type=int, help="معرّف المشروع")
+    args = parser.parse_args(argv)
+
+    from app.db import sharding
+
+    router = sharding.shard_router
+    target, writer = hot_engine, write_coordinator
+    try:
+        if router is not None:
+            shard = router.project_shard(args.project_id)
+            if shard is None:
+                raise ValueError(f"المشروع غير موجود (ID: {args.project_id})")
+            target, writer = shard.engine, shard.writer
+        try:
+            result = archive_project(args.project_id, target, writer)
+        finally:
+            # الـ catalog بياخد حالة الـ shard (حتى لو الأرشفة اتعملت قبل كده أو فشلت)
+            if router is not None:
+                router.set_archived(args.project_id, args.project_id in archived_projects(target))
+    except ValueError as e:
+        print(str(e))
+        return 1
+
+    print(
+        f"project {result['project_id']}: {result['archived_rows']} rows archived, "
+        f"{result['removed_rows']} rows removed from the hot database, "
+        f"{result['compacted_rows']} staging rows compressed "
+        f"({result['raw_bytes']} -> {result['compressed_bytes']} bytes)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
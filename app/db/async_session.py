@@ -0,0 +1,95 @@
+"""Async database engine and session (AsyncSession) for I/O-bound endpoints"""
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.config import settings
+from app.db.session import apply_sqlite_profile, archive_path, attach_archive
+
+# الـ driver الـ async المقابل لكل driver sync
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: Optional[str] = None) -> str:
+    """
+    تحويل DATABASE_URL لنفس القاعدة بـ driver async
+    
+    Args:
+        url: DATABASE_URL (None = settings.DATABASE_URL)
+        
+    Returns:
+        str: الـ URL بالـ driver الـ async (aiosqlite / asyncpg)
+        
+    Raises:
+        ValueError: لو نوع القاعدة مش مدعوم
+    """
+    url = url or settings.DATABASE_URL
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"لا يوجد driver async لقاعدة البيانات: {scheme}")
+    return f"{ASYNC_DRIVERS[backend]}{sep}{rest}"
+
+
+def create_async_db_engine(
+    url: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> AsyncEngine:
+    """
+    إنشاء async engine بنفس إعدادات create_db_engine
+    
+    Args:
+        url: DATABASE_URL (None = settings.DATABASE_URL)
+        profile: SQLite profile (None = settings.SQLITE_PROFILE)
+        
+    Returns:
+        AsyncEngine
+    """
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url)
+        # الـ PRAGMAs بتتطبق على الـ connections من خلال الـ sync engine الداخلى
+        apply_sqlite_profile(engine.sync_engine, profile)
+        archive = archive_path(url)
+        if archive:
+            attach_archive(engine.sync_engine, archive)
+        return engine
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+
+
+# Create async database engine
+async_engine = create_async_db_engine()
+
+# Async session factory (expire_on_commit=False: الـ objects بتتقرا بعد الـ commit
+# فى الـ response من غير lazy load)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    """
+    Dependency for getting async database session
+    Use with FastAPI Depends() فى الـ endpoints الـ async
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
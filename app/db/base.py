@@ -4,3 +4,6 @@ from sqlalchemy.orm import declarative_base
 
 # Base class for all models
 Base = declarative_base()
+
+# Base class لجداول الـ catalog (sharding mode)؛ قاعدة منفصلة عن الـ shards
+CatalogBase = declarative_base()
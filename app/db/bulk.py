@@ -0,0 +1,127 @@
+"""Bulk row inserts: COPY FROM STDIN on PostgreSQL, executemany elsewhere"""
+
+import enum
+import io
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def _fill_defaults(table, rows: Sequence[Dict[str, Any]], columns: List[str]) -> List[str]:
+    """
+    إضافة الأعمدة اللى ليها default ثابت ومش موجودة فى الصفوف
+    
+    COPY مبيطبقش الـ defaults بتاعة SQLAlchemy (اللى بتتحسب فى Python)،
+    فلازم تتكتب صراحة زى ما ORM insert بيعمل.
+    """
+    for column in table.columns:
+        if column.name in columns or column.primary_key:
+            continue
+        default = column.default
+        if default is not None and default.is_scalar:
+            for row in rows:
+                row.setdefault(column.name, default.arg)
+            columns.append(column.name)
+    return columns
+
+
+def _copy_value(value: Any) -> str:
+    """قيمة واحدة بصيغة COPY text (\\N = NULL)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, enum.Enum):
+        # SQLAlchemy Enum بيخزن اسم العنصر مش القيمة
+        value = value.name
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_payload(rows: Iterable[Dict[str, Any]], columns: Sequence[str]) -> io.StringIO:
+    """
+    تحويل الصفوف لـ COPY text format (tab-separated)
+    
+    Args:
+        rows: الصفوف
+        columns: ترتيب الأعمدة
+        
+    Returns:
+        StringIO: جاهز للقراءة من أوله
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row.get(col)) for col in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_into(db: Session, table, columns: Sequence[str], payload: io.StringIO) -> None:
+    """تنفيذ COPY على connection الـ Session الحالية (نفس الـ transaction)"""
+    dbapi_connection = db.connection().connection.dbapi_connection
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    sql = f'COPY "{table.name}" ({column_list}) FROM STDIN'
+    cursor = dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, payload)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                while chunk := payload.read(1024 * 1024):
+                    copy.write(chunk)
+    finally:
+        cursor.close()
+
+
+def bulk_insert(
+    db: Session,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    إدخال صفوف كتير مرة واحدة (بدون commit)
+    
+    على PostgreSQL بيستخدم COPY FROM STDIN، وعلى غيره INSERT واحد
+    executemany على batches بدل ORM objects صف صف.
+    
+    Args:
+        db: Database session
+        model: الـ ORM model
+        rows: الصفوف (dicts بأسماء الأعمدة، كلها بنفس المفاتيح)
+        batch_size: عدد الصفوف فى كل COPY / executemany
+        
+    Returns:
+        int: عدد الصفوف المدخلة
+    """
+    if not rows:
+        return 0
+
+    table = model.__table__
+    batch_size = batch_size or settings.BULK_COPY_BATCH_SIZE
+
+    if db.get_bind().dialect.name == "postgresql":
+        rows = [dict(row) for row in rows]
+        columns = _fill_defaults(table, rows, list(rows[0].keys()))
+        # الـ ORM ممكن يكون عنده objects لسه مبعتهاش (FK لازم تكون موجودة)
+        db.flush()
+        for start in range(0, len(rows), batch_size):
+            _copy_into(db, table, columns, copy_payload(rows[start:start + batch_size], columns))
+        return len(rows)
+
+    stmt = insert(table)
+    for start in range(0, len(rows), batch_size):
+        db.execute(stmt, list(rows[start:start + batch_size]))
+    return len(rows)
@@ -0,0 +1,179 @@
+"""
+قياس زمن الاستعلامات (before/after_cursor_execute على كل الـ engines)
+
+كل جملة بتتجمع بشكلها (من غير القيم) فى عدادات فى الذاكرة: عدد المرات،
+الوقت الكلى، وأبطأ تنفيذ. أى تنفيذ أبطأ من SLOW_QUERY_MS بيتكتب سطر
+JSON فى SLOW_QUERY_LOG، والـ diagnostics CLI (check_db.py) بيقرا الملف.
+
+بيتشغل من lifespan الـ API لو QUERY_INSTRUMENTATION=1.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# IN (?, ?, ?) بأطوال مختلفة = نفس الاستعلام
+_IN_LIST_RE = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """شكل الجملة للتجميع (مسافات موحدة وقوائم IN مختصرة)"""
+    statement = _SPACES_RE.sub(" ", statement).strip()
+    return _IN_LIST_RE.sub("(?, ...)", statement)
+
+
+class QueryInstrumentation:
+    """
+    عدادات زمن الاستعلامات + سجل الاستعلامات البطيئة (JSONL)
+
+    العدادات بتقف عند max_statements جملة مختلفة (الجمل الجديدة بعدها
+    بتتحسب فى السجل البطئ بس) عشان الذاكرة متكبرش مع الاستعلامات الديناميكية.
+    """
+
+    def __init__(self, slow_ms: float, log_path: Optional[str], max_statements: int = 1000):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.max_statements = max_statements
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._installed = False
+        self.executions = 0
+        self.slow_queries = 0
+
+    # ---------- hooks ----------
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        key = normalize_statement(statement)
+
+        with self._lock:
+            self.executions += 1
+            entry = self._statements.get(key)
+            if entry is None and len(self._statements) < self.max_statements:
+                entry = self._statements[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            if entry is not None:
+                entry["count"] += 1
+                entry["total_ms"] += elapsed_ms
+                entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            if elapsed_ms < self.slow_ms:
+                return
+            self.slow_queries += 1
+            if self.log_path:
+                record = {
+                    "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                    "database": conn.engine.url.render_as_string(hide_password=True),
+                    "ms": round(elapsed_ms, 2),
+                    "rows": cursor.rowcount,
+                    "statement": key,
+                }
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def install(self) -> None:
+        """تركيب الـ hooks على كل الـ engines (الموجودة واللى هتتعمل بعدين)"""
+        if self._installed:
+            return
+        event.listen(Engine, "before_cursor_execute", self._before_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_execute)
+        self._installed = True
+
+    def remove(self) -> None:
+        if not self._installed:
+            return
+        event.remove(Engine, "before_cursor_execute", self._before_execute)
+        event.remove(Engine, "after_cursor_execute", self._after_execute)
+        self._installed = False
+
+    # ---------- stats ----------
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """أكتر الجمل وقتاً كلياً"""
+        with self._lock:
+            items = list(self._statements.items())
+        items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return [
+            {
+                "statement": statement,
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 2),
+                "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                "max_ms": round(entry["max_ms"], 2),
+            }
+            for statement, entry in items[:limit]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات القياس (للـ /health)"""
+        with self._lock:
+            return {
+                "enabled": self._installed,
+                "statements": len(self._statements),
+                "executions": self.executions,
+                "slow_queries": self.slow_queries,
+                "slow_ms": self.slow_ms,
+            }
+
+
+def read_slow_log(path: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    أبطأ الاستعلامات من سجل الـ JSONL مجمعة بالجملة
+
+    Args:
+        path: ملف السجل (None = settings.SLOW_QUERY_LOG)
+        limit: عدد الجمل
+
+    Returns:
+        List[Dict]: {statement, count, max_ms, avg_ms, last_at} مترتبة بـ max_ms
+    """
+    path = path or settings.SLOW_QUERY_LOG
+    if not os.path.exists(path):
+        return []
+
+    grouped: Dict[str, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # سطر مقطوع (الـ process اتقفلت وهى بتكتب)
+                continue
+            entry = grouped.setdefault(
+                record["statement"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_at": None}
+            )
+            entry["count"] += 1
+            entry["total_ms"] += record["ms"]
+            entry["max_ms"] = max(entry["max_ms"], record["ms"])
+            entry["last_at"] = max(entry["last_at"] or record["at"], record["at"])
+
+    rows = [
+        {
+            "statement": statement,
+            "count": entry["count"],
+            "max_ms": round(entry["max_ms"], 2),
+            "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+            "last_at": entry["last_at"],
+        }
+        for statement, entry in grouped.items()
+    ]
+    rows.sort(key=lambda row: row["max_ms"], reverse=True)
+    return rows[:limit]
+
+
+# Singleton instance
+query_instrumentation = QueryInstrumentation(settings.SLOW_QUERY_MS, settings.SLOW_QUERY_LOG)
@@ -0,0 +1,301 @@
+"""
+صيانة SQLite: ANALYZE / PRAGMA optimize / incremental vacuum / quick_check
+
+كل مهمة بتتسجل فى جدول maintenance_log (المدة والنتيجة). الـ scheduler
+بيشتغل جوه الـ API (thread واحد) كل MAINTENANCE_INTERVAL_SECONDS، أو بدرى
+لو اتمسح MAINTENANCE_DELETE_THRESHOLD صف من القاعدة (أرشفة، retention،
+إعادة رفع staging). للتشغيل اليدوى: maintain_db.py.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models import MaintenanceLog
+from app.utils.timestamps import utcnow
+
+# ترتيب التشغيل لما أكتر من مهمة تتطلب
+TASKS = ("analyze", "optimize", "incremental_vacuum", "quick_check")
+
+# المهام حسب سبب التشغيل (ANALYZE الكامل يدوى بس؛ optimize بيعمله لما يلزم)
+SCHEDULED_TASKS = ("optimize", "incremental_vacuum", "quick_check")
+DELETE_TASKS = ("optimize", "incremental_vacuum")
+
+# PRAGMA auto_vacuum: 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def maintenance_enabled(mode: Optional[str] = None, url: Optional[str] = None) -> bool:
+    """
+    هل الـ scheduler بيشتغل جوه الـ API؟
+
+    Args:
+        mode: auto / on / off (None = settings.MAINTENANCE_SCHEDULER)
+        url: DATABASE_URL (None = settings.DATABASE_URL)
+
+    Returns:
+        bool: auto = SQLite بس (PostgreSQL عنده autovacuum)
+
+    Raises:
+        ValueError: لو الـ mode غير معروف
+    """
+    mode = (mode or settings.MAINTENANCE_SCHEDULER).lower()
+    url = url or settings.DATABASE_URL
+    if mode == "auto":
+        return url.startswith("sqlite")
+    if mode in ("on", "off"):
+        return mode == "on"
+    raise ValueError(f"MAINTENANCE_SCHEDULER غير معروف: {mode} (auto / on / off)")
+
+
+def _freelist_count(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+
+def run_task(conn, task: str) -> Dict[str, Any]:
+    """
+    تنفيذ مهمة صيانة واحدة على connection (AUTOCOMMIT)
+
+    Args:
+        conn: SQLAlchemy Connection
+        task: واحدة من TASKS
+
+    Returns:
+        Dict: {status: ok / skipped / error, detail}
+
+    Raises:
+        ValueError: لو المهمة غير معروفة
+    """
+    if task == "analyze":
+        conn.exec_driver_sql("ANALYZE")
+        return {"status": "ok", "detail": None}
+
+    if task == "optimize":
+        conn.exec_driver_sql("PRAGMA optimize")
+        return {"status": "ok", "detail": None}
+
+    if task == "incremental_vacuum":
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != _AUTO_VACUUM_INCREMENTAL:
+            return {
+                "status": "skipped",
+                "detail": "auto_vacuum مش INCREMENTAL (maintain_db.py --enable-incremental-vacuum)",
+            }
+        before = _freelist_count(conn)
+        pages = settings.MAINTENANCE_VACUUM_PAGES
+        # الـ PRAGMA بيفضى صفحة مع كل step، و cursor.execute فى sqlite3 بيعمل
+        # step واحد بس؛ executescript بيكمل الجملة للآخر
+        conn.connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(pages)})" if pages else "PRAGMA incremental_vacuum"
+        )
+        freed = before - _freelist_count(conn)
+        return {"status": "ok", "detail": f"{freed} pages freed"}
+
+    if task == "quick_check":
+        problems = [row[0] for row in conn.exec_driver_sql("PRAGMA quick_check(100)")]
+        if problems == ["ok"]:
+            return {"status": "ok", "detail": None}
+        return {"status": "error", "detail": "\n".join(problems)}
+
+    raise ValueError(f"مهمة صيانة غير معروفة: {task} (المتاح: {', '.join(TASKS)})")
+
+
+def run_maintenance(
+    engine: Engine,
+    tasks: Iterable[str] = SCHEDULED_TASKS,
+    trigger: str = "manual",
+) -> List[Dict[str, Any]]:
+    """
+    تشغيل مهام الصيانة على قاعدة وتسجيلها فى maintenance_log
+
+    كل مهمة بتتسجل لوحدها بعد ما تخلص، ففشل مهمة (exception) بيتسجل
+    status=error والباقى بيكمل.
+
+    Args:
+        engine: SQLite engine
+        tasks: المهام (بتتنفذ بترتيب TASKS)
+        trigger: سبب التشغيل (schedule / deletes / manual)
+
+    Returns:
+        List[Dict]: {task, status, duration_ms, detail} لكل مهمة
+
+    Raises:
+        ValueError: لو القاعدة مش SQLite أو فيه مهمة غير معروفة
+    """
+    if engine.dialect.name != "sqlite":
+        raise ValueError("الصيانة دى خاصة بـ SQLite (PostgreSQL عنده autovacuum)")
+    requested = set(tasks)
+    unknown = requested - set(TASKS)
+    if unknown:
+        raise ValueError(f"مهمة صيانة غير معروفة: {', '.join(sorted(unknown))}")
+
+    results = []
+    for task in (name for name in TASKS if name in requested):
+        started_at = utcnow()
+        start = time.perf_counter()
+        try:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                outcome = run_task(conn, task)
+        except Exception as exc:
+            outcome = {"status": "error", "detail": str(exc)}
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        row = {
+            "task": task,
+            "trigger": trigger,
+            "status": outcome["status"],
+            "started_at": started_at,
+            "duration_ms": duration_ms,
+            "detail": outcome["detail"],
+        }
+        with engine.begin() as conn:
+            conn.execute(insert(MaintenanceLog), row)
+        results.append({key: row[key] for key in ("task", "status", "duration_ms", "detail")})
+    return results
+
+
+class MaintenanceScheduler:
+    """
+    thread صيانة جوه الـ API
+
+    بيصحى كل interval ثانية ويشغل SCHEDULED_TASKS على كل القواعد، أو
+    بدرى لو قاعدة اتمسح منها delete_threshold صف (عداد على كل DELETE
+    بيعدى على أى engine) فيشغل DELETE_TASKS عليها هى بس.
+    """
+
+    def __init__(
+        self,
+        targets: Callable[[], List[Engine]],
+        interval: float,
+        delete_threshold: int,
+    ):
+        self.targets = targets
+        self.interval = interval
+        self.delete_threshold = delete_threshold
+        self._deleted: Dict[str, int] = {}
+        self._due: set = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._listening = False
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_run: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    # ---------- delete counter ----------
+
+    def _count_deletes(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip()[:6].upper() != "DELETE" or cursor.rowcount <= 0:
+            return
+        key = conn.engine.url.render_as_string(hide_password=False)
+        with self._stats_lock:
+            deleted = self._deleted.get(key, 0) + cursor.rowcount
+            self._deleted[key] = deleted
+            if deleted >= self.delete_threshold:
+                self._due.add(key)
+                self._wake.set()
+
+    # ---------- thread ----------
+
+    def start(self) -> None:
+        """تشغيل الـ thread (لو مش شغال)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not self._listening:
+            # على Engine كله عشان الـ shards اللى بتتفتح بعدين تتعد هى كمان
+            event.listen(Engine, "after_cursor_execute", self._count_deletes)
+            self._listening = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """إيقاف الـ thread (المهمة اللى شغالة بتكمل الأول)"""
+        if self._listening:
+            event.remove(Engine, "after_cursor_execute", self._count_deletes)
+            self._listening = False
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _worker(self) -> None:
+        deadline = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            self._wake.wait(max(0.0, deadline - time.monotonic()))
+            if self._stop.is_set():
+                return
+            with self._stats_lock:
+                self._wake.clear()
+                due, self._due = self._due, set()
+
+            if time.monotonic() >= deadline:
+                self._run(self.targets(), SCHEDULED_TASKS, "schedule")
+                deadline = time.monotonic() + self.interval
+            elif due:
+                engines = [
+                    engine for engine in self.targets()
+                    if engine.url.render_as_string(hide_password=False) in due
+                ]
+                self._run(engines, DELETE_TASKS, "deletes")
+
+    def _run(self, engines: List[Engine], tasks, trigger: str) -> None:
+        for engine in engines:
+            key = engine.url.render_as_string(hide_password=False)
+            with self._stats_lock:
+                self._deleted.pop(key, None)
+            try:
+                results = run_maintenance(engine, tasks, trigger)
+                errors = [result["detail"] for result in results if result["status"] == "error"]
+            except Exception as exc:
+                # الـ thread لازم يفضل شغال (مثلاً maintenance_log لسه متعملش migration)
+                errors = [str(exc)]
+            with self._stats_lock:
+                self.runs += 1
+                self.last_run = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                if errors:
+                    self.failed_runs += 1
+                    self.last_error = errors[0]
+
+    # ---------- stats ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات الصيانة (للـ /health)"""
+        with self._stats_lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval_seconds": self.interval,
+                "delete_threshold": self.delete_threshold,
+                "pending_deletes": sum(self._deleted.values()),
+                "runs": self.runs,
+                "failed_runs": self.failed_runs,
+                "last_run": self.last_run,
+                "last_error": self.last_error,
+            }
+
+
+def maintenance_targets() -> List[Engine]:
+    """القواعد اللى بتتعملها صيانة: الرئيسية، أو الـ shards المفتوحة فى وضع sharding"""
+    from app.db.session import engine
+    from app.db.sharding import shard_router
+
+    if shard_router is None:
+        return [engine]
+    return [shard.engine for shard in shard_router.open_shards()]
+
+
+# Singleton instance (بيتشغل من lifespan الـ API لو maintenance_enabled())
+maintenance_scheduler = MaintenanceScheduler(
+    maintenance_targets,
+    interval=settings.MAINTENANCE_INTERVAL_SECONDS,
+    delete_threshold=settings.MAINTENANCE_DELETE_THRESHOLD,
+)
@@ -0,0 +1,310 @@
+"""
+Query-plan regression check for the service layer (SQLite)
+
+بيشغّل الـ services على قاعدة بيانات مؤقتة، بيسجل كل جملة SQL
+بتتنفذ، وبيعمل لكل واحدة EXPLAIN QUERY PLAN. أى full table scan على
+جدول مش فى ALLOWED_SCANS بيتعتبر regression (مثلاً index اتشال أو
+استعلام جديد من غير index مناسب).
+
+Usage:
+    python -m app.db.query_plans            # يطبع التقرير و exit 1 لو فيه scan
+    python -m app.db.query_plans --verbose  # يطبع خطة كل استعلام
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.db.session import create_db_engine
+
+# جداول مسموح فيها بالـ SCAN الكامل (مع السبب)
+ALLOWED_SCANS: Dict[str, str] = {}
+
+_SCAN_RE = re.compile(r"^SCAN (\w+)")
+_CHECKED_VERBS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+@dataclass
+class CapturedQuery:
+    """جملة SQL متسجلة أثناء تشغيل service"""
+    label: str
+    statement: str
+    parameters: Any
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+
+
+class QueryRecorder:
+    """تسجيل الجمل المنفذة على engine (before_cursor_execute)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.label = "setup"
+        self.queries: Dict[Tuple[str, str], CapturedQuery] = {}
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(_CHECKED_VERBS):
+            return
+        if executemany and parameters:
+            parameters = parameters[0]
+        key = (self.label, statement)
+        if key not in self.queries:
+            self.queries[key] = CapturedQuery(self.label, statement, parameters)
+
+    def run(self, label: str, fn: Callable[[], Any]) -> Any:
+        self.label = label
+        try:
+            return fn()
+        finally:
+            self.label = "setup"
+
+    def close(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def explain(engine, query: CapturedQuery, table_names: set) -> CapturedQuery:
+    """
+    تنفيذ EXPLAIN QUERY PLAN وتحديد الـ full scans
+    
+    Args:
+        engine: الـ engine (SQLite)
+        query: الجملة المتسجلة
+        table_names: أسماء الجداول الحقيقية (الـ subqueries مش بتتحسب)
+        
+    Returns:
+        CapturedQuery: نفس الجملة بعد ملء plan و full_scans
+    """
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + query.statement, query.parameters or ()
+        ).fetchall()
+    query.plan = [row[-1] for row in rows]
+    for detail in query.plan:
+        match = _SCAN_RE.match(detail)
+        if not match or "USING" in detail:
+            continue
+        table = match.group(1)
+        if table in table_names and table not in ALLOWED_SCANS:
+            query.full_scans.append(table)
+    return query
+
+
+def _write_csv(path: str, header: List[str], rows: List[List[Any]]) -> None:
+    import csv
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def exercise_services(db: Session, recorder: QueryRecorder, workdir: str) -> None:
+    """
+    تشغيل مسارات الـ services الأساسية على بيانات تجريبية
+    """
+    from app.schemas import BOQItemCreate, ProjectCreate, StagingPatch, StagingRowUpdate
+    from app.services import (
+        boq_service,
+        invoice_approval_service,
+        invoice_import_service,
+        invoice_summary_service,
+        projects_service,
+        reports_service,
+        rollup_service,
+        staging_retention_service,
+        staging_service,
+    )
+    from app.services.boq_cache import boq_cache
+
+    boq_cache.clear()
+    project = projects_service.create_project(db, ProjectCreate(name="plan-check"))
+    pid = project.id
+
+    boq_path = os.path.join(workdir, "boq.csv")
+    _write_csv(
+        boq_path,
+        ["item_code", "description", "unit", "unit_price"],
+        [[f"{c}-{i}", f"item {c}-{i}", "m", 10.0 + i] for c in range(1, 6) for i in range(1, 21)],
+    )
+    recorder.run("boq.import_boq_file", lambda: boq_service.import_boq_file(db, pid, boq_path))
+    recorder.run(
+        "boq.add_boq_item",
+        lambda: boq_service.add_boq_item(
+            db, pid, BOQItemCreate(item_code="9-1", description="x", unit="m", unit_price=5.0)
+        ),
+    )
+    recorder.run("boq.get_boq_items", lambda: boq_service.get_boq_items(db, pid))
+    recorder.run("boq.get_boq_rollup", lambda: boq_service.get_boq_rollup(db, pid, prefix="1", levels=2))
+
+    invoice_ids = []
+    for number, (start, end, trade) in enumerate(
+        [(date(2025, 1, 10), date(2025, 2, 20), "CIVIL"), (date(2025, 2, 1), date(2025, 3, 31), "ELEC")],
+        start=1,
+    ):
+        invoice = recorder.run(
+            "import.get_or_create_invoice",
+            lambda: invoice_import_service.get_or_create_invoice(db, pid, number, start, end),
+        )
+        invoice_ids.append(invoice.id)
+        path = os.path.join(workdir, f"invoice_{number}.csv")
+        _write_csv(
+            path,
+            ["item_code", "description", "qty", "percentage"],
+            [[f"{c}-{i}", f"item {c}-{i}", 3 * i, 100] for c in range(1, 6) for i in range(1, 21)]
+            + [["99-99", "missing", 1, 100]],
+        )
+        recorder.run(
+            "import.import_invoice_excel",
+            lambda: invoice_import_service.import_invoice_excel(db, invoice.id, path, trade_type=trade),
+        )
+
+    iid = invoice_ids[0]
+    recorder.run("staging.get_staging_version", lambda: staging_service.get_staging_version(db, iid))
+    rows, cursor = recorder.run(
+        "staging.get_staging_page",
+        lambda: staging_service.get_staging_page(db, iid, limit=20),
+    )
+    recorder.run(
+        "staging.get_staging_page(cursor, filters)",
+        lambda: staging_service.get_staging_page(
+            db, iid, after=staging_service.parse_cursor(cursor), limit=20,
+            trade="CIVIL", errors_only=True,
+        ),
+    )
+    version = staging_service.get_staging_version(db, iid)
+    recorder.run(
+        "staging.apply_staging_patch",
+        lambda: staging_service.apply_staging_patch(
+            db, iid,
+            StagingPatch(
+                base_version=version,
+                changes=[StagingRowUpdate(id=rows[0]["id"], raw_qty="5")],
+            ),
+        ),
+    )
+    recorder.run(
+        "staging.update_staging_rows_bulk",
+        lambda: staging_service.update_staging_rows_bulk(
+            db, iid, [StagingRowUpdate(id=rows[1]["id"], raw_percentage="50")]
+        ),
+    )
+
+    for invoice_id in invoice_ids:
+        recorder.run(
+            "approval.build_invoice_details_from_staging",
+            lambda: invoice_approval_service.build_invoice_details_from_staging(db, invoice_id),
+        )
+
+    recorder.run(
+        "retention.compact_approved_staging",
+        lambda: staging_retention_service.compact_approved_staging(
+            db, older_than_days=0, limit=1, project_ids=[pid]
+        ),
+    )
+    recorder.run(
+        "retention.restore_invoice_staging",
+        lambda: staging_retention_service.restore_invoice_staging(db, invoice_ids[0]),
+    )
+
+    recorder.run("projects.get_data_version", lambda: projects_service.get_data_version(db, pid))
+    recorder.run("reports.schedule_report", lambda: reports_service.schedule_report(db, pid, 2025, 2, trade="civil"))
+    recorder.run("reports.schedule_matrix", lambda: reports_service.schedule_matrix(db, pid, 2025, cumulative=True))
+    recorder.run(
+        "reports.range_report",
+        lambda: reports_service.range_report(db, pid, date(2025, 1, 15), date(2025, 2, 15)),
+    )
+    recorder.run(
+        "reports.weekly_report",
+        lambda: reports_service.weekly_report(db, pid, date(2025, 1, 1), date(2025, 3, 31)),
+    )
+    recorder.run("reports.s_curve", lambda: reports_service.s_curve(db, pid, by_trade=True, points=6))
+    recorder.run(
+        "reports.ledger_query",
+        lambda: db.execute(
+            reports_service.ledger_query(pid, date_from=date(2025, 2, 1), date_to=date(2025, 2, 28))
+        ).all(),
+    )
+    recorder.run(
+        "reports.invoice_details_query",
+        lambda: db.execute(reports_service.invoice_details_query(iid)).all(),
+    )
+    recorder.run(
+        "reports.portfolio_summary",
+        lambda: reports_service.portfolio_summary(db, [pid]),
+    )
+    recorder.run(
+        "invoices.list_project_invoices",
+        lambda: invoice_summary_service.list_project_invoices(db, pid),
+    )
+    recorder.run("rollup.rebuild_monthly_rollup", lambda: rollup_service.rebuild_monthly_rollup(db, pid))
+    recorder.run("rollup.rebuild_prefix_sums", lambda: rollup_service.rebuild_prefix_sums(db, pid))
+    recorder.run(
+        "invoices.rebuild_invoice_summaries",
+        lambda: invoice_summary_service.rebuild_invoice_summaries(db, pid),
+    )
+
+
+def check_query_plans(database_url: Optional[str] = None) -> List[CapturedQuery]:
+    """
+    تشغيل الـ services وإرجاع كل الاستعلامات بخططها
+    
+    Args:
+        database_url: قاعدة SQLite فاضية (None = ملف مؤقت)
+        
+    Returns:
+        List[CapturedQuery]
+    """
+    import app.models  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as workdir:
+        url = database_url or f"sqlite:///{os.path.join(workdir, 'plans.db')}"
+        engine = create_db_engine(url)
+        try:
+            Base.metadata.create_all(engine)
+            recorder = QueryRecorder(engine)
+            db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+            try:
+                exercise_services(db, recorder, workdir)
+            finally:
+                db.close()
+                recorder.close()
+
+            table_names = set(Base.metadata.tables)
+            return [explain(engine, q, table_names) for q in recorder.queries.values()]
+        finally:
+            engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN regression check")
+    parser.add_argument("--verbose", action="store_true", help="طباعة خطة كل استعلام")
+    args = parser.parse_args(argv)
+
+    queries = check_query_plans()
+    failures = [q for q in queries if q.full_scans]
+
+    for q in queries:
+        if not (args.verbose or q.full_scans):
+            continue
+        status = "FULL SCAN" if q.full_scans else "ok"
+        print(f"[{status}] {q.label}")
+        print("    " + " ".join(q.statement.split())[:300])
+        for detail in q.plan:
+            print(f"      {detail}")
+
+    print(f"{len(queries)} queries checked, {len(failures)} with full table scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,190 @@
 """Database session management and engine configuration"""
 
-from sqlalchemy import create_engine
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-# Create database engine
-# connect_args مهمة عشان SQLite يقبل تعدد الـ Threads
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}
+# الـ PRAGMAs المسموح بيها فى الـ profiles
+SQLITE_PRAGMAS = (
+    "auto_vacuum",
+    "journal_mode",
+    "synchronous",
+    "busy_timeout",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
 )
 
+# اسم الـ schema اللى قاعدة الأرشيف بتتعمل ATTACH بيه (app/db/archive.py)
+ARCHIVE_SCHEMA = "archive"
+
+
+def sqlite_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    إعدادات PRAGMA لـ profile معين
+    
+    Args:
+        name: اسم الـ profile (None = settings.SQLITE_PROFILE)
+        
+    Returns:
+        Dict: {pragma: value}
+        
+    Raises:
+        ValueError: لو الـ profile أو أحد الـ PRAGMAs غير معروف
+    """
+    name = name or settings.SQLITE_PROFILE
+    if name not in settings.SQLITE_PROFILES:
+        raise ValueError(
+            f"SQLite profile غير معروف: {name} "
+            f"(المتاح: {', '.join(settings.SQLITE_PROFILES)})"
+        )
+    pragmas = settings.SQLITE_PROFILES[name]
+    unknown = set(pragmas) - set(SQLITE_PRAGMAS)
+    if unknown:
+        raise ValueError(f"PRAGMA غير مدعوم: {', '.join(sorted(unknown))}")
+    return dict(pragmas)
+
+
+def apply_sqlite_profile(engine: Engine, profile: Optional[str] = None) -> None:
+    """
+    تطبيق PRAGMAs الـ profile على كل connection بيفتحها الـ engine
+    
+    Args:
+        engine: SQLite engine
+        profile: اسم الـ profile (None = settings.SQLITE_PROFILE)
+    """
+    pragmas = sqlite_profile(profile)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def archive_path(url: str) -> Optional[str]:
+    """
+    مسار ملف الأرشيف لقاعدة SQLite (construction_system.db → construction_system.archive.db)
+    
+    Returns:
+        Optional[str]: None لو القاعدة مش ملف SQLite
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    root, ext = os.path.splitext(parsed.database)
+    return f"{root}.archive{ext or '.db'}"
+
+
+def attach_archive(engine: Engine, path: str) -> None:
+    """
+    ATTACH لقاعدة الأرشيف (read-only) على كل connection بيطلعها الـ engine
+    
+    بيتعمل عند الـ checkout مش الـ connect، فالـ connections اللى اتفتحت
+    قبل أرشفة أول مشروع بتاخد الأرشيف أول ما الملف يتعمل.
+    
+    Args:
+        engine: SQLite engine
+        path: مسار ملف الأرشيف (ممكن يكون لسه مش موجود)
+    """
+    uri = Path(path).resolve().as_uri() + "?mode=ro"
+
+    @event.listens_for(engine, "checkout")
+    def _attach_archive(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info.get("archive_attached") or not os.path.exists(path):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (uri,))
+        finally:
+            cursor.close()
+        connection_record.info["archive_attached"] = True
+
+
+def create_db_engine(url: Optional[str] = None, profile: Optional[str] = None) -> Engine:
+    """
+    إنشاء engine بإعدادات التطبيق
+    
+    Args:
+        url: DATABASE_URL (None = settings.DATABASE_URL)
+        profile: SQLite profile (None = settings.SQLITE_PROFILE)
+        
+    Returns:
+        Engine
+    """
+    url = url or settings.DATABASE_URL
+    if url.startswith("sqlite"):
+        # connect_args مهمة عشان SQLite يقبل تعدد الـ Threads
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        apply_sqlite_profile(engine, profile)
+        archive = archive_path(url)
+        if archive:
+            attach_archive(engine, archive)
+        return engine
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        # connection اتقفلت من السيرفر (restart / idle timeout) بتتستبدل
+        pool_pre_ping=True,
+    )
+
+
+def create_writer_engine(url: Optional[str] = None, profile: Optional[str] = None) -> Engine:
+    """
+    engine الكاتب (WriteCoordinator) بـ transaction حقيقية حوالين الـ SAVEPOINTs
+
+    pysqlite مبيبعتش BEGIN، فأول SAVEPOINT بيبقى هو الـ transaction وال
+    RELEASE بتاعه بيعمل commit للـ unit لوحدها. هنا الـ driver بيتساب من غير
+    transactions خالص (isolation_level = None) والـ engine بيبعت BEGIN IMMEDIATE
+    بنفسه، فكل units الـ batch بتتعمل لها commit مرة واحدة (أو rollback مرة واحدة).
+    IMMEDIATE عشان الكاتب ياخد الـ write lock من الأول وميفشلش وهو بيحوّل
+    من قراءة لكتابة لو حد تانى كتب فى النص.
+
+    الأرشيف مش بيتعمله ATTACH هنا: الكتابة على مشروع مؤرشف بتترفض قبل
+    الكاتب، و BEGIN IMMEDIATE كان هياخد lock على ملف الأرشيف نفسه ويقفل
+    الأرشفة (اللى بتكتب فيه من unit كاتب).
+
+    Args:
+        url: DATABASE_URL (None = settings.DATABASE_URL)
+        profile: SQLite profile (None = settings.SQLITE_PROFILE)
+
+    Returns:
+        Engine: engine منفصل (pool خاص بيه) على SQLite، ونفس create_db_engine غير كده
+    """
+    url = url or settings.DATABASE_URL
+    if not url.startswith("sqlite"):
+        return create_db_engine(url, profile)
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    apply_sqlite_profile(engine, profile)
+
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+# Create database engine
+engine = create_db_engine()
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
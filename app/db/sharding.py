@@ -0,0 +1,756 @@
+"""
+Optional per-project SQLite sharding: catalog DB, session router and fan-out
+
+كل مشروع (أو مجموعة SHARD_GROUP_SIZE مشروع) ليه ملف SQLite خاص بيه
+تحت SHARD_DIR بنفس الـ schema، فاعتماد تقيل فى مشروع مبيقفلش الكتابة
+على باقى المشاريع (كل shard ليه WriteCoordinator خاص بيه). الـ catalog
+قاعدة صغيرة فيها قائمة المشاريع والـ shard بتاع كل مشروع، وبتوزع
+معرّفات المستخلصات عشان تفضل فريدة على كل الـ shards (الـ endpoints
+بتوصل للمستخلص بالـ id بس).
+
+Usage (نقل قاعدة موجودة لـ shards):
+    python -m app.db.sharding split
+    python -m app.db.sharding split --source sqlite:///construction_system.db
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base, CatalogBase
+from app.db import archive
+from app.db.session import SessionLocal, create_db_engine, create_writer_engine, engine
+from app.db.write_coordinator import (
+    GroupCommitSession,
+    WriteCoordinator,
+    coordinator_enabled,
+    write_coordinator,
+)
+from app.models import CatalogInvoice, CatalogProject, InvoiceLog
+
+# عدد الصفوف فى كل دفعة نسخ (split)
+_COPY_BATCH_SIZE = 5000
+
+# session.info: معرّفات المستخلصات اللى اتحجزت فى الـ catalog من الـ session دى
+_REGISTERED_INVOICES = "catalog_invoice_ids"
+
+
+class Shard:
+    """قاعدة shard واحدة: engine + session factories + كاتب خاص بيها"""
+
+    def __init__(self, key: str, url: str, profile: Optional[str], listeners: Dict[str, Callable]):
+        self.key = key
+        self.url = url
+        self.profile = profile
+        self.engine = create_db_engine(url, profile)
+        Base.metadata.create_all(self.engine)
+
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.writer_engine = create_writer_engine(url, profile)
+        writer_sessions = sessionmaker(
+            bind=self.writer_engine,
+            class_=GroupCommitSession,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        # المستخلصات الجديدة بتاخد id من الـ catalog قبل الـ INSERT، واللى
+        # الـ shard عمل لها rollback بتتشال من الـ catalog تانى
+        for factory in (self.session_factory, writer_sessions):
+            for name, fn in listeners.items():
+                event.listen(factory, name, fn)
+        self.writer = WriteCoordinator(
+            writer_sessions,
+            max_batch=settings.WRITE_BATCH_MAX_UNITS,
+            max_wait_ms=settings.WRITE_BATCH_WAIT_MS,
+            enabled=coordinator_enabled(url=url),
+        )
+
+        self.async_engine = None
+        self._async_session_factory = None
+        self._lock = threading.Lock()
+
+    @property
+    def async_session_factory(self):
+        """
+        async_sessionmaker للـ shard (بيتعمل أول مرة يتطلب)
+
+        الـ endpoints الـ async بتقرا وتعدل صفوف موجودة بس؛ إنشاء
+        المستخلصات بيعدى على الكاتب (session factory الـ sync).
+        """
+        if self._async_session_factory is None:
+            with self._lock:
+                if self._async_session_factory is None:
+                    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+                    from app.db.async_session import create_async_db_engine
+
+                    self.async_engine = create_async_db_engine(self.url, self.profile)
+                    self._async_session_factory = async_sessionmaker(
+                        self.async_engine,
+                        class_=AsyncSession,
+                        autoflush=False,
+                        expire_on_commit=False,
+                    )
+        return self._async_session_factory
+
+    def dispose(self) -> None:
+        """إيقاف الكاتب وقفل الـ connections"""
+        self.writer.stop()
+        self.writer_engine.dispose()
+        self.engine.dispose()
+        if self.async_engine is not None:
+            self.async_engine.sync_engine.dispose()
+
+
+class ShardRouter:
+    """
+    اختيار الـ shard من project_id (أو invoice_id عن طريق الـ catalog)
+
+    الـ shards بتتفتح lazily أول ما مشروع فيها يتطلب، والربط
+    مشروع → shard و مستخلص → مشروع متخزن فى الذاكرة لأنه مبيتغيرش.
+    """
+
+    def __init__(
+        self,
+        catalog_url: str,
+        shard_dir: str,
+        group_size: int = 1,
+        profile: Optional[str] = None,
+    ):
+        self.shard_dir = shard_dir
+        self.group_size = max(1, group_size)
+        self.profile = profile
+        self.catalog_engine = create_db_engine(catalog_url, profile)
+        CatalogBase.metadata.create_all(self.catalog_engine)
+        self._upgrade_catalog()
+        self.CatalogSession = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.catalog_engine
+        )
+        self._shards: Dict[str, Shard] = {}
+        self._project_shards: Dict[int, str] = {}
+        self._invoice_projects: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _upgrade_catalog(self) -> None:
+        """أعمدة اتضافت للـ catalog بعد إنشائه (create_all مبيعدلش جداول موجودة)"""
+        columns = {
+            column["name"] for column in inspect(self.catalog_engine).get_columns("catalog_projects")
+        }
+        if "archived" not in columns:
+            with self.catalog_engine.begin() as conn:
+                conn.exec_driver_sql(
+                    "ALTER TABLE catalog_projects ADD COLUMN archived BOOLEAN NOT NULL DEFAULT FALSE"
+                )
+
+    # ---------- shards ----------
+
+    def shard_key(self, project_id: int) -> str:
+        """اسم الـ shard لمشروع جديد (SHARD_GROUP_SIZE مشروع فى كل ملف)"""
+        return f"shard_{(project_id - 1) // self.group_size:04d}"
+
+    def shard_url(self, key: str) -> str:
+        return f"sqlite:///{os.path.join(self.shard_dir, key + '.db')}"
+
+    def shard(self, key: str) -> Shard:
+        """الـ shard بالاسم (بيتعمل لو مش موجود)"""
+        shard = self._shards.get(key)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.get(key)
+                if shard is None:
+                    os.makedirs(self.shard_dir, exist_ok=True)
+                    shard = Shard(key, self.shard_url(key), self.profile, {
+                        "before_flush": self._assign_invoice_ids,
+                        "after_transaction_end": self._drop_orphan_invoices,
+                    })
+                    self._shards[key] = shard
+        return shard
+
+    def open_shards(self) -> List[Shard]:
+        """الـ shards المفتوحة فى الـ process دى"""
+        with self._lock:
+            return list(self._shards.values())
+
+    def project_shard(self, project_id: int) -> Optional[Shard]:
+        """الـ shard بتاع مشروع (None لو المشروع مش فى الـ catalog)"""
+        key = self._project_shards.get(project_id)
+        if key is None:
+            with self.CatalogSession() as db:
+                key = db.scalar(
+                    select(CatalogProject.shard).where(CatalogProject.id == project_id)
+                )
+            if key is None:
+                return None
+            self._project_shards[project_id] = key
+        return self.shard(key)
+
+    def invoice_project(self, invoice_id: int) -> Optional[int]:
+        """المشروع بتاع مستخلص من الـ catalog (None لو مش موجود)"""
+        project_id = self._invoice_projects.get(invoice_id)
+        if project_id is None:
+            with self.CatalogSession() as db:
+                project_id = db.scalar(
+                    select(CatalogInvoice.project_id).where(CatalogInvoice.id == invoice_id)
+                )
+            if project_id is None:
+                return None
+            self._invoice_projects[invoice_id] = project_id
+        return project_id
+
+    def invoice_shard(self, invoice_id: int) -> Optional[Shard]:
+        """الـ shard بتاع مستخلص (None لو مش موجود)"""
+        project_id = self.invoice_project(invoice_id)
+        if project_id is None:
+            return None
+        return self.project_shard(project_id)
+
+    # ---------- catalog ----------
+
+    def register_project(
+        self,
+        name: str,
+        location: Optional[str] = None,
+        project_id: Optional[int] = None,
+    ) -> int:
+        """
+        تسجيل مشروع فى الـ catalog وتحديد الـ shard بتاعه
+
+        Args:
+            name: اسم المشروع
+            location: الموقع
+            project_id: id محدد (عند نقل قاعدة موجودة)، None = id جديد
+
+        Returns:
+            int: الـ id العالمى للمشروع
+        """
+        with self.CatalogSession() as db:
+            entry = CatalogProject(id=project_id, name=name, location=location, shard="")
+            db.add(entry)
+            db.flush()
+            entry.shard = self.shard_key(entry.id)
+            project_id, key = entry.id, entry.shard
+            db.commit()
+        self._project_shards[project_id] = key
+        return project_id
+
+    def unregister_project(self, project_id: int) -> None:
+        """
+        مسح مشروع من الـ catalog (تعويض لو إنشاؤه فى الـ shard فشل)
+
+        Args:
+            project_id: معرّف المشروع
+        """
+        with self.CatalogSession() as db:
+            db.query(CatalogProject).filter(CatalogProject.id == project_id).delete()
+            db.commit()
+        self._project_shards.pop(project_id, None)
+
+    def register_invoices(self, project_id: int, invoice_ids: Iterable[Optional[int]]) -> List[int]:
+        """
+        حجز معرّفات مستخلصات عالمية لمشروع
+
+        Args:
+            project_id: معرّف المشروع
+            invoice_ids: ids محددة (عند النقل) أو None لـ id جديد
+
+        Returns:
+            List[int]: المعرّفات بنفس الترتيب
+        """
+        with self.CatalogSession() as db:
+            entries = [CatalogInvoice(id=invoice_id, project_id=project_id) for invoice_id in invoice_ids]
+            db.add_all(entries)
+            db.flush()
+            ids = [entry.id for entry in entries]
+            db.commit()
+        for invoice_id in ids:
+            self._invoice_projects[invoice_id] = project_id
+        return ids
+
+    def unregister_invoices(self, invoice_ids: Iterable[int]) -> None:
+        """
+        مسح معرّفات مستخلصات من الـ catalog (اتحجزت والـ INSERT اتعمله rollback)
+
+        Args:
+            invoice_ids: المعرّفات
+        """
+        invoice_ids = list(invoice_ids)
+        with self.CatalogSession() as db:
+            db.query(CatalogInvoice).filter(CatalogInvoice.id.in_(invoice_ids)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        for invoice_id in invoice_ids:
+            self._invoice_projects.pop(invoice_id, None)
+
+    def set_archived(self, project_id: int, archived: bool) -> None:
+        """
+        تحديث علامة الأرشيف للمشروع فى الـ catalog (بعد الأرشفة فى الـ shard)
+
+        Args:
+            project_id: معرّف المشروع
+            archived: المشروع مؤرشف فى الـ shard ولا لأ
+        """
+        with self.CatalogSession() as db:
+            db.execute(
+                update(CatalogProject)
+                .where(CatalogProject.id == project_id)
+                .values(archived=archived)
+            )
+            db.commit()
+
+    def list_projects(self, archived: Optional[bool] = None) -> List[CatalogProject]:
+        """
+        المشاريع من الـ catalog (مرتبة بالـ id)
+
+        Args:
+            archived: True / False = المؤرشفة / الشغالة بس، None = الكل
+
+        Returns:
+            List[CatalogProject]
+        """
+        stmt = select(CatalogProject).order_by(CatalogProject.id)
+        if archived is not None:
+            stmt = stmt.where(CatalogProject.archived.is_(archived))
+        with self.CatalogSession() as db:
+            return list(db.scalars(stmt))
+
+    def shard_projects(self) -> Dict[str, List[int]]:
+        """المشاريع مجمعة حسب الـ shard"""
+        with self.CatalogSession() as db:
+            rows = db.execute(
+                select(CatalogProject.shard, CatalogProject.id).order_by(CatalogProject.id)
+            ).all()
+        groups: Dict[str, List[int]] = {}
+        for key, project_id in rows:
+            groups.setdefault(key, []).append(project_id)
+        return groups
+
+    def _assign_invoice_ids(self, session: Session, flush_context, instances) -> None:
+        """before_flush: أى InvoiceLog جديد من غير id بياخد id من الـ catalog"""
+        for obj in session.new:
+            if isinstance(obj, InvoiceLog) and obj.id is None:
+                obj.id = self.register_invoices(obj.project_id, [None])[0]
+                session.info.setdefault(_REGISTERED_INVOICES, set()).add(obj.id)
+
+    def _drop_orphan_invoices(self, session: Session, transaction) -> None:
+        """
+        after_transaction_end: المستخلصات اللى اتسجلت فى الـ catalog ومتكتبتش فى الـ shard
+
+        الـ catalog بيتعمله commit جوه before_flush، فلو الـ shard عمل rollback
+        (الـ transaction كلها، أو الـ SAVEPOINT بتاع unit فى الكاتب) المعرّف
+        بيفضل فى الـ catalog من غير مستخلص. بعد آخر transaction خارجية
+        المعرّفات اللى مش موجودة فى الـ shard بتتمسح.
+        """
+        if transaction.parent is not None or _REGISTERED_INVOICES not in session.info:
+            return
+        ids = session.info.pop(_REGISTERED_INVOICES)
+        with session.bind.connect() as conn:
+            stored = set(conn.scalars(select(InvoiceLog.id).where(InvoiceLog.id.in_(ids))))
+        if ids - stored:
+            self.unregister_invoices(ids - stored)
+
+    # ---------- fan-out ----------
+
+    def fan_out(
+        self,
+        fn: Callable[[Session, Optional[List[int]]], Any],
+        max_workers: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        تشغيل fn(db, project_ids) على كل shard بالتوازى
+
+        Args:
+            fn: دالة بتاخد Session الـ shard ومشاريعه
+            max_workers: عدد الـ threads (None = SHARD_FANOUT_WORKERS)
+
+        Returns:
+            List: نتيجة كل shard (بترتيب الـ shards)
+        """
+        groups = self.shard_projects()
+        if not groups:
+            return []
+
+        def _run(key: str, project_ids: List[int]) -> Any:
+            db = self.shard(key).session_factory()
+            try:
+                return fn(db, project_ids)
+            finally:
+                db.close()
+
+        workers = min(max_workers or settings.SHARD_FANOUT_WORKERS, len(groups))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-fanout") as pool:
+            futures = [pool.submit(_run, key, ids) for key, ids in groups.items()]
+            return [future.result() for future in futures]
+
+    # ---------- stats ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات الـ shards (للـ /health)"""
+        with self.CatalogSession() as db:
+            projects = db.scalar(select(func.count(CatalogProject.id)))
+        return {
+            "projects": projects,
+            "open_shards": len(self._shards),
+            "group_size": self.group_size,
+        }
+
+    def dispose(self) -> None:
+        """قفل كل الـ shards والـ catalog"""
+        with self._lock:
+            shards, self._shards = list(self._shards.values()), {}
+        for shard in shards:
+            shard.dispose()
+        self.catalog_engine.dispose()
+
+
+# Singleton instance (None = قاعدة واحدة زى الأول)
+shard_router: Optional[ShardRouter] = (
+    ShardRouter(
+        settings.CATALOG_DATABASE_URL,
+        settings.SHARD_DIR,
+        settings.SHARD_GROUP_SIZE,
+    )
+    if settings.SHARDING_ENABLED
+    else None
+)
+
+
+# ---------- routing helpers ----------
+#
+# كل helper بيرجع مصدر الـ Session للقاعدة الصح (الرئيسية أو الـ shard)،
+# ولو المشروع مؤرشف مصدر بيقرا من الأرشيف (app/db/archive.py).
+
+def _project_shard(project_id: int) -> Shard:
+    shard = shard_router.project_shard(project_id)
+    if shard is None:
+        raise ValueError(f"المشروع غير موجود (ID: {project_id})")
+    return shard
+
+
+def _invoice_shard(invoice_id: int) -> Shard:
+    shard = shard_router.invoice_shard(invoice_id)
+    if shard is None:
+        raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+    return shard
+
+
+def _project_target(project_id: int):
+    """(shard أو None, engine القاعدة الأساسية)"""
+    if shard_router is None:
+        return None, engine
+    shard = _project_shard(project_id)
+    return shard, shard.engine
+
+
+def _invoice_target(invoice_id: int):
+    """(shard أو None, engine القاعدة الأساسية)"""
+    if shard_router is None:
+        return None, engine
+    shard = _invoice_shard(invoice_id)
+    return shard, shard.engine
+
+
+def _async_session_local():
+    # import هنا عشان الأدوات الـ sync متحتاجش aiosqlite
+    from app.db.async_session import AsyncSessionLocal
+
+    return AsyncSessionLocal
+
+
+def project_session_factory(project_id: int) -> Callable[[], Session]:
+    """
+    مصدر الـ Session لمشروع
+
+    Raises:
+        ValueError: لو sharding شغال والمشروع مش فى الـ catalog
+    """
+    shard, target = _project_target(project_id)
+    factory = SessionLocal if shard is None else shard.session_factory
+    return archive.route_project(factory, target, project_id)
+
+
+def invoice_session_factory(invoice_id: int) -> Callable[[], Session]:
+    """
+    مصدر الـ Session لمستخلص
+
+    Raises:
+        ValueError: لو sharding شغال والمستخلص مش فى الـ catalog
+    """
+    shard, target = _invoice_target(invoice_id)
+    factory = SessionLocal if shard is None else shard.session_factory
+    return archive.route_invoice(factory, target, invoice_id)
+
+
+def async_project_session_factory(project_id: int):
+    """
+    مصدر الـ AsyncSession لمشروع
+
+    Raises:
+        ValueError: لو sharding شغال والمشروع مش فى الـ catalog
+    """
+    shard, target = _project_target(project_id)
+    factory = _async_session_local() if shard is None else shard.async_session_factory
+    return archive.route_project(factory, target, project_id)
+
+
+def async_invoice_session_factory(invoice_id: int):
+    """
+    مصدر الـ AsyncSession لمستخلص
+
+    Raises:
+        ValueError: لو sharding شغال والمستخلص مش فى الـ catalog
+    """
+    shard, target = _invoice_target(invoice_id)
+    factory = _async_session_local() if shard is None else shard.async_session_factory
+    return archive.route_invoice(factory, target, invoice_id)
+
+
+def ensure_project_writable(project_id: int) -> None:
+    """
+    Raises:
+        ValueError: لو المشروع مش موجود (sharding) أو مؤرشف
+    """
+    _shard, target = _project_target(project_id)
+    archive.ensure_writable(target, project_id)
+
+
+def project_writer(project_id: int) -> WriteCoordinator:
+    """
+    الكاتب المسئول عن مشروع
+
+    Raises:
+        ValueError: لو المشروع مش فى الـ catalog (sharding) أو مؤرشف
+    """
+    shard, target = _project_target(project_id)
+    archive.ensure_writable(target, project_id)
+    return write_coordinator if shard is None else shard.writer
+
+
+def invoice_writer(invoice_id: int) -> WriteCoordinator:
+    """
+    الكاتب المسئول عن مستخلص
+
+    Raises:
+        ValueError: لو المستخلص مش فى الـ catalog (sharding) أو مشروعه مؤرشف
+    """
+    shard, target = _invoice_target(invoice_id)
+    if archive.archived_projects(target):
+        project_id = archive.invoice_project_id(target, invoice_id)
+        if project_id is not None:
+            archive.ensure_writable(target, project_id)
+    return write_coordinator if shard is None else shard.writer
+
+
+def fan_out(fn: Callable[[Session, Optional[List[int]]], Any]) -> List[Any]:
+    """
+    تشغيل fn(db, project_ids) على كل القواعد
+
+    من غير sharding: نداء واحد على القاعدة الرئيسية بـ project_ids=None.
+    """
+    if shard_router is None:
+        db = SessionLocal()
+        try:
+            return [fn(db, None)]
+        finally:
+            db.close()
+    return shard_router.fan_out(fn)
+
+
+async def fan_out_writes(fn: Callable[[Session, Optional[List[int]]], Any]) -> List[Any]:
+    """
+    تشغيل fn(db, project_ids) على كل القواعد عن طريق كاتب كل قاعدة
+
+    زى fan_out بس للـ jobs اللى بتكتب: كل قاعدة بتاخد unit واحدة فى
+    الطابور بتاع الكاتب بتاعها، فمبتتسابقش مع الرفع والاعتماد.
+    """
+    if shard_router is None:
+        return [await write_coordinator.run_async(fn, None)]
+    groups = shard_router.shard_projects()
+    return await asyncio.gather(*(
+        shard_router.shard(key).writer.run_async(fn, project_ids)
+        for key, project_ids in groups.items()
+    ))
+
+
+# ---------- FastAPI dependencies ----------
+
+def _resolve(lookup: Callable[[int], Any], key: int):
+    """الـ factory أو 404"""
+    try:
+        return lookup(key)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def get_project_db(project_id: int):
+    """
+    Dependency: Session على قاعدة المشروع (project_id من الـ path)
+    """
+    db = _resolve(project_session_factory, project_id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_invoice_db(invoice_id: int):
+    """
+    Dependency: Session على قاعدة المستخلص (invoice_id من الـ path)
+    """
+    db = _resolve(invoice_session_factory, invoice_id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_project_db(project_id: int):
+    """
+    Dependency: AsyncSession على قاعدة المشروع
+    """
+    async with _resolve(async_project_session_factory, project_id)() as db:
+        yield db
+
+
+async def get_async_invoice_db(invoice_id: int):
+    """
+    Dependency: AsyncSession على قاعدة المستخلص
+    """
+    async with _resolve(async_invoice_session_factory, invoice_id)() as db:
+        yield db
+
+
+# ---------- split ----------
+
+def project_rows_filter(table, project_id: int):
+    """
+    شرط صفوف مشروع فى جدول (بالـ project_id أو عن طريق المستخلصات)
+    
+    Returns:
+        None لو الجدول مش مربوط بمشروع
+    """
+    if table.name == "projects":
+        return table.c.id == project_id
+    if "project_id" in table.c:
+        return table.c.project_id == project_id
+    if "invoice_id" in table.c:
+        invoices = Base.metadata.tables["invoices_log"]
+        return table.c.invoice_id.in_(
+            select(invoices.c.id).where(invoices.c.project_id == project_id)
+        )
+    return None
+
+
+def copy_project_rows(src, dst, project_id: int) -> int:
+    """
+    نسخ كل صفوف مشروع من connection لـ connection تانية بنفس الـ ids
+    
+    Args:
+        src: connection القاعدة الأصلية
+        dst: connection القاعدة الهدف (جوا transaction)
+        project_id: معرّف المشروع
+        
+    Returns:
+        int: عدد الصفوف المنسوخة
+    """
+    copied = 0
+    for table in Base.metadata.sorted_tables:
+        condition = project_rows_filter(table, project_id)
+        if condition is None:
+            continue
+        result = src.execute(
+            select(table).where(condition).execution_options(yield_per=_COPY_BATCH_SIZE)
+        )
+        for batch in result.mappings().partitions():
+            dst.execute(insert(table), [dict(row) for row in batch])
+            copied += len(batch)
+    return copied
+
+
+def split_database(
+    source_url: Optional[str] = None,
+    router: Optional[ShardRouter] = None,
+) -> Dict[str, int]:
+    """
+    نقل قاعدة واحدة لـ shards (مرة واحدة قبل تشغيل SHARDING_ENABLED)
+
+    الـ ids بتفضل زى ما هى (المشاريع والمستخلصات بتتسجل فى الـ catalog
+    بنفس معرّفاتها)، والقاعدة الأصلية مبتتعدلش.
+
+    Args:
+        source_url: القاعدة الأصلية (None = settings.DATABASE_URL)
+        router: الـ router (None = shard_router أو router جديد من settings)
+
+    Returns:
+        Dict: {projects, invoices, rows}
+
+    Raises:
+        ValueError: لو الـ catalog فيه مشاريع بالفعل
+    """
+    router = router or shard_router or ShardRouter(
+        settings.CATALOG_DATABASE_URL, settings.SHARD_DIR, settings.SHARD_GROUP_SIZE
+    )
+    with router.CatalogSession() as db:
+        if db.scalar(select(func.count(CatalogProject.id))):
+            raise ValueError("الـ catalog فيه مشاريع بالفعل؛ النقل بيتعمل مرة واحدة على catalog فاضى")
+
+    source = create_db_engine(source_url or settings.DATABASE_URL)
+    projects_table = Base.metadata.tables["projects"]
+    invoices_table = Base.metadata.tables["invoices_log"]
+    totals = {"projects": 0, "invoices": 0, "rows": 0}
+    try:
+        with source.connect() as src:
+            projects = src.execute(select(projects_table).order_by(projects_table.c.id)).mappings().all()
+            for project in projects:
+                project_id = router.register_project(
+                    project["name"], project["location"], project_id=project["id"]
+                )
+                invoice_ids = list(
+                    src.scalars(
+                        select(invoices_table.c.id).where(invoices_table.c.project_id == project_id)
+                    )
+                )
+                router.register_invoices(project_id, invoice_ids)
+
+                shard = router.shard(router.shard_key(project_id))
+                with shard.engine.begin() as dst:
+                    totals["rows"] += copy_project_rows(src, dst, project_id)
+
+                totals["projects"] += 1
+                totals["invoices"] += len(invoice_ids)
+    finally:
+        source.dispose()
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-project SQLite shards")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    split = subparsers.add_parser("split", help="نقل القاعدة الحالية لـ shards + catalog")
+    split.add_argument("--source", default=None, help="DATABASE_URL للقاعدة الأصلية")
+    args = parser.parse_args(argv)
+
+    if args.command == "split":
+        try:
+            totals = split_database(args.source)
+        except ValueError as e:
+            print(str(e))
+            return 1
+        print(
+            f"{totals['projects']} projects, {totals['invoices']} invoices, "
+            f"{totals['rows']} rows -> {settings.SHARD_DIR}/"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
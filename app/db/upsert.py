@@ -0,0 +1,67 @@
+"""Dialect-aware batched INSERT ... ON CONFLICT DO UPDATE"""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"Upsert غير مدعوم لقاعدة البيانات: {dialect}")
+    return insert
+
+
+def upsert_rows(
+    db: Session,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    index_elements: Iterable[str],
+    update_columns: Iterable[str] = (),
+    batch_size: int | None = None,
+    increment_columns: Iterable[str] = (),
+) -> int:
+    """
+    إدخال/تحديث مجموعة صفوف بجمل INSERT ... ON CONFLICT DO UPDATE مجمعة
+    
+    لا يعمل commit: الـ caller هو المسؤول عن الـ transaction.
+    
+    Args:
+        db: Database session
+        model: الـ ORM model
+        rows: الصفوف (dicts بأسماء الأعمدة)
+        index_elements: أعمدة الـ unique constraint
+        update_columns: الأعمدة اللى تتحدث عند التعارض (القيمة الجديدة)
+        batch_size: عدد الصفوف فى كل جملة
+        increment_columns: أعمدة بتتجمع عند التعارض (القديمة + الجديدة)
+        
+    Returns:
+        int: عدد الصفوف المرسلة
+    """
+    if not rows:
+        return 0
+
+    insert = _dialect_insert(db)
+    index_elements = list(index_elements)
+    update_columns = list(update_columns)
+    increment_columns = list(increment_columns)
+    table = model.__table__
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+
+    for start in range(0, len(rows), batch_size):
+        batch: List[Dict[str, Any]] = list(rows[start:start + batch_size])
+        stmt = insert(model).values(batch)
+        set_ = {col: stmt.excluded[col] for col in update_columns}
+        set_.update(
+            {col: table.c[col] + stmt.excluded[col] for col in increment_columns}
+        )
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        db.execute(stmt)
+
+    return len(rows)
@@ -0,0 +1,301 @@
+"""Single-writer queue with group commits for database write transactions"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import ResourceClosedError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.session import create_writer_engine, engine
+
+
+class GroupCommitSession(Session):
+    """
+    Session الكاتب: commit / rollback جوه الـ unit بيشتغلوا على الـ SAVEPOINT بتاعها
+    
+    الـ services بتعمل db.commit() فى آخرها؛ جوه الـ coordinator ده بيبقى
+    flush بس والـ commit الحقيقى بيحصل مرة واحدة للـ batch كلها.
+    db.rollback() بيلغى تعديلات الـ unit بس ويفتح savepoint جديد.
+    برة الـ coordinator (بدون unit) السلوك زى Session العادية.
+    """
+
+    _unit_savepoint = None
+
+    def commit(self) -> None:
+        if self._unit_savepoint is None:
+            return super().commit()
+        self.flush()
+
+    def rollback(self) -> None:
+        if self._unit_savepoint is None:
+            return super().rollback()
+        self._unit_savepoint.rollback()
+        self._unit_savepoint = self.begin_nested()
+
+
+def coordinator_enabled(mode: Optional[str] = None, url: Optional[str] = None) -> bool:
+    """
+    هل الكتابة بتعدى على الـ coordinator؟
+    
+    Args:
+        mode: auto / on / off (None = settings.WRITE_COORDINATOR)
+        url: DATABASE_URL (None = settings.DATABASE_URL)
+        
+    Returns:
+        bool: auto = SQLite بس (PostgreSQL عنده row locks ومش محتاج كاتب واحد)
+        
+    Raises:
+        ValueError: لو الـ mode غير معروف
+    """
+    mode = (mode or settings.WRITE_COORDINATOR).lower()
+    url = url or settings.DATABASE_URL
+    if mode == "auto":
+        return url.startswith("sqlite")
+    if mode in ("on", "off"):
+        return mode == "on"
+    raise ValueError(f"WRITE_COORDINATOR غير معروف: {mode} (auto / on / off)")
+
+
+class _WriteUnit:
+    """unit كتابة فى الطابور: fn(db, *args, **kwargs) + الـ future بتاعها"""
+
+    __slots__ = ("fn", "args", "kwargs", "future")
+
+    def __init__(self, fn: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any]):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+
+
+class WriteCoordinator:
+    """
+    كاتب واحد (thread) بياخد units الكتابة من طابور وينفذها بـ group commits
+    
+    كل unit دالة بتاخد Session كأول argument (نفس شكل دوال الـ services).
+    الكاتب بيسحب لحد max_batch unit (ومستنى max_wait_ms لو الطابور فضى)،
+    بينفذ كل unit جوه SAVEPOINT، وبيعمل commit واحد للـ batch. فشل unit
+    بيلغى الـ savepoint بتاعها بس؛ فشل الـ commit بيفشّل الـ batch كلها.
+    
+    على SQLite ده بيخلى فيه كاتب واحد بس طول الوقت (مفيش "database is
+    locked" بين الطلبات)، والقراءة بتكمل بالتوازى تحت WAL.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_batch: int,
+        max_wait_ms: int,
+        enabled: bool = True,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.enabled = enabled
+        self._queue: "queue.Queue[Optional[_WriteUnit]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.units = 0
+        self.failed_units = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    # ---------- submit ----------
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        إضافة unit كتابة للطابور
+        
+        Args:
+            fn: دالة بتاخد Session كأول argument
+            *args, **kwargs: باقى الـ arguments
+            
+        Returns:
+            Future: نتيجة fn بعد الـ commit (أو الـ exception)
+        """
+        unit = _WriteUnit(fn, args, kwargs)
+        if not self.enabled:
+            # بدون coordinator: الـ unit بتتنفذ فى نفس الـ thread بـ Session عادية
+            self._run_direct(unit)
+            return unit.future
+        self._ensure_started()
+        self._queue.put(unit)
+        return unit.future
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """تنفيذ unit والانتظار لحد الـ commit (للكود الـ sync)"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        تنفيذ unit من endpoint async من غير ما يحجز thread وهو مستنى
+        
+        لو الـ coordinator مقفول الـ unit بتتنفذ فى thread منفصل.
+        """
+        if not self.enabled:
+            return await asyncio.to_thread(self.run, fn, *args, **kwargs)
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    # ---------- writer thread ----------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name="db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """إيقاف الكاتب بعد تنفيذ الـ units اللى فى الطابور"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+    def _next_batch(self, first: _WriteUnit) -> Tuple[List[_WriteUnit], bool]:
+        """سحب units إضافية للـ batch؛ بيرجع (batch, stop requested)"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    unit = self._queue.get(timeout=remaining)
+                else:
+                    unit = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if unit is None:
+                return batch, True
+            batch.append(unit)
+        return batch, False
+
+    def _worker(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._next_batch(first)
+            try:
+                self._commit_batch(batch)
+            except Exception as exc:
+                # الكاتب لازم يفضل شغال؛ أى unit لسه مستنية بتاخد الـ exception
+                for unit in batch:
+                    if not unit.future.done():
+                        unit.future.set_exception(exc)
+            if stop:
+                return
+
+    def _commit_batch(self, batch: List[_WriteUnit]) -> None:
+        """تنفيذ الـ batch كـ transaction واحدة (SAVEPOINT لكل unit)"""
+        db = self.session_factory()
+        done: List[Tuple[Future, Any]] = []
+        failed = 0
+        try:
+            for unit in batch:
+                # الـ future ممكن يكون اتلغى (العميل قفل الاتصال)
+                if not unit.future.set_running_or_notify_cancel():
+                    continue
+                db._unit_savepoint = db.begin_nested()
+                try:
+                    result = unit.fn(db, *unit.args, **unit.kwargs)
+                    db._unit_savepoint.commit()
+                except Exception as exc:
+                    # بعد فشل flush الـ savepoint بيبقى inactive ولسه محتاج rollback
+                    try:
+                        db._unit_savepoint.rollback()
+                    except ResourceClosedError:
+                        pass
+                    unit.future.set_exception(exc)
+                    failed += 1
+                else:
+                    done.append((unit.future, result))
+                finally:
+                    db._unit_savepoint = None
+
+            try:
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                for future, _ in done:
+                    future.set_exception(exc)
+                failed += len(done)
+                done = []
+                commit_failed = True
+            else:
+                commit_failed = False
+        finally:
+            db.close()
+
+        for future, result in done:
+            future.set_result(result)
+
+        with self._stats_lock:
+            self.batches += 1
+            self.units += len(batch)
+            self.failed_units += failed
+            if commit_failed:
+                self.failed_batches += 1
+
+    def _run_direct(self, unit: _WriteUnit) -> None:
+        unit.future.set_running_or_notify_cancel()
+        db = self.session_factory()
+        try:
+            result = unit.fn(db, *unit.args, **unit.kwargs)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            unit.future.set_exception(exc)
+        else:
+            unit.future.set_result(result)
+        finally:
+            db.close()
+
+    # ---------- stats ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات الكاتب (للـ /health)"""
+        with self._stats_lock:
+            return {
+                "enabled": self.enabled,
+                "queued": self._queue.qsize(),
+                "units": self.units,
+                "failed_units": self.failed_units,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "avg_batch_size": round(self.units / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+# engine الكاتب على SQLite بـ BEGIN صريح (من غيره مفيش group commit؛ شوف
+# create_writer_engine)، وعلى PostgreSQL نفس الـ engine الأساسى
+writer_engine = create_writer_engine() if settings.DATABASE_URL.startswith("sqlite") else engine
+
+# Session الكاتب: expire_on_commit=False لأن النتايج بتتقرا بعد الـ commit
+# فى thread تانى (الـ endpoint)
+WriterSession = sessionmaker(
+    bind=writer_engine,
+    class_=GroupCommitSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Singleton instance
+write_coordinator = WriteCoordinator(
+    WriterSession,
+    max_batch=settings.WRITE_BATCH_MAX_UNITS,
+    max_wait_ms=settings.WRITE_BATCH_WAIT_MS,
+    enabled=coordinator_enabled(),
+)
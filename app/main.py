@@ -1,13 +1,34 @@
 """Main FastAPI application"""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api.v1.endpoints import projects, invoices, reports
+from app.db.instrumentation import query_instrumentation
+from app.db.maintenance import maintenance_enabled, maintenance_scheduler
+from app.db.sharding import shard_router
+from app.db.write_coordinator import write_coordinator
+from app.services.boq_cache import boq_cache
+from app.services.report_cache import report_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """تشغيل thread صيانة القاعدة وقياس الاستعلامات مع السيرفر"""
+    if settings.QUERY_INSTRUMENTATION:
+        query_instrumentation.install()
+    if maintenance_enabled():
+        maintenance_scheduler.start()
+    yield
+    maintenance_scheduler.stop()
+    query_instrumentation.remove()
+
 
 # Create FastAPI application
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -37,4 +58,12 @@ def health_check():
         "status": "healthy",
         "service": settings.PROJECT_NAME,
         "version": "2.0",
+        "caches": {
+            "boq": boq_cache.stats(),
+            "reports": report_cache.stats(),
+        },
+        "writes": write_coordinator.stats(),
+        "sharding": shard_router.stats() if shard_router is not None else None,
+        "maintenance": maintenance_scheduler.stats(),
+        "queries": query_instrumentation.stats(),
     }
@@ -6,9 +6,12 @@ from app.models.enums import InvoiceStatus, TradeType, RowType
 # Import models
 from app.models.project import Project
 from app.models.boq import BOQItem
-from app.models.invoice import InvoiceLog, InvoiceDetail
-from app.models.staging import StagingInvoiceDetail
+from app.models.invoice import InvoiceLog, InvoiceDetail, InvoiceSummary
+from app.models.staging import StagingInvoiceDetail, StagingSnapshot
 from app.models.ledger import DailyLedger
+from app.models.rollup import LedgerMonthlyRollup, LedgerPrefixSum
+from app.models.maintenance import MaintenanceLog
+from app.models.catalog import CatalogProject, CatalogInvoice
 
 __all__ = [
     # Enums
@@ -20,6 +23,14 @@ __all__ = [
     "BOQItem",
     "InvoiceLog",
     "InvoiceDetail",
+    "InvoiceSummary",
     "StagingInvoiceDetail",
+    "StagingSnapshot",
     "DailyLedger",
+    "LedgerMonthlyRollup",
+    "LedgerPrefixSum",
+    "MaintenanceLog",
+    # Catalog (sharding)
+    "CatalogProject",
+    "CatalogInvoice",
 ]
@@ -1,6 +1,15 @@
 """BOQ (Bill of Quantities) model"""
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    Boolean,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -19,7 +28,22 @@ class BOQItem(Base):
     unit_price = Column(Float, default=0.0)
     is_partial = Column(Boolean, default=False)
 
+    # شجرة البنود (materialized path): 9-2-1 -> "0009.0002.0001"
+    # collation "C" على PostgreSQL: subtree_range معتمد على ترتيب ASCII
+    # ("." قبل "/")، والـ locale collations بتتجاهل علامات الترقيم
+    path = Column(
+        String().with_variant(String(collation="C"), "postgresql"),
+        nullable=True,
+    )
+    parent_code = Column(String, nullable=True)
+    depth = Column(Integer, default=0)
+
     # Relationships
     project = relationship("Project", back_populates="boq_items")
     invoice_details = relationship("InvoiceDetail", back_populates="boq_item")
     ledger_entries = relationship("DailyLedger", back_populates="boq_item")
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "item_code", name="uix_project_item_code"),
+        Index("ix_boq_items_project_path", "project_id", "path"),
+    )
@@ -0,0 +1,33 @@
+"""Catalog models (sharding mode): project list and global invoice ids"""
+
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey
+
+from app.db.base import CatalogBase
+
+
+class CatalogProject(CatalogBase):
+    """
+    المشروع فى الـ catalog: الـ id العالمى واسم الـ shard بتاعه
+    
+    الـ shard بيتحدد مرة واحدة عند الإنشاء، فتغيير SHARD_GROUP_SIZE
+    بعد كده مبينقلش مشاريع موجودة.
+    """
+    
+    __tablename__ = "catalog_projects"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    location = Column(String, nullable=True)
+    shard = Column(String, nullable=False, index=True)
+
+    # نسخة من projects.archived فى الـ shard (قائمة المشاريع من غير فتح الـ shards)
+    archived = Column(Boolean, default=False, server_default="0", nullable=False)
+
+
+class CatalogInvoice(CatalogBase):
+    """معرّف مستخلص عالمى (فريد على كل الـ shards) والمشروع بتاعه"""
+    
+    __tablename__ = "catalog_invoices"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("catalog_projects.id"), nullable=False, index=True)
@@ -1,14 +1,17 @@
 """Invoice models (InvoiceLog and InvoiceDetail)"""
 
 from sqlalchemy import (
+    Boolean,
     Column,
     Integer,
     String,
     Float,
     Date,
+    DateTime,
     ForeignKey,
     Text,
     Enum,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
@@ -30,6 +33,14 @@ class InvoiceLog(Base):
     period_end = Column(Date)
     previous_invoice_id = Column(Integer, ForeignKey("invoices_log.id"), nullable=True)
 
+    # بيزيد مع كل كتابة على صفوف الـ staging (optimistic concurrency)
+    staging_version = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # وقت الاعتماد (UTC)؛ الـ retention بيضغط الـ staging بعد STAGING_RETENTION_DAYS
+    approved_at = Column(DateTime, nullable=True)
+    # صفوف الـ staging اتمسحت واتحفظت فى staging_snapshots
+    staging_compacted = Column(Boolean, default=False, server_default="0", nullable=False)
+
     # Relationships
     project = relationship("Project", back_populates="invoices")
     details = relationship("InvoiceDetail", back_populates="invoice")
@@ -43,6 +54,8 @@ class InvoiceLog(Base):
             "invoice_number",
             name="uix_project_invoice_number",
         ),
+        # المستخلصات المعتمدة اللى لسه الـ staging بتاعها متضغطش
+        Index("ix_invoices_log_retention", "staging_compacted", "approved_at"),
     )
 
 
@@ -72,3 +85,31 @@ class InvoiceDetail(Base):
     # Relationships
     invoice = relationship("InvoiceLog", back_populates="details")
     boq_item = relationship("BOQItem", back_populates="invoice_details")
+
+    __table_args__ = (
+        # آخر تراكمى للبند عند الاعتماد + بنود مستخلص بالتخصص
+        Index("ix_invoice_details_item_invoice", "boq_item_id", "invoice_id"),
+        Index("ix_invoice_details_invoice_trade", "invoice_id", "trade"),
+    )
+
+
+class InvoiceSummary(Base):
+    """Per-trade totals of an approved invoice (written at approval)"""
+
+    __tablename__ = "invoice_summary"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices_log.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    trade = Column(Enum(TradeType), default=TradeType.GENERAL, nullable=False)
+
+    total_value = Column(Float, default=0.0)
+    line_count = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    # إجمالى قيمة التخصص فى كل المستخلصات المعتمدة لحد المستخلص ده
+    cumulative_value = Column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("invoice_id", "trade", name="uix_invoice_summary_trade"),
+        Index("ix_invoice_summary_project_invoice", "project_id", "invoice_id"),
+    )
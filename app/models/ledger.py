@@ -1,6 +1,6 @@
 """Daily ledger model for quantity distribution"""
 
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -22,3 +22,9 @@ class DailyLedger(Base):
     project = relationship("Project", back_populates="ledger_entries")
     invoice = relationship("InvoiceLog", back_populates="ledger_entries")
     boq_item = relationship("BOQItem", back_populates="ledger_entries")
+
+    __table_args__ = (
+        # تقارير المشروع بالتاريخ + مسح/قراءة صفوف مستخلص
+        Index("ix_daily_ledger_project_date", "project_id", "entry_date"),
+        Index("ix_daily_ledger_invoice", "invoice_id"),
+    )
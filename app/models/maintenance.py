@@ -0,0 +1,19 @@
+"""Maintenance log model (app/db/maintenance.py)"""
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+
+from app.db.base import Base
+
+
+class MaintenanceLog(Base):
+    """تشغيل مهمة صيانة واحدة (ANALYZE / optimize / incremental vacuum / quick_check)"""
+    
+    __tablename__ = "maintenance_log"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task = Column(String, nullable=False)
+    trigger = Column(String, nullable=False)  # schedule / deletes / manual
+    status = Column(String, nullable=False)  # ok / skipped / error
+    started_at = Column(DateTime, nullable=False, index=True)
+    duration_ms = Column(Float, nullable=False)
+    detail = Column(Text, nullable=True)
@@ -1,6 +1,6 @@
 """Project model"""
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Boolean, Column, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -15,6 +15,15 @@ class Project(Base):
     name = Column(String, nullable=False, index=True)
     location = Column(String, nullable=True)
 
+    # بيزيد مع كل كتابة على بنود الـ BOQ (invalidation للـ cache)
+    boq_version = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # بيزيد مع كل اعتماد (الـ ledger والتقارير اتغيرت)
+    data_version = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # المشروع اتنقل لقاعدة الأرشيف (قراءة بس؛ app/db/archive.py)
+    archived = Column(Boolean, default=False, server_default="0", nullable=False)
+
     # Relationships
     boq_items = relationship("BOQItem", back_populates="project")
     invoices = relationship("InvoiceLog", back_populates="project")
@@ -0,0 +1,74 @@
+"""Pre-aggregated ledger tables maintained at approval time"""
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    Float,
+    Date,
+    ForeignKey,
+    Enum,
+    UniqueConstraint,
+)
+
+from app.db.base import Base
+from app.models.enums import TradeType
+
+
+class LedgerMonthlyRollup(Base):
+    """Monthly totals of DailyLedger per (project, boq_item, trade)"""
+
+    __tablename__ = "ledger_monthly_rollup"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    boq_item_id = Column(Integer, ForeignKey("boq_items.id"), nullable=False)
+    trade = Column(Enum(TradeType), default=TradeType.GENERAL, nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+
+    total_qty = Column(Float, default=0.0)
+    total_value = Column(Float, default=0.0)
+
+    __table_args__ = (
+        # project/year/month أولاً عشان نفس الـ index يخدم تقرير الشهر والـ upsert
+        UniqueConstraint(
+            "project_id",
+            "year",
+            "month",
+            "boq_item_id",
+            "trade",
+            name="uix_ledger_monthly_rollup_key",
+        ),
+    )
+
+
+class LedgerPrefixSum(Base):
+    """
+    Cumulative DailyLedger quantity per (project, boq_item) at breakpoints
+
+    Each invoice spreads its quantity evenly over its period, so the
+    running total is piecewise linear: from boundary_date until the next
+    breakpoint it grows by daily_qty per day.
+    """
+
+    __tablename__ = "ledger_prefix_sums"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    boq_item_id = Column(Integer, ForeignKey("boq_items.id"), nullable=False)
+    boundary_date = Column(Date, nullable=False)
+
+    # الإجمالى قبل boundary_date، والمعدل اليومى من boundary_date
+    cum_qty = Column(Float, default=0.0)
+    daily_qty = Column(Float, default=0.0)
+    cum_value = Column(Float, default=0.0)
+    daily_value = Column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "project_id",
+            "boq_item_id",
+            "boundary_date",
+            name="uix_ledger_prefix_sums_key",
+        ),
+    )
@@ -1,6 +1,18 @@
 """Staging area model for invoice import"""
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Enum
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    ForeignKey,
+    Text,
+    Enum,
+    Index,
+    LargeBinary,
+    DateTime,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -36,3 +48,33 @@ class StagingInvoiceDetail(Base):
 
     # Relationships
     invoice = relationship("InvoiceLog", back_populates="staging_data")
+
+    __table_args__ = (
+        # استبدال staging تخصص عند الرفع + صفحات المراجعة بترتيب الصفوف
+        Index("ix_staging_invoice_trade", "invoice_id", "trade"),
+        Index("ix_staging_invoice_row", "invoice_id", "row_index"),
+    )
+
+
+class StagingSnapshot(Base):
+    """
+    نسخة مضغوطة (JSON + zlib) من صفوف staging مستخلص معتمد لتخصص واحد
+
+    بتتعمل لما الـ retention بيمسح صفوف الـ staging، وبتتفك تانى عند
+    الاسترجاع (staging_retention_service).
+    """
+    
+    __tablename__ = "staging_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices_log.id"), nullable=False)
+    trade = Column(Enum(TradeType), nullable=False)
+
+    row_count = Column(Integer, default=0, nullable=False)
+    raw_bytes = Column(Integer, default=0, nullable=False)  # حجم الـ JSON قبل الضغط
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("invoice_id", "trade", name="uix_staging_snapshot_trade"),
+    )
@@ -2,15 +2,17 @@
 
 from app.schemas.common import Message, InvoiceStatusEnum
 from app.schemas.project import ProjectCreate, ProjectRead
-from app.schemas.boq import BOQItemBase, BOQItemCreate, BOQItemRead
+from app.schemas.boq import BOQItemBase, BOQItemCreate, BOQItemRead, BOQRollupRead
 from app.schemas.invoice import (
     InvoiceLogBase,
     InvoiceLogCreate,
     InvoiceLogRead,
     InvoiceDetailBase,
     InvoiceDetailRead,
+    InvoiceTradeSummaryRead,
+    InvoiceSummaryRead,
 )
-from app.schemas.staging import StagingRowRead, StagingRowUpdate
+from app.schemas.staging import StagingRowRead, StagingRowUpdate, StagingPatch
 
 __all__ = [
     "Message",
@@ -20,11 +22,15 @@ __all__ = [
     "BOQItemBase",
     "BOQItemCreate",
     "BOQItemRead",
+    "BOQRollupRead",
     "InvoiceLogBase",
     "InvoiceLogCreate",
     "InvoiceLogRead",
     "InvoiceDetailBase",
     "InvoiceDetailRead",
+    "InvoiceTradeSummaryRead",
+    "InvoiceSummaryRead",
     "StagingRowRead",
     "StagingRowUpdate",
+    "StagingPatch",
 ]
@@ -1,6 +1,7 @@
 """BOQ schemas"""
 
 from pydantic import BaseModel
+from typing import Optional
 
 
 class BOQItemBase(BaseModel):
@@ -20,6 +21,17 @@ class BOQItemCreate(BOQItemBase):
 class BOQItemRead(BOQItemBase):
     """Schema for reading a BOQ item"""
     id: int
+    parent_code: Optional[str] = None
+    depth: int = 0
     
     class Config:
         from_attributes = True
+
+
+class BOQRollupRead(BaseModel):
+    """Schema for chapter / sub-chapter roll-up totals"""
+    code: str
+    parent_code: Optional[str] = None
+    depth: int
+    item_count: int
+    total_value: float
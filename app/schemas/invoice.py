@@ -50,3 +50,26 @@ class InvoiceLogRead(InvoiceLogBase):
     
     class Config:
         from_attributes = True
+
+
+class InvoiceTradeSummaryRead(BaseModel):
+    """Per-trade totals of an invoice"""
+    trade: str
+    total_value: float = 0.0
+    line_count: int = 0
+    error_count: int = 0
+    cumulative_value: float = 0.0
+
+
+class InvoiceSummaryRead(BaseModel):
+    """Invoice list entry with its totals"""
+    id: int
+    invoice_number: int
+    status: InvoiceStatusEnum
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    staging_compacted: bool = False
+    total_value: float = 0.0
+    line_count: int = 0
+    error_count: int = 0
+    trades: List[InvoiceTradeSummaryRead] = []
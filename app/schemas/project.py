@@ -13,6 +13,7 @@ class ProjectCreate(BaseModel):
 class ProjectRead(ProjectCreate):
     """Schema for reading a project"""
     id: int
+    archived: bool = False
     
     class Config:
         from_attributes = True
@@ -1,7 +1,7 @@
 """Staging schemas"""
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class StagingRowRead(BaseModel):
@@ -30,3 +30,9 @@ class StagingRowUpdate(BaseModel):
     raw_description: Optional[str] = None
     raw_qty: Optional[str] = None
     raw_percentage: Optional[str] = None
+
+
+class StagingPatch(BaseModel):
+    """Schema for delta-only staging save (changed cells only)"""
+    base_version: int
+    changes: List[StagingRowUpdate]
@@ -0,0 +1,98 @@
+"""Async projects service - نفس projects_service على AsyncSession"""
+
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Project
+from app.schemas.project import ProjectCreate
+from app.services import invoice_summary_service
+from app.services.projects_service import data_version_query, format_data_version
+
+
+async def create_project(
+    db: AsyncSession,
+    project: ProjectCreate,
+    project_id: Optional[int] = None,
+) -> Project:
+    """
+    إنشاء مشروع جديد
+    
+    Args:
+        db: Async database session
+        project: بيانات المشروع الجديد
+        project_id: id محدد (الـ id العالمى من الـ catalog فى وضع sharding)
+        
+    Returns:
+        Project: المشروع المُنشأ
+    """
+    new_project = Project(
+        id=project_id,
+        name=project.name,
+        location=project.location
+    )
+    db.add(new_project)
+    await db.commit()
+    await db.refresh(new_project)
+    return new_project
+
+
+async def get_projects(db: AsyncSession, archived: Optional[bool] = None) -> List[Project]:
+    """
+    الحصول على قائمة كل المشاريع
+    
+    Args:
+        db: Async database session
+        archived: True / False = المؤرشفة / الشغالة بس، None = الكل
+        
+    Returns:
+        List[Project]: قائمة المشاريع
+    """
+    stmt = select(Project)
+    if archived is not None:
+        stmt = stmt.where(Project.archived.is_(archived))
+    result = await db.execute(stmt)
+    return list(result.scalars())
+
+
+async def get_project_by_id(db: AsyncSession, project_id: int) -> Project | None:
+    """
+    الحصول على مشروع بالـ ID
+    
+    Args:
+        db: Async database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        Project | None: المشروع أو None إذا لم يتم العثور عليه
+    """
+    return await db.get(Project, project_id)
+
+
+async def get_data_version(db: AsyncSession, project_id: int) -> str | None:
+    """
+    الـ version الحالى لبيانات المشروع (data_version.boq_version)
+    
+    Args:
+        db: Async database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        str | None: الـ version أو None إذا لم يتم العثور على المشروع
+    """
+    result = await db.execute(data_version_query(project_id))
+    return format_data_version(result.first())
+
+
+async def list_project_invoices(db: AsyncSession, project_id: int) -> List[Dict[str, Any]]:
+    """
+    مستخلصات المشروع مع إجمالياتها (invoice_summary_service عبر run_sync)
+    
+    Args:
+        db: Async database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        List[Dict]: مستخلص لكل عنصر مع trades و الإجماليات
+    """
+    return await db.run_sync(invoice_summary_service.list_project_invoices, project_id)
@@ -0,0 +1,94 @@
+"""Async reports service - تشغيل تقارير reports_service على AsyncSession"""
+
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import reports_service
+from app.utils.streaming import plain_row
+
+
+async def run_report(db: AsyncSession, report: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    تشغيل دالة تقرير sync من reports_service على الـ AsyncSession
+    
+    run_sync بيدى الدالة Session عادية فوق نفس الـ connection، وكل
+    استعلام جواها بيتنفذ بالـ driver الـ async من غير ما يحجز thread.
+    
+    Args:
+        db: Async database session
+        report: دالة التقرير (أول argument هو الـ Session)
+        
+    Returns:
+        نتيجة التقرير
+    """
+    return await db.run_sync(report, *args, **kwargs)
+
+
+async def query_rows(db: AsyncSession, stmt) -> List[Dict[str, Any]]:
+    """
+    تنفيذ استعلام وإرجاع كل الصفوف كـ dicts (للـ JSON العادى)
+    """
+    result = await db.execute(stmt)
+    return [plain_row(row) for row in result.mappings()]
+
+
+async def schedule_report(
+    db: AsyncSession,
+    project_id: int,
+    year: int,
+    month: int,
+    trade: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """تقرير الشهر (reports_service.schedule_report)"""
+    return await run_report(
+        db, reports_service.schedule_report, project_id, year=year, month=month, trade=trade
+    )
+
+
+async def schedule_matrix(
+    db: AsyncSession,
+    project_id: int,
+    year: int,
+    trade: Optional[str] = None,
+    cumulative: bool = False,
+) -> Dict[str, Any]:
+    """مصفوفة بند × شهر (reports_service.schedule_matrix)"""
+    return await run_report(
+        db, reports_service.schedule_matrix, project_id,
+        year=year, trade=trade, cumulative=cumulative,
+    )
+
+
+async def range_report(
+    db: AsyncSession,
+    project_id: int,
+    date_from: date,
+    date_to: date,
+) -> List[Dict[str, Any]]:
+    """إجمالى كل بند فى مدة (reports_service.range_report)"""
+    return await run_report(db, reports_service.range_report, project_id, date_from, date_to)
+
+
+async def weekly_report(
+    db: AsyncSession,
+    project_id: int,
+    date_from: date,
+    date_to: date,
+) -> Dict[str, Any]:
+    """تقرير أسبوع بأسبوع (reports_service.weekly_report)"""
+    return await run_report(db, reports_service.weekly_report, project_id, date_from, date_to)
+
+
+async def s_curve(
+    db: AsyncSession,
+    project_id: int,
+    trade: Optional[str] = None,
+    by_trade: bool = False,
+    points: Optional[int] = None,
+) -> Dict[str, Any]:
+    """منحنى القيمة التراكمية (reports_service.s_curve)"""
+    return await run_report(
+        db, reports_service.s_curve, project_id,
+        trade=trade, by_trade=by_trade, points=points,
+    )
@@ -0,0 +1,178 @@
+"""Async staging service - قراءة وتعديل صفوف staging على AsyncSession"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.staging import StagingRowUpdate, StagingPatch
+from app.services.staging_service import (
+    StagingVersionConflict,
+    build_staging_query,
+    invoice_row_ids_query,
+    row_update_batches,
+    staging_page,
+    staging_version_query,
+    staging_version_update,
+)
+
+
+async def get_staging_version(db: AsyncSession, invoice_id: int) -> Optional[int]:
+    """
+    الـ version الحالى لصفوف staging لمستخلص
+    
+    Args:
+        db: Async database session
+        invoice_id: معرّف المستخلص
+        
+    Returns:
+        int | None: الـ version أو None إذا لم يتم العثور على المستخلص
+    """
+    result = await db.execute(staging_version_query(invoice_id))
+    return result.scalar()
+
+
+async def bump_staging_version(
+    db: AsyncSession,
+    invoice_id: int,
+    expected_version: Optional[int] = None,
+) -> bool:
+    """
+    زيادة staging_version للمستخلص (بدون commit، compare-and-set اختيارى)
+    
+    Args:
+        db: Async database session
+        invoice_id: معرّف المستخلص
+        expected_version: الـ version المتوقع (اختيارى)
+        
+    Returns:
+        bool: هل تمت الزيادة
+    """
+    result = await db.execute(staging_version_update(invoice_id, expected_version))
+    return result.rowcount > 0
+
+
+async def get_staging_page(
+    db: AsyncSession,
+    invoice_id: int,
+    fields: Optional[Sequence[str]] = None,
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    **filters: Any,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    قراءة صفحة من صفوف staging
+    
+    Args:
+        db: Async database session
+        invoice_id: معرّف المستخلص
+        fields: الأعمدة المطلوبة (None = كل الأعمدة)
+        after: (row_index, id) لآخر صف فى الصفحة السابقة
+        limit: عدد الصفوف فى الصفحة (None = الكل)
+        **filters: فلاتر build_staging_query
+        
+    Returns:
+        Tuple[List[Dict], str | None]: (الصفوف, cursor الصفحة التالية)
+        
+    Raises:
+        ValueError: إذا كان اسم عمود أو قيمة فلتر غير صالحة
+    """
+    stmt = build_staging_query(
+        invoice_id,
+        fields=fields,
+        after=after,
+        limit=limit + 1 if limit is not None else None,
+        **filters,
+    )
+    result = await db.execute(stmt)
+    return staging_page(result.mappings(), fields, limit)
+
+
+async def _apply_row_updates(
+    db: AsyncSession,
+    invoice_id: int,
+    updates: List[StagingRowUpdate],
+) -> List[int]:
+    """تنفيذ التعديلات كـ executemany مجمعة حسب الأعمدة (بدون commit)"""
+    result = await db.execute(invoice_row_ids_query(invoice_id))
+    batches, changed_ids = row_update_batches(invoice_id, set(result.scalars()), updates)
+    for stmt, params in batches:
+        await db.execute(stmt, params)
+    return changed_ids
+
+
+async def update_staging_rows_bulk(
+    db: AsyncSession,
+    invoice_id: int,
+    updates: List[StagingRowUpdate]
+) -> List[int]:
+    """
+    تعديل عدة صفوف staging دفعة واحدة (transaction واحدة)
+    
+    Args:
+        db: Async database session
+        invoice_id: معرّف المستخلص (أى صف من مستخلص تانى بيتجاهل)
+        updates: قائمة التحديثات
+        
+    Returns:
+        List[int]: معرّفات الصفوف المُعدّلة
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المستخلص
+    """
+    if not updates:
+        return []
+
+    try:
+        changed_ids = await _apply_row_updates(db, invoice_id, updates)
+        if changed_ids:
+            await bump_staging_version(db, invoice_id)
+        elif await get_staging_version(db, invoice_id) is None:
+            raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return changed_ids
+
+
+async def apply_staging_patch(
+    db: AsyncSession,
+    invoice_id: int,
+    patch: StagingPatch,
+) -> Dict[str, Any]:
+    """
+    حفظ الخلايا المعدّلة فقط مع optimistic concurrency على staging_version
+    
+    Args:
+        db: Async database session
+        invoice_id: معرّف المستخلص
+        patch: {base_version, changes}
+        
+    Returns:
+        Dict: {updated_ids, version}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المستخلص
+        StagingVersionConflict: إذا كان base_version قديم
+    """
+    if not await bump_staging_version(db, invoice_id, patch.base_version):
+        current = await get_staging_version(db, invoice_id)
+        await db.rollback()
+        if current is None:
+            raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+        raise StagingVersionConflict(
+            f"تم تعديل البيانات من مستخدم آخر (version الحالى {current}، "
+            f"version التعديل {patch.base_version}). أعد جلب البيانات."
+        )
+
+    try:
+        changed_ids = await _apply_row_updates(db, invoice_id, patch.changes)
+        if not changed_ids:
+            await db.rollback()
+            return {"updated_ids": [], "version": patch.base_version}
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return {"updated_ids": changed_ids, "version": patch.base_version + 1}
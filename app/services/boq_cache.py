@@ -0,0 +1,160 @@
+"""Process-local BOQ cache keyed by project, invalidated by Project.boq_version"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import BOQItem, Project
+
+
+@dataclass(frozen=True)
+class CachedBOQItem:
+    """نسخة read-only من بند BOQ (مش مربوطة بـ Session)"""
+    id: int
+    project_id: int
+    item_code: str
+    description: Optional[str]
+    unit: Optional[str]
+    unit_price: float
+    is_partial: bool
+    path: Optional[str]
+    parent_code: Optional[str]
+    depth: int
+
+
+@dataclass
+class BOQSnapshot:
+    """كل بنود مشروع عند version معين"""
+    project_id: int
+    version: int
+    items: Tuple[CachedBOQItem, ...] = ()
+    by_code: Dict[str, CachedBOQItem] = field(default_factory=dict)
+
+
+class BOQCache:
+    """
+    LRU cache لبنود المقايسة لكل مشروع
+    
+    كل قراءة بتجيب Project.boq_version (استعلام بالـ primary key) وتقارنه
+    بالـ version المخزن؛ أى كتابة على الـ BOQ بتزود الـ version فالـ entry
+    القديم بيتجاهل تلقائياً حتى لو الكتابة حصلت من process تانى.
+    """
+
+    def __init__(self, max_projects: int):
+        self.max_projects = max_projects
+        self._entries: "OrderedDict[int, BOQSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, db: Session, project_id: int) -> BOQSnapshot:
+        """
+        الحصول على بنود المشروع من الـ cache أو من قاعدة البيانات
+        
+        Args:
+            db: Database session
+            project_id: معرّف المشروع
+            
+        Returns:
+            BOQSnapshot: بنود المشروع (فاضية لو المشروع غير موجود)
+        """
+        version = (
+            db.query(Project.boq_version).filter(Project.id == project_id).scalar()
+        )
+        if version is None:
+            return BOQSnapshot(project_id=project_id, version=-1)
+
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(project_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        snapshot = self._load(db, project_id, version)
+
+        with self._lock:
+            current = self._entries.get(project_id)
+            if current is None or current.version <= snapshot.version:
+                self._entries[project_id] = snapshot
+                self._entries.move_to_end(project_id)
+            while len(self._entries) > self.max_projects:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return snapshot
+
+    def invalidate(self, project_id: int) -> None:
+        """حذف entry المشروع من الـ cache"""
+        with self._lock:
+            self._entries.pop(project_id, None)
+
+    def clear(self) -> None:
+        """تفريغ الـ cache بالكامل"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """إحصائيات الـ cache (hits / misses / hit_rate)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "projects": len(self._entries),
+                "max_projects": self.max_projects,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    @staticmethod
+    def _load(db: Session, project_id: int, version: int) -> BOQSnapshot:
+        rows = (
+            db.query(
+                BOQItem.id,
+                BOQItem.project_id,
+                BOQItem.item_code,
+                BOQItem.description,
+                BOQItem.unit,
+                BOQItem.unit_price,
+                BOQItem.is_partial,
+                BOQItem.path,
+                BOQItem.parent_code,
+                BOQItem.depth,
+            )
+            .filter(BOQItem.project_id == project_id)
+            .order_by(BOQItem.id)
+            .all()
+        )
+        items = tuple(
+            CachedBOQItem(
+                id=r.id,
+                project_id=r.project_id,
+                item_code=r.item_code,
+                description=r.description,
+                unit=r.unit,
+                unit_price=r.unit_price or 0.0,
+                is_partial=bool(r.is_partial),
+                path=r.path,
+                parent_code=r.parent_code,
+                depth=r.depth or 0,
+            )
+            for r in rows
+        )
+        # أول بند بالكود هو المعتمد (نفس سلوك .first())
+        by_code: Dict[str, CachedBOQItem] = {}
+        for item in items:
+            by_code.setdefault(item.item_code, item)
+        return BOQSnapshot(
+            project_id=project_id, version=version, items=items, by_code=by_code
+        )
+
+
+# Singleton instance
+boq_cache = BOQCache(settings.BOQ_CACHE_MAX_PROJECTS)
@@ -1,10 +1,29 @@
 """BOQ service - Business logic for BOQ management"""
 
-from typing import List, Optional
+import pandas as pd
+from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, and_
 
-from app.models import BOQItem, Project
+from app.db.upsert import upsert_rows
+from app.models import BOQItem, Project, InvoiceDetail
 from app.schemas.boq import BOQItemCreate
+from app.services.boq_cache import boq_cache, CachedBOQItem
+from app.utils.excel_reader import detect_boq_columns, read_excel_to_dataframe
+from app.utils.boq_codes import (
+    build_boq_path,
+    split_boq_code,
+    subtree_range,
+    PATH_SEPARATOR,
+)
+
+
+def _bump_boq_version(db: Session, project_id: int) -> None:
+    """زيادة boq_version للمشروع (فى نفس الـ transaction بتاعة الكتابة)"""
+    db.query(Project).filter(Project.id == project_id).update(
+        {Project.boq_version: Project.boq_version + 1},
+        synchronize_session=False,
+    )
 
 
 def add_boq_item(
@@ -31,6 +50,8 @@ def add_boq_item(
     if not project:
         raise ValueError(f"المشروع غير موجود (ID: {project_id})")
     
+    path, parent_code, depth = build_boq_path(item.item_code)
+
     new_item = BOQItem(
         project_id=project_id,
         item_code=item.item_code,
@@ -38,34 +59,39 @@ def add_boq_item(
         unit=item.unit,
         unit_price=item.unit_price,
         is_partial=item.is_partial,
+        path=path,
+        parent_code=parent_code,
+        depth=depth,
     )
     db.add(new_item)
+    _bump_boq_version(db, project_id)
     db.commit()
+    boq_cache.invalidate(project_id)
     db.refresh(new_item)
     return new_item
 
 
-def get_boq_items(db: Session, project_id: int) -> List[BOQItem]:
+def get_boq_items(db: Session, project_id: int) -> List[CachedBOQItem]:
     """
-    الحصول على بنود BOQ لمشروع
+    الحصول على بنود BOQ لمشروع (من الـ cache)
     
     Args:
         db: Database session
         project_id: معرّف المشروع
         
     Returns:
-        List[BOQItem]: قائمة البنود
+        List[CachedBOQItem]: قائمة البنود
     """
-    return db.query(BOQItem).filter(BOQItem.project_id == project_id).all()
+    return list(boq_cache.get(db, project_id).items)
 
 
 def match_boq_item(
     db: Session,
     project_id: int,
     item_code: str
-) -> Optional[BOQItem]:
+) -> Optional[CachedBOQItem]:
     """
-    البحث عن بند BOQ بالكود
+    البحث عن بند BOQ بالكود (من الـ cache)
     
     Args:
         db: Database session
@@ -73,13 +99,241 @@ def match_boq_item(
         item_code: كود البند
         
     Returns:
-        BOQItem | None: البند أو None إذا لم يتم العثور عليه
+        CachedBOQItem | None: البند أو None إذا لم يتم العثور عليه
+    """
+    return boq_cache.get(db, project_id).by_code.get(item_code)
+
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "x", "نعم", "مجزأ"}
+
+
+def _text_column(df: pd.DataFrame, column: Optional[str]) -> pd.Series:
+    if column is None:
+        return pd.Series("", index=df.index, dtype="object")
+    values = df[column]
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+
+def read_boq_file(file_path: str, sheet_name: str | int = 0) -> Dict[str, Any]:
+    """
+    قراءة مقايسة من Excel/CSV وتجهيز صفوفها للـ upsert (من غير قاعدة البيانات)
+    
+    التحقق بيتم على الأعمدة كلها مرة واحدة (vectorized)، فالقراءة ممكن
+    تتعمل برة الكاتب وبعدين upsert_boq_items تكتب الصفوف.
+    
+    Args:
+        file_path: مسار الملف
+        sheet_name: اسم أو رقم الورقة فى Excel
+        
+    Returns:
+        Dict: {rows, rows_read, duplicates, skipped, errors}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على الأعمدة
     """
-    return (
-        db.query(BOQItem)
-        .filter(
-            BOQItem.project_id == project_id,
-            BOQItem.item_code == item_code,
+    df = read_excel_to_dataframe(file_path, sheet_name)
+    col_map = detect_boq_columns(df)
+
+    codes = _text_column(df, col_map["item_code"])
+    descriptions = _text_column(df, col_map["description"])
+    units = _text_column(df, col_map["unit"])
+    raw_prices = _text_column(df, col_map["unit_price"])
+    prices = pd.to_numeric(
+        raw_prices.str.replace(",", "", regex=False), errors="coerce"
+    )
+    is_partial = _text_column(df, col_map["is_partial"]).str.lower().isin(_TRUE_VALUES)
+
+    # الصفوف الفاضية (بدون كود) بتتجاهل
+    has_code = (codes != "") & (codes.str.lower() != "nan")
+    # سعر مكتوب بس مش رقم = خطأ، سعر فاضى = صفر (عناوين الفصول)
+    bad_price = has_code & prices.isna() & (raw_prices != "") & (raw_prices.str.lower() != "nan")
+
+    errors = [
+        {"row": int(idx), "item_code": codes[idx], "error": f"فئة غير صالحة: '{raw_prices[idx]}'"}
+        for idx in df.index[bad_price]
+    ]
+
+    valid = has_code & ~bad_price
+    frame = pd.DataFrame(
+        {
+            "item_code": codes[valid],
+            "description": descriptions[valid],
+            "unit": units[valid],
+            "unit_price": prices[valid].fillna(0.0).astype(float),
+            "is_partial": is_partial[valid],
+        }
+    )
+    # لو الكود متكرر فى الملف: آخر ظهور هو المعتمد
+    duplicates = int(frame.duplicated("item_code", keep="last").sum())
+    frame = frame.drop_duplicates("item_code", keep="last")
+
+    hierarchy = frame["item_code"].map(build_boq_path)
+    frame["path"] = hierarchy.str[0]
+    frame["parent_code"] = hierarchy.str[1]
+    frame["depth"] = hierarchy.str[2].astype(int)
+
+    return {
+        "rows": frame.astype(object).where(frame.notna(), None).to_dict(orient="records"),
+        "rows_read": int(len(df)),
+        "duplicates": duplicates,
+        "skipped": int((~has_code).sum()),
+        "errors": errors,
+    }
+
+
+def upsert_boq_items(db: Session, project_id: int, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    كتابة صفوف مقايسة (من read_boq_file) مع upsert على (project_id, item_code)
+    
+    الكتابة فى transaction واحدة بجمل INSERT ... ON CONFLICT DO UPDATE مجمعة.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        parsed: نتيجة read_boq_file
+        
+    Returns:
+        Dict: نتيجة العملية {status, rows_read, upserted, skipped, errors, message}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المشروع
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise ValueError(f"المشروع غير موجود (ID: {project_id})")
+
+    rows = [{**row, "project_id": project_id} for row in parsed["rows"]]
+
+    try:
+        upserted = upsert_rows(
+            db,
+            BOQItem,
+            rows,
+            index_elements=["project_id", "item_code"],
+            update_columns=[
+                "description",
+                "unit",
+                "unit_price",
+                "is_partial",
+                "path",
+                "parent_code",
+                "depth",
+            ],
+        )
+        _bump_boq_version(db, project_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    boq_cache.invalidate(project_id)
+
+    errors = parsed["errors"]
+    return {
+        "status": "imported",
+        "project_id": project_id,
+        "rows_read": parsed["rows_read"],
+        "upserted": upserted,
+        "duplicates": parsed["duplicates"],
+        "skipped": parsed["skipped"],
+        "errors": errors,
+        "message": f"تم استيراد {upserted} بند، أخطاء: {len(errors)}",
+    }
+
+
+def import_boq_file(
+    db: Session,
+    project_id: int,
+    file_path: str,
+    sheet_name: str | int = 0,
+) -> Dict[str, Any]:
+    """
+    استيراد مقايسة كاملة من Excel/CSV (read_boq_file + upsert_boq_items)
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        file_path: مسار الملف
+        sheet_name: اسم أو رقم الورقة فى Excel
+        
+    Returns:
+        Dict: نتيجة العملية {status, rows_read, upserted, skipped, errors, message}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المشروع أو الأعمدة
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise ValueError(f"المشروع غير موجود (ID: {project_id})")
+    return upsert_boq_items(db, project_id, read_boq_file(file_path, sheet_name))
+
+
+def get_boq_rollup(
+    db: Session,
+    project_id: int,
+    prefix: Optional[str] = None,
+    levels: int = 2,
+) -> List[Dict[str, Any]]:
+    """
+    إجماليات الفصول والفصول الفرعية من المستخلصات المعتمدة
+    
+    استعلام واحد على range متصل من الـ index (project_id, path)،
+    وبعدها كل بند بيضيف قيمته لكل الفصول اللى فوقه.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        prefix: كود الفصل (مثال: 9 أو 9-2)، None = كل المشروع
+        levels: عدد المستويات المطلوبة تحت الفصل
+        
+    Returns:
+        List[Dict]: {code, parent_code, depth, item_count, total_value}
+    """
+    q = (
+        db.query(
+            BOQItem.item_code,
+            BOQItem.path,
+            func.coalesce(func.sum(InvoiceDetail.total_value), 0.0).label("total_value"),
         )
-        .first()
+        .outerjoin(InvoiceDetail, InvoiceDetail.boq_item_id == BOQItem.id)
+        .filter(BOQItem.project_id == project_id)
     )
+
+    base_depth = 0
+    if prefix:
+        prefix_path, _, base_depth = build_boq_path(prefix)
+        low, high = subtree_range(prefix_path)
+        q = q.filter(
+            or_(
+                BOQItem.path == prefix_path,
+                and_(BOQItem.path >= low, BOQItem.path < high),
+            )
+        )
+
+    rows = q.group_by(BOQItem.id).all()
+
+    min_depth = max(base_depth, 1)
+    max_depth = base_depth + levels
+    nodes: Dict[str, Dict[str, Any]] = {}
+
+    for row in rows:
+        segments = split_boq_code(row.item_code)
+        path_segments = (row.path or "").split(PATH_SEPARATOR)
+        if len(path_segments) != len(segments):
+            # path قديم أو فاضى: نعيد بناءه من الكود
+            path_segments = build_boq_path(row.item_code)[0].split(PATH_SEPARATOR)
+
+        for depth in range(min_depth, min(len(segments), max_depth) + 1):
+            key = PATH_SEPARATOR.join(path_segments[:depth])
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = {
+                    "code": "-".join(segments[:depth]),
+                    "parent_code": "-".join(segments[: depth - 1]) or None,
+                    "depth": depth,
+                    "item_count": 0,
+                    "total_value": 0.0,
+                }
+            node["item_count"] += 1
+            node["total_value"] += float(row.total_value or 0.0)
+
+    return [nodes[key] for key in sorted(nodes)]
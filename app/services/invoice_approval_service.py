@@ -3,17 +3,28 @@
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from app.models import (
     InvoiceLog,
     InvoiceDetail,
     DailyLedger,
-    StagingInvoiceDetail,
-    BOQItem,
     InvoiceStatus,
 )
+from app.db.bulk import bulk_insert
+from app.services.boq_cache import boq_cache
+from app.services.invoice_summary_service import refresh_invoice_summary
+from app.services.projects_service import bump_data_version
+from app.services.report_cache import report_cache
+from app.services.rollup_service import (
+    LedgerContribution,
+    apply_to_monthly_rollup,
+    invoice_contributions,
+    refresh_prefix_sums,
+)
+from app.services.staging_service import bump_staging_version
 from app.utils.parsing import parse_float, extract_phase_from_text, normalize_trade
+from app.utils.timestamps import utcnow
 
 
 def build_invoice_details_from_staging(
@@ -50,12 +61,22 @@ def build_invoice_details_from_staging(
     if total_days <= 0:
         total_days = 1
 
+    # طرح مساهمة التفاصيل القديمة من الـ rollup قبل مسحها
+    old_contributions = invoice_contributions(db, invoice)
+    apply_to_monthly_rollup(db, invoice.project_id, old_contributions, sign=-1)
+
     # مسح تفاصيل المستخلص القديم بالكامل (قبل إعادة البناء)
     db.query(DailyLedger).filter(DailyLedger.invoice_id == invoice.id).delete()
     db.query(InvoiceDetail).filter(InvoiceDetail.invoice_id == invoice.id).delete()
 
+    # بنود المقايسة من الـ cache بدل استعلام لكل سطر
+    boq_items = boq_cache.get(db, invoice.project_id).by_code
+
     processed_count = 0
     errors_found = 0
+    contributions = []
+    # صفوف الـ ledger لكل البنود بتتدخل مرة واحدة بعد اللوب
+    ledger_batch = []
 
     for s in staging_rows:
         s.is_valid = False
@@ -67,14 +88,7 @@ def build_invoice_details_from_staging(
             errors_found += 1
             continue
 
-        boq_item = (
-            db.query(BOQItem)
-            .filter(
-                BOQItem.project_id == invoice.project_id,
-                BOQItem.item_code == raw_item_code,
-            )
-            .first()
-        )
+        boq_item = boq_items.get(raw_item_code)
 
         if not boq_item:
             s.error_message = f"كود البند '{raw_item_code}' غير موجود بالمقايسة"
@@ -133,22 +147,51 @@ def build_invoice_details_from_staging(
 
         # توزيع على DailyLedger
         if equivalent_qty != 0:
-            distribute_to_ledger(
-                db=db,
-                project_id=invoice.project_id,
-                invoice_id=invoice.id,
-                boq_item_id=boq_item.id,
-                equivalent_qty=equivalent_qty,
-                start_date=start_date,
-                total_days=total_days,
+            ledger_batch.extend(
+                ledger_rows(
+                    project_id=invoice.project_id,
+                    invoice_id=invoice.id,
+                    boq_item_id=boq_item.id,
+                    equivalent_qty=equivalent_qty,
+                    start_date=start_date,
+                    total_days=total_days,
+                )
+            )
+            contributions.append(
+                LedgerContribution(
+                    boq_item_id=boq_item.id,
+                    trade=normalized_trade,
+                    start_date=start_date,
+                    total_days=total_days,
+                    qty=equivalent_qty,
+                    unit_price=unit_price,
+                )
             )
 
         s.is_valid = True
         s.error_message = "Success"
         processed_count += 1
 
+    bulk_insert(db, DailyLedger, ledger_batch)
+    apply_to_monthly_rollup(db, invoice.project_id, contributions)
+
     invoice.status = InvoiceStatus.APPROVED
+    invoice.approved_at = utcnow()
+    db.flush()
+    # الـ prefix sums للبنود اللى اتغيرت بس (بعد ما المستخلص بقى معتمد)
+    refresh_prefix_sums(
+        db,
+        invoice.project_id,
+        {c.boq_item_id for c in old_contributions}
+        | {c.boq_item_id for c in contributions},
+    )
+    refresh_invoice_summary(db, invoice)
+    # الاعتماد بيعدّل is_valid/error_message فى الـ staging وبيكتب فى الـ ledger
+    bump_staging_version(db, invoice.id)
+    bump_data_version(db, invoice.project_id)
     db.commit()
+    # النتائج القديمة مفتاحها الـ version القديم؛ المسح بيفضى مكانها بدرى
+    report_cache.invalidate_project(invoice.project_id)
 
     return {
         "status": "approved",
@@ -159,6 +202,41 @@ def build_invoice_details_from_staging(
     }
 
 
+def ledger_rows(
+    project_id: int,
+    invoice_id: int,
+    boq_item_id: int,
+    equivalent_qty: float,
+    start_date: date,
+    total_days: int,
+) -> List[Dict[str, Any]]:
+    """
+    صفوف DailyLedger لبند واحد (الكمية موزعة بالتساوى على الأيام)
+    
+    Args:
+        project_id: معرّف المشروع
+        invoice_id: معرّف المستخلص
+        boq_item_id: معرّف بند BOQ
+        equivalent_qty: الكمية الفعلية
+        start_date: تاريخ البداية
+        total_days: عدد الأيام
+        
+    Returns:
+        List[Dict]: صف لكل يوم (جاهزة لـ bulk_insert)
+    """
+    daily_rate = equivalent_qty / total_days
+    return [
+        {
+            "project_id": project_id,
+            "invoice_id": invoice_id,
+            "boq_item_id": boq_item_id,
+            "entry_date": start_date + timedelta(days=i),
+            "distributed_qty": daily_rate,
+        }
+        for i in range(total_days)
+    ]
+
+
 def distribute_to_ledger(
     db: Session,
     project_id: int,
@@ -180,17 +258,8 @@ def distribute_to_ledger(
         start_date: تاريخ البداية
         total_days: عدد الأيام
     """
-    daily_rate = equivalent_qty / total_days
-    
-    ledger_entries = [
-        DailyLedger(
-            project_id=project_id,
-            invoice_id=invoice_id,
-            boq_item_id=boq_item_id,
-            entry_date=start_date + timedelta(days=i),
-            distributed_qty=daily_rate,
-        )
-        for i in range(total_days)
-    ]
-    
-    db.add_all(ledger_entries)
+    bulk_insert(
+        db,
+        DailyLedger,
+        ledger_rows(project_id, invoice_id, boq_item_id, equivalent_qty, start_date, total_days),
+    )
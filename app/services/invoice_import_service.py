@@ -3,11 +3,13 @@
 import pandas as pd
 from datetime import date
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Any, Dict, List
 
+from app.db.bulk import bulk_insert
 from app.models import InvoiceLog, StagingInvoiceDetail, Project, InvoiceStatus
 from app.utils.parsing import normalize_trade
 from app.utils.excel_reader import detect_columns, read_excel_to_dataframe
+from app.services.staging_service import bump_staging_version
 
 
 def get_or_create_invoice(
@@ -68,54 +70,30 @@ def get_or_create_invoice(
     return new_invoice
 
 
-def import_invoice_excel(
-    db: Session,
-    invoice_id: int,
+def parse_invoice_excel(
     file_path: str,
-    trade_type: str = "GENERAL",
     sheet_name: str | int = 0,
-) -> Dict[str, Any]:
+) -> List[Dict[str, Any]]:
     """
-    قراءة ملف Excel ورفع البيانات إلى Staging
+    قراءة ملف المستخلص لصفوف staging (بدون قاعدة البيانات)
     
     Args:
-        db: Database session
-        invoice_id: معرّف المستخلص
         file_path: مسار ملف Excel
-        trade_type: نوع التخصص (CIVIL/ELEC/MECH/GENERAL)
         sheet_name: اسم أو رقم الورقة في Excel
         
     Returns:
-        Dict: نتيجة العملية {status, rows_staged, trade, message}
+        List[Dict]: صف لكل بند (row_index + القيم الخام)
         
     Raises:
-        ValueError: في حالة حدوث أخطاء
+        ValueError: في حالة حدوث أخطاء فى الملف
     """
-    # التحقق من وجود المستخلص
-    invoice = db.query(InvoiceLog).filter(InvoiceLog.id == invoice_id).first()
-    if not invoice:
-        raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
-    
-    # طباعة التخصص
-    normalized_trade = normalize_trade(trade_type)
-    
-    # حذف بيانات Staging القديمة لنفس التخصص
-    db.query(StagingInvoiceDetail).filter(
-        StagingInvoiceDetail.invoice_id == invoice_id,
-        StagingInvoiceDetail.trade == normalized_trade,
-    ).delete()
-    db.commit()
-    
     # قراءة Excel
     df = read_excel_to_dataframe(file_path, sheet_name)
     
     # تحديد الأعمدة
     col_map = detect_columns(df)
     
-    # إدخال البيانات إلى Staging
-    staging_objects = []
-    rows_staged = 0
-    
+    rows = []
     for idx, row in df.iterrows():
         raw_item_code = row.get(col_map["item_code"])
         
@@ -127,23 +105,69 @@ def import_invoice_excel(
         raw_qty = row.get(col_map["qty"])
         raw_pct = row.get(col_map["percentage"])
         
-        staging_row = StagingInvoiceDetail(
-            invoice_id=invoice_id,
-            row_index=int(idx),
-            raw_item_code=str(raw_item_code).strip(),
-            raw_description=str(raw_desc).strip() if pd.notna(raw_desc) else "",
-            raw_qty=str(raw_qty).strip() if pd.notna(raw_qty) else "",
-            raw_percentage=str(raw_pct).strip() if pd.notna(raw_pct) else "",
-            trade=normalized_trade,
-            is_valid=False,
-            error_message=None,
-        )
-        staging_objects.append(staging_row)
-        rows_staged += 1
+        rows.append({
+            "row_index": int(idx),
+            "raw_item_code": str(raw_item_code).strip(),
+            "raw_description": str(raw_desc).strip() if pd.notna(raw_desc) else "",
+            "raw_qty": str(raw_qty).strip() if pd.notna(raw_qty) else "",
+            "raw_percentage": str(raw_pct).strip() if pd.notna(raw_pct) else "",
+        })
+    return rows
+
+
+def stage_invoice_rows(
+    db: Session,
+    invoice_id: int,
+    rows: List[Dict[str, Any]],
+    trade_type: str = "GENERAL",
+) -> Dict[str, Any]:
+    """
+    استبدال صفوف staging لتخصص فى مستخلص بالصفوف المقروءة
     
-    if staging_objects:
-        db.add_all(staging_objects)
-        db.commit()
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+        rows: نتيجة parse_invoice_excel
+        trade_type: نوع التخصص (CIVIL/ELEC/MECH/GENERAL)
+        
+    Returns:
+        Dict: نتيجة العملية {status, rows_staged, trade, message}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المستخلص أو التخصص غير صالح
+            أو الـ staging مضغوط
+    """
+    # التحقق من وجود المستخلص
+    invoice = db.query(InvoiceLog).filter(InvoiceLog.id == invoice_id).first()
+    if not invoice:
+        raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+    if invoice.staging_compacted:
+        raise ValueError("بيانات الـ staging مضغوطة؛ استرجعها الأول قبل الرفع")
+    
+    # طباعة التخصص
+    normalized_trade = normalize_trade(trade_type)
+    
+    # حذف بيانات Staging القديمة لنفس التخصص (نفس الـ transaction بتاعة الإدخال)
+    db.query(StagingInvoiceDetail).filter(
+        StagingInvoiceDetail.invoice_id == invoice_id,
+        StagingInvoiceDetail.trade == normalized_trade,
+    ).delete()
+    
+    # إدخال البيانات إلى Staging (صفوف dict مش ORM objects → COPY / executemany)
+    staging_rows = [
+        {
+            **row,
+            "invoice_id": invoice_id,
+            "trade": normalized_trade,
+            "is_valid": False,
+            "error_message": None,
+        }
+        for row in rows
+    ]
+    
+    rows_staged = bulk_insert(db, StagingInvoiceDetail, staging_rows)
+    bump_staging_version(db, invoice_id)
+    db.commit()
     
     return {
         "status": "staged",
@@ -152,3 +176,30 @@ def import_invoice_excel(
         "trade": normalized_trade,
         "message": f"تم رفع {rows_staged} بند ({normalized_trade}) بنجاح للمسودة.",
     }
+
+
+def import_invoice_excel(
+    db: Session,
+    invoice_id: int,
+    file_path: str,
+    trade_type: str = "GENERAL",
+    sheet_name: str | int = 0,
+) -> Dict[str, Any]:
+    """
+    قراءة ملف Excel ورفع البيانات إلى Staging
+    
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+        file_path: مسار ملف Excel
+        trade_type: نوع التخصص (CIVIL/ELEC/MECH/GENERAL)
+        sheet_name: اسم أو رقم الورقة في Excel
+        
+    Returns:
+        Dict: نتيجة العملية {status, rows_staged, trade, message}
+        
+    Raises:
+        ValueError: في حالة حدوث أخطاء
+    """
+    rows = parse_invoice_excel(file_path, sheet_name)
+    return stage_invoice_rows(db, invoice_id, rows, trade_type)
@@ -0,0 +1,225 @@
+"""Invoice summary service - Per-trade invoice totals maintained at approval"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import update, bindparam, func, select
+from sqlalchemy.orm import Session
+
+from app.models import (
+    InvoiceDetail,
+    InvoiceLog,
+    InvoiceStatus,
+    InvoiceSummary,
+    StagingInvoiceDetail,
+)
+
+
+def refresh_invoice_summary(db: Session, invoice: InvoiceLog) -> int:
+    """
+    إعادة كتابة صفوف invoice_summary لمستخلص (بدون commit)
+    
+    لازم يتنادى بعد flush للـ InvoiceDetail وتحديث الـ staging، لأن
+    الإجماليات بتتحسب باستعلامين مجمعين بالتخصص.
+    
+    Args:
+        db: Database session
+        invoice: المستخلص (معتمد)
+        
+    Returns:
+        int: عدد صفوف الملخص (تخصص لكل صف)
+    """
+    stats: Dict[Any, Dict[str, Any]] = defaultdict(
+        lambda: {"total_value": 0.0, "line_count": 0, "error_count": 0}
+    )
+
+    details = (
+        db.query(
+            InvoiceDetail.trade,
+            func.count(InvoiceDetail.id).label("line_count"),
+            func.sum(InvoiceDetail.total_value).label("total_value"),
+        )
+        .filter(InvoiceDetail.invoice_id == invoice.id)
+        .group_by(InvoiceDetail.trade)
+        .all()
+    )
+    for row in details:
+        stats[row.trade]["line_count"] = row.line_count
+        stats[row.trade]["total_value"] = float(row.total_value or 0.0)
+
+    errors = (
+        db.query(
+            StagingInvoiceDetail.trade,
+            func.count(StagingInvoiceDetail.id).label("error_count"),
+        )
+        .filter(
+            StagingInvoiceDetail.invoice_id == invoice.id,
+            StagingInvoiceDetail.is_valid.is_(False),
+        )
+        .group_by(StagingInvoiceDetail.trade)
+        .all()
+    )
+    for row in errors:
+        stats[row.trade]["error_count"] = row.error_count
+
+    db.query(InvoiceSummary).filter(
+        InvoiceSummary.invoice_id == invoice.id
+    ).delete(synchronize_session=False)
+    db.add_all(
+        InvoiceSummary(
+            invoice_id=invoice.id,
+            project_id=invoice.project_id,
+            trade=trade,
+            **values,
+        )
+        for trade, values in stats.items()
+        if trade is not None
+    )
+    db.flush()
+
+    refresh_cumulative_values(db, invoice.project_id, stats.keys())
+    return len(stats)
+
+
+def refresh_cumulative_values(
+    db: Session,
+    project_id: int,
+    trades: Optional[Iterable[Any]] = None,
+) -> int:
+    """
+    إعادة حساب cumulative_value بترتيب المستخلصات (بدون commit)
+    
+    اعتماد مستخلص قديم بعد مستخلصات أحدث بيغيّر تراكمى كل اللى بعده،
+    فالحساب بيتعمل للتخصص كله مش للمستخلص الحالى بس.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        trades: التخصصات المتأثرة (None = الكل)
+        
+    Returns:
+        int: عدد الصفوف اللى اتغيرت
+    """
+    q = (
+        db.query(
+            InvoiceSummary.id,
+            InvoiceSummary.trade,
+            InvoiceSummary.total_value,
+            InvoiceSummary.cumulative_value,
+        )
+        .join(InvoiceLog, InvoiceLog.id == InvoiceSummary.invoice_id)
+        .filter(
+            InvoiceSummary.project_id == project_id,
+            InvoiceLog.status == InvoiceStatus.APPROVED,
+        )
+        .order_by(InvoiceSummary.trade, InvoiceLog.invoice_number, InvoiceLog.id)
+    )
+    if trades is not None:
+        trades = [t for t in trades if t is not None]
+        if not trades:
+            return 0
+        q = q.filter(InvoiceSummary.trade.in_(trades))
+
+    running: Dict[Any, float] = defaultdict(float)
+    changes = []
+    for row in q.all():
+        running[row.trade] += row.total_value or 0.0
+        if row.cumulative_value != running[row.trade]:
+            changes.append({"b_id": row.id, "b_cumulative_value": running[row.trade]})
+
+    if changes:
+        table = InvoiceSummary.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(cumulative_value=bindparam("b_cumulative_value"))
+        )
+        db.execute(stmt, changes)
+    return len(changes)
+
+
+def rebuild_invoice_summaries(db: Session, project_id: int) -> int:
+    """
+    إعادة بناء invoice_summary لكل المستخلصات المعتمدة فى مشروع
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        int: عدد صفوف الملخص
+    """
+    invoices = (
+        db.query(InvoiceLog)
+        .filter(
+            InvoiceLog.project_id == project_id,
+            InvoiceLog.status == InvoiceStatus.APPROVED,
+        )
+        .all()
+    )
+    count = 0
+    for invoice in invoices:
+        count += refresh_invoice_summary(db, invoice)
+    db.commit()
+    return count
+
+
+def list_project_invoices(db: Session, project_id: int) -> List[Dict[str, Any]]:
+    """
+    كل مستخلصات المشروع مع إجمالياتها لكل تخصص (استعلام واحد)
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        List[Dict]: مستخلص لكل عنصر مع trades و الإجماليات
+    """
+    stmt = (
+        select(
+            InvoiceLog.id,
+            InvoiceLog.invoice_number,
+            InvoiceLog.status,
+            InvoiceLog.period_start,
+            InvoiceLog.period_end,
+            InvoiceLog.staging_compacted,
+            InvoiceSummary.trade,
+            InvoiceSummary.total_value,
+            InvoiceSummary.line_count,
+            InvoiceSummary.error_count,
+            InvoiceSummary.cumulative_value,
+        )
+        .outerjoin(InvoiceSummary, InvoiceSummary.invoice_id == InvoiceLog.id)
+        .where(InvoiceLog.project_id == project_id)
+        .order_by(InvoiceLog.invoice_number, InvoiceLog.id, InvoiceSummary.trade)
+    )
+
+    invoices: Dict[int, Dict[str, Any]] = {}
+    for row in db.execute(stmt):
+        invoice = invoices.get(row.id)
+        if invoice is None:
+            invoice = invoices[row.id] = {
+                "id": row.id,
+                "invoice_number": row.invoice_number,
+                "status": row.status.value if row.status else None,
+                "period_start": row.period_start,
+                "period_end": row.period_end,
+                "staging_compacted": row.staging_compacted,
+                "total_value": 0.0,
+                "line_count": 0,
+                "error_count": 0,
+                "trades": [],
+            }
+        if row.trade is None:
+            continue
+        invoice["total_value"] += row.total_value or 0.0
+        invoice["line_count"] += row.line_count or 0
+        invoice["error_count"] += row.error_count or 0
+        invoice["trades"].append({
+            "trade": row.trade.value,
+            "total_value": row.total_value or 0.0,
+            "line_count": row.line_count or 0,
+            "error_count": row.error_count or 0,
+            "cumulative_value": row.cumulative_value or 0.0,
+        })
+    return list(invoices.values())
@@ -1,24 +1,31 @@
 """Projects service - Business logic for project management"""
 
-from typing import List
+from typing import List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import Project
 from app.schemas.project import ProjectCreate
 
 
-def create_project(db: Session, project: ProjectCreate) -> Project:
+def create_project(
+    db: Session,
+    project: ProjectCreate,
+    project_id: Optional[int] = None,
+) -> Project:
     """
     إنشاء مشروع جديد
     
     Args:
         db: Database session
         project: بيانات المشروع الجديد
+        project_id: id محدد (الـ id العالمى من الـ catalog فى وضع sharding)
         
     Returns:
         Project: المشروع المُنشأ
     """
     new_project = Project(
+        id=project_id,
         name=project.name,
         location=project.location
     )
@@ -53,3 +60,48 @@ def get_project_by_id(db: Session, project_id: int) -> Project | None:
         Project | None: المشروع أو None إذا لم يتم العثور عليه
     """
     return db.query(Project).filter(Project.id == project_id).first()
+
+
+def get_data_version(db: Session, project_id: int) -> str | None:
+    """
+    الـ version الحالى لبيانات المشروع (ledger / تقارير)
+    
+    التقارير بتعرض أكواد وأوصاف البنود، فالـ version بيجمع data_version
+    و boq_version عشان تعديل المقايسة كمان يغيّر الـ ETag والـ cache.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        str | None: الـ version أو None إذا لم يتم العثور على المشروع
+    """
+    return format_data_version(db.execute(data_version_query(project_id)).first())
+
+
+def data_version_query(project_id: int):
+    """استعلام data_version و boq_version لمشروع (مشترك بين الـ sync و async)"""
+    return select(Project.data_version, Project.boq_version).where(
+        Project.id == project_id
+    )
+
+
+def format_data_version(row) -> str | None:
+    """الـ version النصى من صف data_version_query (None لو المشروع مش موجود)"""
+    if row is None:
+        return None
+    return f"{row.data_version}.{row.boq_version}"
+
+
+def bump_data_version(db: Session, project_id: int) -> None:
+    """
+    زيادة data_version للمشروع (بدون commit، فى نفس transaction الكتابة)
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+    """
+    db.query(Project).filter(Project.id == project_id).update(
+        {Project.data_version: Project.data_version + 1},
+        synchronize_session=False,
+    )
@@ -0,0 +1,241 @@
+"""Two-tier (memory + disk) cache for report results, keyed by project data version"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# قيمة فريدة تميز "مش موجود" عن نتيجة None/فاضية
+_MISSING = object()
+
+
+class ReportCache:
+    """
+    Cache لنتائج التقارير (JSON) بمستويين: ذاكرة (LRU) ثم ملفات على الديسك
+    
+    المفتاح فيه الـ version بتاع بيانات المشروع، فأى اعتماد بيزود
+    data_version والنتائج القديمة مبتتقريش تانى حتى من process تانى؛
+    invalidate_project بيمسحها بدرى عشان تفضى المساحة.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: int = 0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------- keys ----------
+
+    @staticmethod
+    def make_key(
+        endpoint: str,
+        project_id: int,
+        version: Any,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple:
+        """مفتاح الـ cache: (endpoint, project, version, params مرتبة)"""
+        items = tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+        return (endpoint, project_id, str(version), items)
+
+    def _disk_path(self, key: Tuple) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, str(key[1]), f"{key[0]}-{digest}.json")
+
+    # ---------- read / write ----------
+
+    def get(self, key: Tuple) -> Any:
+        """
+        قراءة نتيجة من الذاكرة ثم الديسك
+        
+        Returns:
+            النتيجة أو _MISSING
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        if value is not _MISSING:
+            self._memory_put(key, value, now)
+        return value
+
+    def put(self, key: Tuple, value: Any) -> None:
+        """تخزين نتيجة فى الذاكرة والديسك"""
+        now = time.time()
+        self._memory_put(key, value, now)
+        self._disk_put(key, value, now)
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """
+        إرجاع النتيجة من الـ cache أو حسابها وتخزينها
+        
+        Args:
+            key: من make_key
+            compute: دالة بتحسب التقرير لو مش موجود
+            
+        Returns:
+            نتيجة التقرير
+        """
+        value = self.get(key)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    async def aget_or_compute(
+        self,
+        key: Tuple,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        نفس get_or_compute لكن compute بترجع awaitable (endpoints الـ async)
+        """
+        value = self.get(key)
+        if value is _MISSING:
+            value = await compute()
+            self.put(key, value)
+        return value
+
+    def _memory_put(self, key: Tuple, value: Any, now: float) -> None:
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_get(self, key: Tuple, now: float) -> Any:
+        if not self.disk_dir:
+            return _MISSING
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return _MISSING
+        if payload.get("expires_at", 0) <= now:
+            self._remove_file(path)
+            return _MISSING
+        # mtime = آخر استخدام (للـ LRU على الديسك)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return payload["value"]
+
+    def _disk_put(self, key: Tuple, value: Any, now: float) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"expires_at": now + self.ttl_seconds, "value": value},
+                    f,
+                    ensure_ascii=False,
+                    default=str,
+                )
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove_file(tmp_path)
+            return
+        self._disk_evict()
+
+    def _disk_files(self):
+        for root, _dirs, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _disk_evict(self) -> None:
+        if not self.disk_max_entries:
+            return
+        files = list(self._disk_files())
+        if len(files) <= self.disk_max_entries:
+            return
+        files.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in files[: len(files) - self.disk_max_entries]:
+            self._remove_file(path)
+            with self._lock:
+                self.evictions += 1
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ---------- invalidation ----------
+
+    def invalidate_project(self, project_id: int) -> None:
+        """حذف كل نتائج المشروع من الذاكرة والديسك"""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == project_id]:
+                del self._entries[key]
+        if self.disk_dir:
+            shutil.rmtree(os.path.join(self.disk_dir, str(project_id)), ignore_errors=True)
+
+    def clear(self) -> None:
+        """تفريغ الـ cache بالكامل"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, float]:
+        """إحصائيات الـ cache (hits / misses / hit_rate)"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+            }
+
+
+# Singleton instance
+report_cache = ReportCache(
+    max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.REPORT_CACHE_TTL_SECONDS,
+    disk_dir=settings.REPORT_CACHE_DIR,
+    disk_max_entries=settings.REPORT_CACHE_DISK_MAX_ENTRIES,
+)
@@ -0,0 +1,577 @@
+"""Reports service - Read queries for reports and data exports"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models import (
+    BOQItem,
+    DailyLedger,
+    InvoiceDetail,
+    InvoiceLog,
+    InvoiceStatus,
+    InvoiceSummary,
+    LedgerMonthlyRollup,
+    Project,
+)
+from app.services.rollup_service import cumulative_at
+from app.utils.parsing import normalize_trade
+
+
+def invoice_details_query(invoice_id: int):
+    """
+    استعلام بنود مستخلص معتمد (InvoiceDetail) مع كود البند
+    
+    Args:
+        invoice_id: معرّف المستخلص
+        
+    Returns:
+        Select: الاستعلام مرتب بترتيب الإدخال
+    """
+    return (
+        select(
+            InvoiceDetail.id,
+            InvoiceDetail.boq_item_id,
+            BOQItem.item_code,
+            InvoiceDetail.row_description,
+            InvoiceDetail.trade,
+            InvoiceDetail.current_percentage,
+            InvoiceDetail.claimed_qty,
+            InvoiceDetail.approved_qty,
+            InvoiceDetail.equivalent_qty,
+            InvoiceDetail.previous_cumulative_qty,
+            InvoiceDetail.total_cumulative_qty,
+            InvoiceDetail.unit_price_at_time,
+            InvoiceDetail.total_value,
+        )
+        .join(BOQItem, BOQItem.id == InvoiceDetail.boq_item_id)
+        .where(InvoiceDetail.invoice_id == invoice_id)
+        .order_by(InvoiceDetail.id)
+    )
+
+
+def ledger_query(
+    project_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    boq_item_id: Optional[int] = None,
+    invoice_id: Optional[int] = None,
+):
+    """
+    استعلام صفوف DailyLedger لمشروع (للـ drill-down والتصدير)
+    
+    Args:
+        project_id: معرّف المشروع
+        date_from: من تاريخ (اختيارى)
+        date_to: إلى تاريخ (اختيارى)
+        boq_item_id: بند محدد (اختيارى)
+        invoice_id: مستخلص محدد (اختيارى)
+        
+    Returns:
+        Select: الاستعلام مرتب بالتاريخ
+    """
+    stmt = (
+        select(
+            DailyLedger.entry_date,
+            DailyLedger.invoice_id,
+            DailyLedger.boq_item_id,
+            BOQItem.item_code,
+            DailyLedger.distributed_qty,
+        )
+        .join(BOQItem, BOQItem.id == DailyLedger.boq_item_id)
+        .where(DailyLedger.project_id == project_id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(DailyLedger.entry_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(DailyLedger.entry_date <= date_to)
+    if boq_item_id is not None:
+        stmt = stmt.where(DailyLedger.boq_item_id == boq_item_id)
+    if invoice_id is not None:
+        stmt = stmt.where(DailyLedger.invoice_id == invoice_id)
+    return stmt.order_by(DailyLedger.entry_date, DailyLedger.id)
+
+
+def schedule_report(
+    db: Session,
+    project_id: int,
+    year: int,
+    month: int,
+    trade: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    كميات وقيم كل بند فى شهر معين (من ledger_monthly_rollup)
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        year: السنة
+        month: الشهر
+        trade: تخصص محدد (اختيارى)
+        
+    Returns:
+        List[Dict]: [{item_code, description, total_qty, total_value}]
+        
+    Raises:
+        ValueError: لو الشهر أو التخصص غير صالح
+    """
+    if month < 1 or month > 12:
+        raise ValueError("Invalid month")
+
+    stmt = (
+        select(
+            BOQItem.item_code,
+            BOQItem.description,
+            func.sum(LedgerMonthlyRollup.total_qty).label("total_qty"),
+            func.sum(LedgerMonthlyRollup.total_value).label("total_value"),
+        )
+        .join(BOQItem, BOQItem.id == LedgerMonthlyRollup.boq_item_id)
+        .where(
+            LedgerMonthlyRollup.project_id == project_id,
+            LedgerMonthlyRollup.year == year,
+            LedgerMonthlyRollup.month == month,
+        )
+        .group_by(BOQItem.id, BOQItem.item_code, BOQItem.description)
+        .order_by(BOQItem.path, BOQItem.item_code)
+    )
+    if trade:
+        stmt = stmt.where(LedgerMonthlyRollup.trade == normalize_trade(trade))
+
+    return [
+        {
+            "item_code": row.item_code,
+            "description": row.description,
+            "total_qty": float(row.total_qty or 0.0),
+            "total_value": float(row.total_value or 0.0),
+        }
+        for row in db.execute(stmt)
+    ]
+
+
+def schedule_matrix(
+    db: Session,
+    project_id: int,
+    year: int,
+    trade: Optional[str] = None,
+    cumulative: bool = False,
+) -> Dict[str, Any]:
+    """
+    مصفوفة بند × شهر لسنة كاملة (كميات وقيم) فى استعلام واحد
+    
+    الصفوف بتتجمع من ledger_monthly_rollup بـ GROUP BY (بند، شهر)، وكل
+    اللى قبل السنة بيتجمع فى عمود 0 (الرصيد الافتتاحى) لو cumulative.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        year: السنة
+        trade: تخصص محدد (اختيارى)
+        cumulative: إضافة أعمدة تراكمية (من بداية المشروع)
+        
+    Returns:
+        Dict: {year, months, items, qty, value[, cum_qty, cum_value]}
+              كل مصفوفة صف لكل بند و 12 عمود
+    """
+    month_key = (
+        case((LedgerMonthlyRollup.year < year, 0), else_=LedgerMonthlyRollup.month)
+        if cumulative
+        else LedgerMonthlyRollup.month
+    ).label("month_key")
+
+    stmt = (
+        select(
+            BOQItem.id,
+            BOQItem.item_code,
+            BOQItem.description,
+            BOQItem.unit,
+            month_key,
+            func.sum(LedgerMonthlyRollup.total_qty).label("total_qty"),
+            func.sum(LedgerMonthlyRollup.total_value).label("total_value"),
+        )
+        .join(BOQItem, BOQItem.id == LedgerMonthlyRollup.boq_item_id)
+        .where(LedgerMonthlyRollup.project_id == project_id)
+        .group_by(BOQItem.id, BOQItem.item_code, BOQItem.description, BOQItem.unit, month_key)
+        .order_by(BOQItem.path, BOQItem.item_code)
+    )
+    if cumulative:
+        stmt = stmt.where(LedgerMonthlyRollup.year <= year)
+    else:
+        stmt = stmt.where(LedgerMonthlyRollup.year == year)
+    if trade:
+        stmt = stmt.where(LedgerMonthlyRollup.trade == normalize_trade(trade))
+
+    rows = db.execute(stmt).all()
+
+    items: List[Dict[str, Any]] = []
+    item_index: Dict[int, int] = {}
+    row_pos = np.empty(len(rows), dtype=np.int64)
+    col_pos = np.empty(len(rows), dtype=np.int64)
+    qty = np.empty(len(rows), dtype=np.float64)
+    value = np.empty(len(rows), dtype=np.float64)
+
+    for i, row in enumerate(rows):
+        pos = item_index.get(row.id)
+        if pos is None:
+            pos = item_index[row.id] = len(items)
+            items.append({
+                "boq_item_id": row.id,
+                "item_code": row.item_code,
+                "description": row.description,
+                "unit": row.unit,
+            })
+        row_pos[i] = pos
+        col_pos[i] = row.month_key
+        qty[i] = row.total_qty or 0.0
+        value[i] = row.total_value or 0.0
+
+    # عمود 0 = الرصيد الافتتاحى، 1..12 = الشهور
+    qty_matrix = np.zeros((len(items), 13))
+    value_matrix = np.zeros((len(items), 13))
+    np.add.at(qty_matrix, (row_pos, col_pos), qty)
+    np.add.at(value_matrix, (row_pos, col_pos), value)
+
+    result: Dict[str, Any] = {
+        "year": year,
+        "months": list(range(1, 13)),
+        "items": items,
+        "qty": qty_matrix[:, 1:].tolist(),
+        "value": value_matrix[:, 1:].tolist(),
+    }
+    if cumulative:
+        result["cum_qty"] = np.cumsum(qty_matrix, axis=1)[:, 1:].tolist()
+        result["cum_value"] = np.cumsum(value_matrix, axis=1)[:, 1:].tolist()
+    return result
+
+
+SCHEDULE_EXPORT_COLUMNS = ["item_code", "description", "total_qty", "total_value"]
+
+
+def schedule_matrix_table(matrix: Dict[str, Any]) -> Tuple[List[str], List[List[Any]]]:
+    """
+    تحويل نتيجة schedule_matrix لجدول مسطح (للتصدير)
+    
+    Args:
+        matrix: نتيجة schedule_matrix
+        
+    Returns:
+        Tuple: (أسماء الأعمدة، صف لكل بند)
+    """
+    months = matrix["months"]
+    blocks = ["qty", "value"] + [b for b in ("cum_qty", "cum_value") if b in matrix]
+    columns = ["item_code", "description", "unit"]
+    for block in blocks:
+        columns += [f"{block}_{m:02d}" for m in months]
+    columns += ["total_qty", "total_value"]
+
+    rows = []
+    for i, item in enumerate(matrix["items"]):
+        row = [item["item_code"], item["description"], item["unit"]]
+        for block in blocks:
+            row += matrix[block][i]
+        row += [sum(matrix["qty"][i]), sum(matrix["value"][i])]
+        rows.append(row)
+    return columns, rows
+
+
+def _boq_item_labels(db: Session, boq_item_ids: List[int]) -> List[Dict[str, Any]]:
+    """بيانات البنود بترتيب المقايسة"""
+    if not boq_item_ids:
+        return []
+    rows = (
+        db.query(BOQItem.id, BOQItem.item_code, BOQItem.description, BOQItem.unit)
+        .filter(BOQItem.id.in_(boq_item_ids))
+        .order_by(BOQItem.path, BOQItem.item_code)
+        .all()
+    )
+    return [
+        {
+            "boq_item_id": r.id,
+            "item_code": r.item_code,
+            "description": r.description,
+            "unit": r.unit,
+        }
+        for r in rows
+    ]
+
+
+def _period_matrix(
+    db: Session,
+    project_id: int,
+    boundaries: List[date],
+) -> Dict[str, Any]:
+    """
+    فروق التراكمى بين تواريخ متتالية: عمود لكل فترة (boundaries[i-1], boundaries[i]]
+    """
+    item_ids, cum_qty, cum_value = cumulative_at(db, project_id, boundaries)
+    qty = np.diff(cum_qty, axis=1)
+    value = np.diff(cum_value, axis=1)
+
+    # البنود اللى ليها حركة فى المدة بس
+    position = {item_id: i for i, item_id in enumerate(item_ids)}
+    active = [item_id for item_id in item_ids if np.any(qty[position[item_id]])]
+    items = _boq_item_labels(db, active)
+    rows = [position[item["boq_item_id"]] for item in items]
+    return {
+        "items": items,
+        "qty": qty[rows].tolist(),
+        "value": value[rows].tolist(),
+    }
+
+
+def range_report(
+    db: Session,
+    project_id: int,
+    date_from: date,
+    date_to: date,
+) -> List[Dict[str, Any]]:
+    """
+    إجمالى كل بند فى مدة [date_from, date_to] من ledger_prefix_sums
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        date_from: من تاريخ (شامل)
+        date_to: إلى تاريخ (شامل)
+        
+    Returns:
+        List[Dict]: [{item_code, description, total_qty, total_value}]
+        
+    Raises:
+        ValueError: لو date_from بعد date_to
+    """
+    if date_from > date_to:
+        raise ValueError("date_from يجب أن يكون قبل date_to")
+
+    matrix = _period_matrix(db, project_id, [date_from - timedelta(days=1), date_to])
+    return [
+        {
+            "item_code": item["item_code"],
+            "description": item["description"],
+            "total_qty": qty[0],
+            "total_value": value[0],
+        }
+        for item, qty, value in zip(matrix["items"], matrix["qty"], matrix["value"])
+    ]
+
+
+def weekly_report(
+    db: Session,
+    project_id: int,
+    date_from: date,
+    date_to: date,
+) -> Dict[str, Any]:
+    """
+    كميات وقيم كل بند أسبوع بأسبوع (أسابيع 7 أيام تبدأ من date_from)
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        date_from: بداية أول أسبوع
+        date_to: آخر يوم (آخر أسبوع ممكن يكون أقصر)
+        
+    Returns:
+        Dict: {weeks: [{start, end}], items, qty, value}
+        
+    Raises:
+        ValueError: لو date_from بعد date_to
+    """
+    if date_from > date_to:
+        raise ValueError("date_from يجب أن يكون قبل date_to")
+
+    week_starts = []
+    current = date_from
+    while current <= date_to:
+        week_starts.append(current)
+        current += timedelta(days=7)
+    week_ends = [min(start + timedelta(days=6), date_to) for start in week_starts]
+
+    matrix = _period_matrix(
+        db, project_id, [date_from - timedelta(days=1)] + week_ends
+    )
+    matrix["weeks"] = [
+        {"start": start.isoformat(), "end": end.isoformat()}
+        for start, end in zip(week_starts, week_ends)
+    ]
+    return matrix
+
+
+def _downsample_indices(n: int, points: Optional[int]) -> np.ndarray:
+    """فهارس نقط متساوية البعد (أول وآخر نقطة دايماً موجودين)"""
+    if not points or n <= points:
+        return np.arange(n)
+    if points == 1:
+        return np.array([n - 1])
+    return np.unique(np.linspace(0, n - 1, points).round().astype(np.int64))
+
+
+def s_curve(
+    db: Session,
+    project_id: int,
+    trade: Optional[str] = None,
+    by_trade: bool = False,
+    points: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    منحنى القيمة التراكمية (S-curve) للمشروع شهر بشهر
+    
+    التراكمى بيتحسب فى قاعدة البيانات بـ SUM() OVER (ORDER BY year, month)
+    على ledger_monthly_rollup، فالعميل بياخد النقط بس مش صفوف الـ ledger.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        trade: تخصص محدد (اختيارى)
+        by_trade: منحنى منفصل لكل تخصص
+        points: أقصى عدد نقط لكل منحنى (downsampling)
+        
+    Returns:
+        Dict: {project_id, series: [{trade, periods, period_value, cum_value, percent}]}
+        
+    Raises:
+        ValueError: لو points أقل من 1
+    """
+    if points is not None and points < 1:
+        raise ValueError("points يجب أن يكون 1 أو أكثر")
+
+    group_cols = [LedgerMonthlyRollup.trade] if by_trade else []
+    monthly = (
+        select(
+            *group_cols,
+            LedgerMonthlyRollup.year,
+            LedgerMonthlyRollup.month,
+            func.sum(LedgerMonthlyRollup.total_value).label("period_value"),
+        )
+        .where(LedgerMonthlyRollup.project_id == project_id)
+        .group_by(*group_cols, LedgerMonthlyRollup.year, LedgerMonthlyRollup.month)
+    )
+    if trade:
+        monthly = monthly.where(LedgerMonthlyRollup.trade == normalize_trade(trade))
+    monthly = monthly.subquery()
+
+    partition = [monthly.c.trade] if by_trade else None
+    stmt = select(
+        *([monthly.c.trade] if by_trade else []),
+        monthly.c.year,
+        monthly.c.month,
+        monthly.c.period_value,
+        func.sum(monthly.c.period_value)
+        .over(partition_by=partition, order_by=(monthly.c.year, monthly.c.month))
+        .label("cum_value"),
+    ).order_by(
+        *([monthly.c.trade] if by_trade else []), monthly.c.year, monthly.c.month
+    )
+
+    grouped: Dict[str, List[Any]] = {}
+    for row in db.execute(stmt):
+        key = row.trade.value if by_trade else (normalize_trade(trade) if trade else "ALL")
+        grouped.setdefault(key, []).append(row)
+
+    series = []
+    for key, rows in grouped.items():
+        cum_value = np.array([r.cum_value or 0.0 for r in rows])
+        idx = _downsample_indices(len(rows), points)
+        final = cum_value[-1] if len(cum_value) else 0.0
+        series.append({
+            "trade": key,
+            "periods": [f"{rows[i].year:04d}-{rows[i].month:02d}" for i in idx],
+            # القيمة من النقطة السابقة لحد النقطة دى (بعد الـ downsampling)
+            "period_value": np.diff(cum_value[idx], prepend=0.0).tolist(),
+            "cum_value": cum_value[idx].tolist(),
+            "percent": (cum_value[idx] / final * 100.0).tolist() if final else [0.0] * len(idx),
+        })
+
+    return {"project_id": project_id, "series": series}
+
+
+def portfolio_summary(
+    db: Session,
+    project_ids: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    ملخص المشاريع (عدد المستخلصات + القيمة لكل تخصص) من قاعدة واحدة
+    
+    فى وضع sharding بيتنادى على كل shard بمشاريعه (fan-out) والنتايج
+    بتتجمع بـ merge_portfolio.
+    
+    Args:
+        db: Database session
+        project_ids: المشاريع المطلوبة (None = كل مشاريع القاعدة)
+        
+    Returns:
+        List[Dict]: [{project_id, name, invoice_count, approved_count,
+                      last_period_end, total_value, by_trade}]
+    """
+    invoices = (
+        select(
+            Project.id,
+            Project.name,
+            func.count(InvoiceLog.id).label("invoice_count"),
+            func.coalesce(
+                func.sum(case((InvoiceLog.status == InvoiceStatus.APPROVED, 1), else_=0)), 0
+            ).label("approved_count"),
+            func.max(InvoiceLog.period_end).label("last_period_end"),
+        )
+        .outerjoin(InvoiceLog, InvoiceLog.project_id == Project.id)
+        .group_by(Project.id, Project.name)
+    )
+    values = select(
+        InvoiceSummary.project_id,
+        InvoiceSummary.trade,
+        func.sum(InvoiceSummary.total_value).label("total_value"),
+    ).group_by(InvoiceSummary.project_id, InvoiceSummary.trade)
+    if project_ids is not None:
+        invoices = invoices.where(Project.id.in_(project_ids))
+        values = values.where(InvoiceSummary.project_id.in_(project_ids))
+
+    projects = {
+        row.id: {
+            "project_id": row.id,
+            "name": row.name,
+            "invoice_count": row.invoice_count,
+            "approved_count": row.approved_count,
+            "last_period_end": row.last_period_end.isoformat() if row.last_period_end else None,
+            "total_value": 0.0,
+            "by_trade": {},
+        }
+        for row in db.execute(invoices)
+    }
+    for row in db.execute(values):
+        project = projects.get(row.project_id)
+        if project is None:
+            continue
+        project["by_trade"][row.trade.value] = row.total_value or 0.0
+        project["total_value"] += row.total_value or 0.0
+    return list(projects.values())
+
+
+def merge_portfolio(parts: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    دمج نتايج portfolio_summary من أكتر من قاعدة
+    
+    Args:
+        parts: نتيجة كل shard
+        
+    Returns:
+        Dict: {projects: [...مرتبة بالـ id], totals: {projects, invoice_count,
+               approved_count, total_value, by_trade}}
+    """
+    projects = sorted(
+        (project for part in parts for project in part), key=lambda p: p["project_id"]
+    )
+    by_trade: Dict[str, float] = {}
+    for project in projects:
+        for trade, value in project["by_trade"].items():
+            by_trade[trade] = by_trade.get(trade, 0.0) + value
+    return {
+        "projects": projects,
+        "totals": {
+            "projects": len(projects),
+            "invoice_count": sum(p["invoice_count"] for p in projects),
+            "approved_count": sum(p["approved_count"] for p in projects),
+            "total_value": sum(p["total_value"] for p in projects),
+            "by_trade": by_trade,
+        },
+    }
@@ -0,0 +1,357 @@
+"""Rollup service - Incremental maintenance of pre-aggregated ledger tables"""
+
+import calendar
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.upsert import upsert_rows
+from app.models import (
+    InvoiceDetail,
+    InvoiceLog,
+    InvoiceStatus,
+    LedgerMonthlyRollup,
+    LedgerPrefixSum,
+)
+from app.utils.parsing import normalize_trade
+
+
+@dataclass
+class LedgerContribution:
+    """كمية بند واحد موزعة بالتساوى على أيام فترة المستخلص"""
+    boq_item_id: int
+    trade: str
+    start_date: date
+    total_days: int
+    qty: float
+    unit_price: float
+
+
+def monthly_split(
+    start_date: date,
+    total_days: int,
+    qty: float,
+) -> Dict[Tuple[int, int], float]:
+    """
+    تقسيم كمية موزعة يومياً على الشهور (نفس توزيع distribute_to_ledger)
+    
+    Args:
+        start_date: أول يوم
+        total_days: عدد الأيام
+        qty: الكمية الكلية
+        
+    Returns:
+        Dict: {(year, month): qty}
+    """
+    daily_rate = qty / total_days
+    result: Dict[Tuple[int, int], float] = {}
+    current = start_date
+    remaining = total_days
+    while remaining > 0:
+        last_day = calendar.monthrange(current.year, current.month)[1]
+        days = min(remaining, last_day - current.day + 1)
+        result[(current.year, current.month)] = daily_rate * days
+        remaining -= days
+        current = current + timedelta(days=days)
+    return result
+
+
+def apply_to_monthly_rollup(
+    db: Session,
+    project_id: int,
+    contributions: Iterable[LedgerContribution],
+    sign: int = 1,
+) -> int:
+    """
+    إضافة (أو طرح) كميات مستخلص من ledger_monthly_rollup (بدون commit)
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        contributions: الكميات الموزعة على الـ ledger
+        sign: 1 للإضافة، -1 للطرح عند حذف صفوف الـ ledger
+        
+    Returns:
+        int: عدد صفوف الـ rollup المتأثرة
+    """
+    totals: Dict[tuple, List[float]] = defaultdict(lambda: [0.0, 0.0])
+    for c in contributions:
+        if not c.qty or c.total_days <= 0:
+            continue
+        for (year, month), qty in monthly_split(c.start_date, c.total_days, c.qty).items():
+            bucket = totals[(c.boq_item_id, c.trade, year, month)]
+            bucket[0] += sign * qty
+            bucket[1] += sign * qty * c.unit_price
+
+    rows = [
+        {
+            "project_id": project_id,
+            "boq_item_id": boq_item_id,
+            "trade": trade,
+            "year": year,
+            "month": month,
+            "total_qty": qty,
+            "total_value": value,
+        }
+        for (boq_item_id, trade, year, month), (qty, value) in totals.items()
+    ]
+    return upsert_rows(
+        db,
+        LedgerMonthlyRollup,
+        rows,
+        index_elements=["project_id", "year", "month", "boq_item_id", "trade"],
+        increment_columns=["total_qty", "total_value"],
+    )
+
+
+def invoice_contributions(
+    db: Session,
+    invoice: InvoiceLog,
+) -> List[LedgerContribution]:
+    """
+    الكميات اللى بنود المستخلص الحالية (InvoiceDetail) وزعتها على الـ ledger
+    
+    Args:
+        db: Database session
+        invoice: المستخلص
+        
+    Returns:
+        List[LedgerContribution]
+    """
+    total_days = max((invoice.period_end - invoice.period_start).days + 1, 1)
+    rows = (
+        db.query(
+            InvoiceDetail.boq_item_id,
+            InvoiceDetail.trade,
+            InvoiceDetail.equivalent_qty,
+            InvoiceDetail.unit_price_at_time,
+        )
+        .filter(InvoiceDetail.invoice_id == invoice.id)
+        .all()
+    )
+    return [
+        LedgerContribution(
+            boq_item_id=r.boq_item_id,
+            trade=normalize_trade(r.trade),
+            start_date=invoice.period_start,
+            total_days=total_days,
+            qty=r.equivalent_qty or 0.0,
+            unit_price=r.unit_price_at_time or 0.0,
+        )
+        for r in rows
+        if r.equivalent_qty
+    ]
+
+
+def rebuild_monthly_rollup(db: Session, project_id: int) -> int:
+    """
+    إعادة بناء ledger_monthly_rollup لمشروع من المستخلصات المعتمدة
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        int: عدد صفوف الـ rollup
+    """
+    db.query(LedgerMonthlyRollup).filter(
+        LedgerMonthlyRollup.project_id == project_id
+    ).delete(synchronize_session=False)
+
+    invoices = (
+        db.query(InvoiceLog)
+        .filter(
+            InvoiceLog.project_id == project_id,
+            InvoiceLog.status == InvoiceStatus.APPROVED,
+        )
+        .all()
+    )
+    contributions: List[LedgerContribution] = []
+    for invoice in invoices:
+        contributions.extend(invoice_contributions(db, invoice))
+
+    count = apply_to_monthly_rollup(db, project_id, contributions)
+    db.commit()
+    return count
+
+
+def refresh_prefix_sums(
+    db: Session,
+    project_id: int,
+    boq_item_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    إعادة حساب نقاط الـ prefix sum لبنود مشروع (بدون commit)
+    
+    كل مستخلص معتمد بيضيف معدل يومى ثابت من period_start لحد
+    period_end، فالنقاط هى تواريخ تغيّر المعدل بس (بداية/نهاية الفترات).
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        boq_item_ids: البنود المتأثرة (None = كل بنود المشروع)
+        
+    Returns:
+        int: عدد النقاط المكتوبة
+    """
+    if boq_item_ids is not None:
+        boq_item_ids = list(set(boq_item_ids))
+        if not boq_item_ids:
+            return 0
+
+    q = (
+        db.query(
+            InvoiceDetail.boq_item_id,
+            InvoiceDetail.equivalent_qty,
+            InvoiceDetail.unit_price_at_time,
+            InvoiceLog.period_start,
+            InvoiceLog.period_end,
+        )
+        .join(InvoiceLog, InvoiceLog.id == InvoiceDetail.invoice_id)
+        .filter(
+            InvoiceLog.project_id == project_id,
+            InvoiceLog.status == InvoiceStatus.APPROVED,
+            InvoiceDetail.equivalent_qty != 0,
+        )
+    )
+    delete_q = db.query(LedgerPrefixSum).filter(LedgerPrefixSum.project_id == project_id)
+    if boq_item_ids is not None:
+        q = q.filter(InvoiceDetail.boq_item_id.in_(boq_item_ids))
+        delete_q = delete_q.filter(LedgerPrefixSum.boq_item_id.in_(boq_item_ids))
+
+    # تغيّر المعدل اليومى لكل بند فى كل تاريخ
+    events: Dict[int, Dict[date, List[float]]] = defaultdict(
+        lambda: defaultdict(lambda: [0.0, 0.0])
+    )
+    for r in q.all():
+        total_days = max((r.period_end - r.period_start).days + 1, 1)
+        daily_qty = r.equivalent_qty / total_days
+        daily_value = daily_qty * (r.unit_price_at_time or 0.0)
+        item_events = events[r.boq_item_id]
+        start = item_events[r.period_start]
+        start[0] += daily_qty
+        start[1] += daily_value
+        end = item_events[r.period_start + timedelta(days=total_days)]
+        end[0] -= daily_qty
+        end[1] -= daily_value
+
+    rows = []
+    for boq_item_id, item_events in events.items():
+        cum_qty = cum_value = 0.0
+        daily_qty = daily_value = 0.0
+        previous: Optional[date] = None
+        for boundary in sorted(item_events):
+            if previous is not None:
+                days = (boundary - previous).days
+                cum_qty += daily_qty * days
+                cum_value += daily_value * days
+            delta_qty, delta_value = item_events[boundary]
+            daily_qty += delta_qty
+            daily_value += delta_value
+            # بواقى الطرح العشرية بعد آخر فترة
+            if abs(daily_qty) < 1e-12:
+                daily_qty = 0.0
+            if abs(daily_value) < 1e-12:
+                daily_value = 0.0
+            rows.append({
+                "project_id": project_id,
+                "boq_item_id": boq_item_id,
+                "boundary_date": boundary,
+                "cum_qty": cum_qty,
+                "daily_qty": daily_qty,
+                "cum_value": cum_value,
+                "daily_value": daily_value,
+            })
+            previous = boundary
+
+    delete_q.delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(LedgerPrefixSum), rows)
+    return len(rows)
+
+
+def rebuild_prefix_sums(db: Session, project_id: int) -> int:
+    """
+    إعادة بناء ledger_prefix_sums لمشروع كامل
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        
+    Returns:
+        int: عدد النقاط
+    """
+    count = refresh_prefix_sums(db, project_id)
+    db.commit()
+    return count
+
+
+def cumulative_at(
+    db: Session,
+    project_id: int,
+    dates: Sequence[date],
+    boq_item_ids: Optional[Iterable[int]] = None,
+) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    الكمية والقيمة التراكمية لكل بند فى نهاية كل تاريخ
+    
+    لكل (بند، تاريخ): آخر نقطة قبل التاريخ (searchsorted) + المعدل
+    اليومى × عدد الأيام من النقطة، بدل SUM على صفوف الـ DailyLedger.
+    
+    Args:
+        db: Database session
+        project_id: معرّف المشروع
+        dates: التواريخ (شاملة اليوم نفسه)
+        boq_item_ids: بنود محددة (اختيارى)
+        
+    Returns:
+        Tuple: (boq_item_ids, qty[items × dates], value[items × dates])
+    """
+    if not dates:
+        return [], np.zeros((0, 0)), np.zeros((0, 0))
+
+    q = (
+        db.query(
+            LedgerPrefixSum.boq_item_id,
+            LedgerPrefixSum.boundary_date,
+            LedgerPrefixSum.cum_qty,
+            LedgerPrefixSum.daily_qty,
+            LedgerPrefixSum.cum_value,
+            LedgerPrefixSum.daily_value,
+        )
+        .filter(
+            LedgerPrefixSum.project_id == project_id,
+            LedgerPrefixSum.boundary_date <= max(dates),
+        )
+        .order_by(LedgerPrefixSum.boq_item_id, LedgerPrefixSum.boundary_date)
+    )
+    if boq_item_ids is not None:
+        q = q.filter(LedgerPrefixSum.boq_item_id.in_(list(boq_item_ids)))
+
+    points: Dict[int, List[tuple]] = defaultdict(list)
+    for r in q.all():
+        points[r.boq_item_id].append(
+            (r.boundary_date.toordinal(), r.cum_qty, r.daily_qty, r.cum_value, r.daily_value)
+        )
+
+    item_ids = list(points)
+    targets = np.array([d.toordinal() for d in dates], dtype=np.int64)
+    qty = np.zeros((len(item_ids), len(targets)))
+    value = np.zeros((len(item_ids), len(targets)))
+
+    for i, item_id in enumerate(item_ids):
+        arr = np.array(points[item_id], dtype=np.float64)
+        ordinals = arr[:, 0].astype(np.int64)
+        k = np.searchsorted(ordinals, targets, side="right") - 1
+        valid = k >= 0
+        kk = k[valid]
+        days = targets[valid] - ordinals[kk] + 1
+        qty[i, valid] = arr[kk, 1] + arr[kk, 2] * days
+        value[i, valid] = arr[kk, 3] + arr[kk, 4] * days
+
+    return item_ids, qty, value
@@ -0,0 +1,237 @@
+"""Staging retention - ضغط staging المستخلصات المعتمدة واسترجاعه عند الطلب"""
+
+import enum
+import json
+import zlib
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.bulk import bulk_insert
+from app.models import (
+    InvoiceLog,
+    InvoiceStatus,
+    Project,
+    StagingInvoiceDetail,
+    StagingSnapshot,
+)
+from app.services.staging_service import bump_staging_version
+from app.utils.timestamps import utcnow
+
+# الأعمدة المحفوظة فى الـ snapshot (الـ id بيتولد من جديد عند الاسترجاع)
+SNAPSHOT_COLUMNS = [
+    column.key
+    for column in StagingInvoiceDetail.__table__.columns
+    if column.key not in ("id", "invoice_id")
+]
+
+
+def snapshot_json(rows: List[Dict[str, Any]]) -> bytes:
+    """صفوف staging → JSON (الـ enums بالاسم)"""
+    plain = [
+        {key: value.name if isinstance(value, enum.Enum) else value for key, value in row.items()}
+        for row in rows
+    ]
+    return json.dumps(plain, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_snapshot(payload: bytes) -> List[Dict[str, Any]]:
+    """payload الـ snapshot (snapshot_json + zlib) → صفوف"""
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def compact_invoice_staging(db: Session, invoice_id: int) -> Dict[str, Any]:
+    """
+    ضغط staging مستخلص معتمد: snapshot لكل تخصص ومسح الصفوف
+
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+
+    Returns:
+        Dict: {invoice_id, rows, snapshots, raw_bytes, compressed_bytes}
+
+    Raises:
+        ValueError: لو المستخلص مش موجود / مش معتمد / مضغوط بالفعل
+    """
+    invoice = db.get(InvoiceLog, invoice_id)
+    if invoice is None:
+        raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+    if invoice.status != InvoiceStatus.APPROVED:
+        raise ValueError("ضغط الـ staging للمستخلصات المعتمدة فقط")
+    if invoice.staging_compacted:
+        raise ValueError("بيانات الـ staging مضغوطة بالفعل")
+
+    table = StagingInvoiceDetail.__table__
+    rows = db.execute(
+        select(*(table.c[key] for key in SNAPSHOT_COLUMNS))
+        .where(table.c.invoice_id == invoice_id)
+        .order_by(table.c.row_index, table.c.id)
+    ).mappings()
+
+    by_trade: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_trade.setdefault(row["trade"], []).append(dict(row))
+
+    created_at = utcnow()
+    row_count = raw_bytes = compressed_bytes = 0
+    for trade, trade_rows in by_trade.items():
+        raw = snapshot_json(trade_rows)
+        payload = zlib.compress(raw, 9)
+        raw_size = len(raw)
+        db.add(StagingSnapshot(
+            invoice_id=invoice_id,
+            trade=trade,
+            row_count=len(trade_rows),
+            raw_bytes=raw_size,
+            payload=payload,
+            created_at=created_at,
+        ))
+        row_count += len(trade_rows)
+        raw_bytes += raw_size
+        compressed_bytes += len(payload)
+
+    db.execute(delete(table).where(table.c.invoice_id == invoice_id))
+    invoice.staging_compacted = True
+    # صفحات الـ staging اتغيرت (فاضية دلوقتى) → ETag جديد
+    bump_staging_version(db, invoice_id)
+    db.commit()
+
+    return {
+        "invoice_id": invoice_id,
+        "rows": row_count,
+        "snapshots": len(by_trade),
+        "raw_bytes": raw_bytes,
+        "compressed_bytes": compressed_bytes,
+    }
+
+
+def _snapshot_rows(snapshots: List[StagingSnapshot], invoice_id: int) -> List[Dict[str, Any]]:
+    """صفوف كل الـ snapshots بترتيب row_index"""
+    rows = [
+        dict(row, invoice_id=invoice_id)
+        for snapshot in snapshots
+        for row in decode_snapshot(snapshot.payload)
+    ]
+    rows.sort(key=lambda row: row["row_index"])
+    return rows
+
+
+def _load_snapshots(db: Session, invoice_id: int) -> Tuple[InvoiceLog, List[StagingSnapshot]]:
+    """
+    المستخلص المضغوط والـ snapshots بتاعته
+
+    Raises:
+        ValueError: لو المستخلص مش موجود أو مش مضغوط
+    """
+    invoice = db.get(InvoiceLog, invoice_id)
+    if invoice is None:
+        raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+    if not invoice.staging_compacted:
+        raise ValueError("بيانات الـ staging مش مضغوطة")
+
+    snapshots = db.scalars(
+        select(StagingSnapshot)
+        .where(StagingSnapshot.invoice_id == invoice_id)
+        .order_by(StagingSnapshot.id)
+    ).all()
+    return invoice, snapshots
+
+
+def get_snapshot_rows(db: Session, invoice_id: int) -> List[Dict[str, Any]]:
+    """
+    صفوف staging مستخلص مضغوط من الـ snapshots (قراءة بس، من غير استرجاع)
+
+    للمشاريع المؤرشفة (الأرشيف قراءة بس فالاسترجاع مش متاح).
+
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+
+    Returns:
+        List[Dict]: الصفوف بترتيب row_index (الـ enums بالاسم، من غير id)
+
+    Raises:
+        ValueError: لو المستخلص مش موجود أو مش مضغوط
+    """
+    _invoice, snapshots = _load_snapshots(db, invoice_id)
+    return _snapshot_rows(snapshots, invoice_id)
+
+
+def restore_invoice_staging(db: Session, invoice_id: int) -> Dict[str, Any]:
+    """
+    استرجاع صفوف staging مستخلص مضغوط من الـ snapshots
+
+    الصفوف بترجع بنفس row_index وكل الأعمدة، بـ ids جديدة.
+
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+
+    Returns:
+        Dict: {invoice_id, rows, snapshots}
+
+    Raises:
+        ValueError: لو المستخلص مش موجود أو مش مضغوط
+    """
+    invoice, snapshots = _load_snapshots(db, invoice_id)
+    rows = _snapshot_rows(snapshots, invoice_id)
+
+    bulk_insert(db, StagingInvoiceDetail, rows)
+    db.execute(delete(StagingSnapshot).where(StagingSnapshot.invoice_id == invoice_id))
+    invoice.staging_compacted = False
+    bump_staging_version(db, invoice_id)
+    db.commit()
+
+    return {"invoice_id": invoice_id, "rows": len(rows), "snapshots": len(snapshots)}
+
+
+def compact_approved_staging(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    limit: Optional[int] = None,
+    project_ids: Optional[List[int]] = None,
+) -> Dict[str, int]:
+    """
+    الـ retention job: ضغط staging المستخلصات المعتمدة من أكتر من N يوم
+
+    المشاريع المؤرشفة مستبعدة (الـ staging بتاعها فى الأرشيف).
+
+    Args:
+        db: Database session
+        older_than_days: عدد الأيام (None = settings.STAGING_RETENTION_DAYS)
+        limit: أقصى عدد مستخلصات (None = settings.STAGING_COMPACTION_BATCH)
+        project_ids: مشاريع محددة (None = الكل)
+
+    Returns:
+        Dict: {invoices, rows, raw_bytes, compressed_bytes}
+    """
+    totals = {"invoices": 0, "rows": 0, "raw_bytes": 0, "compressed_bytes": 0}
+    days = settings.STAGING_RETENTION_DAYS if older_than_days is None else older_than_days
+    if days is None:
+        return totals
+
+    stmt = (
+        select(InvoiceLog.id)
+        .join(Project, Project.id == InvoiceLog.project_id)
+        .where(
+            InvoiceLog.staging_compacted.is_(False),
+            InvoiceLog.approved_at <= utcnow() - timedelta(days=days),
+            InvoiceLog.status == InvoiceStatus.APPROVED,
+            Project.archived.is_(False),
+        )
+        .order_by(InvoiceLog.approved_at)
+        .limit(limit or settings.STAGING_COMPACTION_BATCH)
+    )
+    if project_ids is not None:
+        stmt = stmt.where(InvoiceLog.project_id.in_(project_ids))
+
+    for invoice_id in db.scalars(stmt).all():
+        result = compact_invoice_staging(db, invoice_id)
+        totals["invoices"] += 1
+        for key in ("rows", "raw_bytes", "compressed_bytes"):
+            totals[key] += result[key]
+    return totals
@@ -1,10 +1,97 @@
 """Staging service - Business logic for managing staging data"""
 
-from typing import List
+from collections import defaultdict
+import enum
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import update, bindparam, select, or_, and_
 from sqlalchemy.orm import Session
 
-from app.models import StagingInvoiceDetail
-from app.schemas.staging import StagingRowUpdate
+from app.models import StagingInvoiceDetail, InvoiceLog, RowType
+from app.schemas.staging import StagingRowUpdate, StagingPatch
+from app.utils.parsing import normalize_trade
+
+# الأعمدة المتاحة للقراءة (fields=)
+STAGING_FIELDS = (
+    "id",
+    "row_index",
+    "raw_item_code",
+    "raw_description",
+    "raw_qty",
+    "raw_percentage",
+    "trade",
+    "row_type",
+    "include_in_invoice",
+    "is_valid",
+    "error_message",
+)
+
+
+class StagingVersionConflict(ValueError):
+    """الـ staging اتعدّل من حد تانى بعد آخر قراءة (base_version قديم)"""
+
+
+def staging_version_query(invoice_id: int):
+    """استعلام staging_version لمستخلص (مشترك بين الـ sync و async)"""
+    return select(InvoiceLog.staging_version).where(InvoiceLog.id == invoice_id)
+
+
+def get_staging_version(db: Session, invoice_id: int) -> Optional[int]:
+    """
+    الـ version الحالى لصفوف staging لمستخلص
+    
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+        
+    Returns:
+        int | None: الـ version أو None إذا لم يتم العثور على المستخلص
+    """
+    return db.execute(staging_version_query(invoice_id)).scalar()
+
+
+def staging_version_update(invoice_id: int, expected_version: Optional[int] = None):
+    """
+    جملة UPDATE لزيادة staging_version (مشتركة بين الـ sync و async)
+    
+    Args:
+        invoice_id: معرّف المستخلص
+        expected_version: الـ version المتوقع (compare-and-set، اختيارى)
+        
+    Returns:
+        Update: الجملة
+    """
+    stmt = (
+        update(InvoiceLog)
+        .where(InvoiceLog.id == invoice_id)
+        .values(staging_version=InvoiceLog.staging_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(InvoiceLog.staging_version == expected_version)
+    return stmt
+
+
+def bump_staging_version(
+    db: Session,
+    invoice_id: int,
+    expected_version: Optional[int] = None,
+) -> bool:
+    """
+    زيادة staging_version للمستخلص (بدون commit)
+    
+    لو expected_version متحدد الزيادة بتتم بشرط إن الـ version الحالى
+    يساويه (compare-and-set فى جملة UPDATE واحدة).
+    
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+        expected_version: الـ version المتوقع (اختيارى)
+        
+    Returns:
+        bool: هل تمت الزيادة
+    """
+    result = db.execute(staging_version_update(invoice_id, expected_version))
+    return result.rowcount > 0
 
 
 def get_staging_rows(db: Session, invoice_id: int) -> List[StagingInvoiceDetail]:
@@ -26,68 +113,340 @@ def get_staging_rows(db: Session, invoice_id: int) -> List[StagingInvoiceDetail]
     )
 
 
-def update_staging_row(
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    تحويل الـ cursor النصى "row_index:id" إلى tuple
+    
+    Raises:
+        ValueError: إذا كان الـ cursor غير صالح
+    """
+    if not cursor:
+        return None
+    try:
+        row_index, row_id = cursor.split(":", 1)
+        return int(row_index), int(row_id)
+    except ValueError:
+        raise ValueError(f"cursor غير صالح: '{cursor}' (الصيغة row_index:id)")
+
+
+def _parse_row_type(value: str) -> RowType:
+    try:
+        return RowType(value.strip().lower())
+    except ValueError:
+        try:
+            return RowType[value.strip().upper()]
+        except KeyError:
+            allowed = [m.value for m in RowType]
+            raise ValueError(f"Invalid row_type '{value}'. Allowed values: {allowed}")
+
+
+def build_staging_query(
+    invoice_id: int,
+    fields: Optional[Sequence[str]] = None,
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    include_in_invoice: Optional[bool] = None,
+    row_type: Optional[str] = None,
+    is_valid: Optional[bool] = None,
+    trade: Optional[str] = None,
+    errors_only: bool = False,
+):
+    """
+    بناء استعلام صفوف staging (keyset pagination + فلاتر + اختيار أعمدة)
+    
+    الترتيب على (row_index, id) لأن row_index بيتكرر بين التخصصات فى
+    نفس المستخلص؛ الصفحة التالية بتبدأ بعد آخر (row_index, id) مباشرة
+    من غير OFFSET.
+    
+    Args:
+        invoice_id: معرّف المستخلص
+        fields: الأعمدة المطلوبة (None = كل الأعمدة)
+        after: (row_index, id) لآخر صف فى الصفحة السابقة
+        limit: أقصى عدد صفوف (None = الكل)
+        include_in_invoice / row_type / is_valid / trade: فلاتر اختيارية
+        errors_only: الصفوف اللى فيها خطأ فقط
+        
+    Returns:
+        Select: الاستعلام (الأعمدة المطلوبة + id و row_index)
+        
+    Raises:
+        ValueError: إذا كان اسم عمود أو قيمة فلتر غير صالحة
+    """
+    fields = list(fields) if fields else list(STAGING_FIELDS)
+    unknown = [f for f in fields if f not in STAGING_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"أعمدة غير معروفة: {unknown}. الأعمدة المتاحة: {list(STAGING_FIELDS)}"
+        )
+
+    # id و row_index لازم يتقروا عشان الـ cursor
+    selected = list(dict.fromkeys(["id", "row_index", *fields]))
+    S = StagingInvoiceDetail
+    stmt = select(*[getattr(S, f) for f in selected]).where(S.invoice_id == invoice_id)
+
+    if include_in_invoice is not None:
+        stmt = stmt.where(S.include_in_invoice == include_in_invoice)
+    if is_valid is not None:
+        stmt = stmt.where(S.is_valid == is_valid)
+    if row_type:
+        stmt = stmt.where(S.row_type == _parse_row_type(row_type))
+    if trade:
+        stmt = stmt.where(S.trade == normalize_trade(trade))
+    if errors_only:
+        stmt = stmt.where(S.is_valid == False, S.error_message.isnot(None))  # noqa: E712
+
+    if after is not None:
+        after_index, after_id = after
+        stmt = stmt.where(
+            or_(
+                S.row_index > after_index,
+                and_(S.row_index == after_index, S.id > after_id),
+            )
+        )
+
+    stmt = stmt.order_by(S.row_index, S.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def staging_page(
+    mappings,
+    fields: Optional[Sequence[str]],
+    limit: Optional[int],
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    تحويل صفوف استعلام build_staging_query (بـ limit + 1) لصفحة + cursor
+    
+    Args:
+        mappings: الصفوف (RowMapping)
+        fields: الأعمدة المطلوبة (None = كل الأعمدة)
+        limit: عدد الصفوف فى الصفحة (None = الكل)
+        
+    Returns:
+        Tuple[List[Dict], str | None]: (الصفوف, cursor الصفحة التالية)
+    """
+    rows = [
+        {
+            key: value.value if isinstance(value, enum.Enum) else value
+            for key, value in row.items()
+        }
+        for row in mappings
+    ]
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = f"{last['row_index']}:{last['id']}"
+
+    # نرجع الأعمدة المطلوبة فقط
+    if fields:
+        rows = [{f: row[f] for f in fields} for row in rows]
+
+    return rows, next_cursor
+
+
+def get_staging_page(
     db: Session,
-    row_id: int,
-    updates: StagingRowUpdate
-) -> StagingInvoiceDetail:
+    invoice_id: int,
+    fields: Optional[Sequence[str]] = None,
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    **filters: Any,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
     """
-    تعديل صف staging
+    قراءة صفحة من صفوف staging
     
     Args:
         db: Database session
-        row_id: معرّف الصف
-        updates: التحديثات المطلوبة
+        invoice_id: معرّف المستخلص
+        fields: الأعمدة المطلوبة (None = كل الأعمدة)
+        after: (row_index, id) لآخر صف فى الصفحة السابقة
+        limit: عدد الصفوف فى الصفحة (None = الكل)
+        **filters: فلاتر build_staging_query
         
     Returns:
-        StagingInvoiceDetail: الصف المُعدّل
+        Tuple[List[Dict], str | None]: (الصفوف, cursor الصفحة التالية)
         
     Raises:
-        ValueError: إذا لم يتم العثور على الصف
+        ValueError: إذا كان اسم عمود أو قيمة فلتر غير صالحة
     """
-    row = db.query(StagingInvoiceDetail).filter(StagingInvoiceDetail.id == row_id).first()
-    if not row:
-        raise ValueError(f"الصف غير موجود (ID: {row_id})")
-    
-    # تطبيق التحديثات
-    if updates.include_in_invoice is not None:
-        row.include_in_invoice = updates.include_in_invoice
-    if updates.raw_item_code is not None:
-        row.raw_item_code = updates.raw_item_code
-    if updates.raw_description is not None:
-        row.raw_description = updates.raw_description
-    if updates.raw_qty is not None:
-        row.raw_qty = updates.raw_qty
-    if updates.raw_percentage is not None:
-        row.raw_percentage = updates.raw_percentage
+    # صف زيادة عشان نعرف فى صفحة تالية ولا لأ
+    stmt = build_staging_query(
+        invoice_id,
+        fields=fields,
+        after=after,
+        limit=limit + 1 if limit is not None else None,
+        **filters,
+    )
+
+    return staging_page(db.execute(stmt).mappings(), fields, limit)
+
+
+# الأعمدة المسموح بتعديلها من شاشة المراجعة
+UPDATABLE_FIELDS = (
+    "include_in_invoice",
+    "raw_item_code",
+    "raw_description",
+    "raw_qty",
+    "raw_percentage",
+)
+
+
+def invoice_row_ids_query(invoice_id: int):
+    """معرّفات صفوف staging لمستخلص (للتحقق من التعديلات)"""
+    return select(StagingInvoiceDetail.id).where(
+        StagingInvoiceDetail.invoice_id == invoice_id
+    )
+
+
+def row_update_batches(
+    invoice_id: int,
+    invoice_row_ids: Set[int],
+    updates: List[StagingRowUpdate],
+) -> Tuple[List[Tuple[Any, List[dict]]], List[int]]:
+    """
+    تجميع التعديلات حسب الأعمدة المعدّلة لـ executemany
     
-    db.commit()
-    db.refresh(row)
-    return row
+    Args:
+        invoice_id: معرّف المستخلص
+        invoice_row_ids: معرّفات صفوف المستخلص
+        updates: قائمة التحديثات
+        
+    Returns:
+        Tuple: ([(جملة UPDATE, params)], معرّفات الصفوف المعدّلة)
+    """
+    groups: Dict[Tuple[str, ...], List[dict]] = defaultdict(list)
+    changed_ids = []
+
+    for upd in updates:
+        # تجاهل الصفوف غير الموجودة أو التابعة لمستخلص آخر
+        if upd.id not in invoice_row_ids:
+            continue
+        values = {
+            field: getattr(upd, field)
+            for field in UPDATABLE_FIELDS
+            if getattr(upd, field) is not None
+        }
+        if not values:
+            continue
+        fields = tuple(sorted(values))
+        groups[fields].append(
+            {"b_id": upd.id, **{f"b_{f}": v for f, v in values.items()}}
+        )
+        changed_ids.append(upd.id)
+
+    table = StagingInvoiceDetail.__table__
+    batches = []
+    for fields, params in groups.items():
+        stmt = (
+            update(table)
+            .where(
+                table.c.id == bindparam("b_id"),
+                table.c.invoice_id == invoice_id,
+            )
+            .values({f: bindparam(f"b_{f}") for f in fields})
+        )
+        batches.append((stmt, params))
+
+    return batches, changed_ids
+
+
+def _apply_row_updates(
+    db: Session,
+    invoice_id: int,
+    updates: List[StagingRowUpdate],
+) -> List[int]:
+    """
+    تنفيذ التعديلات كـ executemany مجمعة حسب الأعمدة (بدون commit)
+    """
+    # استعلام واحد لمعرّفات صفوف المستخلص بدل SELECT لكل صف
+    invoice_row_ids = set(db.execute(invoice_row_ids_query(invoice_id)).scalars())
+    batches, changed_ids = row_update_batches(invoice_id, invoice_row_ids, updates)
+    for stmt, params in batches:
+        db.execute(stmt, params)
+    return changed_ids
 
 
 def update_staging_rows_bulk(
     db: Session,
+    invoice_id: int,
     updates: List[StagingRowUpdate]
-) -> int:
+) -> List[int]:
     """
-    تعديل عدة صفوف staging دفعة واحدة
+    تعديل عدة صفوف staging دفعة واحدة (transaction واحدة)
+    
+    الصفوف بتتجمع حسب الأعمدة المعدّلة، وكل مجموعة بتتنفذ كـ executemany
+    لجملة UPDATE ... WHERE id = :id AND invoice_id = :invoice_id واحدة.
     
     Args:
         db: Database session
+        invoice_id: معرّف المستخلص (أى صف من مستخلص تانى بيتجاهل)
         updates: قائمة التحديثات
         
     Returns:
-        int: عدد الصفوف المُعدّلة
+        List[int]: معرّفات الصفوف المُعدّلة
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المستخلص
     """
-    updated_count = 0
-    
-    for update in updates:
-        try:
-            update_staging_row(db, update.id, update)
-            updated_count += 1
-        except ValueError:
-            # تجاهل الصفوف غير الموجودة
-            continue
+    if not updates:
+        return []
+
+    try:
+        changed_ids = _apply_row_updates(db, invoice_id, updates)
+        if changed_ids:
+            bump_staging_version(db, invoice_id)
+        elif get_staging_version(db, invoice_id) is None:
+            raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return changed_ids
+
+
+def apply_staging_patch(
+    db: Session,
+    invoice_id: int,
+    patch: StagingPatch,
+) -> Dict[str, Any]:
+    """
+    حفظ الخلايا المعدّلة فقط مع optimistic concurrency على staging_version
     
-    return updated_count
+    Args:
+        db: Database session
+        invoice_id: معرّف المستخلص
+        patch: {base_version, changes}
+        
+    Returns:
+        Dict: {updated_ids, version}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على المستخلص
+        StagingVersionConflict: إذا كان base_version قديم
+    """
+    if not bump_staging_version(db, invoice_id, patch.base_version):
+        current = get_staging_version(db, invoice_id)
+        db.rollback()
+        if current is None:
+            raise ValueError(f"المستخلص غير موجود (ID: {invoice_id})")
+        raise StagingVersionConflict(
+            f"تم تعديل البيانات من مستخدم آخر (version الحالى {current}، "
+            f"version التعديل {patch.base_version}). أعد جلب البيانات."
+        )
+
+    try:
+        changed_ids = _apply_row_updates(db, invoice_id, patch.changes)
+        if not changed_ids:
+            # مفيش تغيير فعلى: نرجع الـ version زى ما هو
+            db.rollback()
+            return {"updated_ids": [], "version": patch.base_version}
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {"updated_ids": changed_ids, "version": patch.base_version + 1}
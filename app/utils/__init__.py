@@ -1,7 +1,9 @@
 """Utility functions and helpers"""
 
 from app.utils.parsing import parse_float, normalize_trade, extract_phase_from_text, classify_row
-from app.utils.excel_reader import detect_columns, read_excel_to_dataframe
+from app.utils.excel_reader import detect_columns, detect_boq_columns, read_excel_to_dataframe
+from app.utils.boq_codes import split_boq_code, build_boq_path, subtree_range
+from app.utils.timestamps import utcnow
 
 __all__ = [
     "parse_float",
@@ -9,5 +11,10 @@ __all__ = [
     "extract_phase_from_text",
     "classify_row",
     "detect_columns",
+    "detect_boq_columns",
     "read_excel_to_dataframe",
+    "split_boq_code",
+    "build_boq_path",
+    "subtree_range",
+    "utcnow",
 ]
@@ -0,0 +1,70 @@
+"""BOQ code hierarchy utilities (materialized path)"""
+
+import re
+from typing import List, Optional, Tuple
+
+# الفواصل المقبولة بين مستويات الكود (9-2-1 / 9.2.1 / 9/2/1)
+_SEGMENT_SPLIT = re.compile(r"[\s\-./\\]+")
+
+# طول الجزء الرقمى بعد الـ padding عشان الترتيب النصى = الترتيب الرقمى
+SEGMENT_WIDTH = 4
+PATH_SEPARATOR = "."
+
+
+def split_boq_code(item_code: Optional[str]) -> List[str]:
+    """
+    يقسم كود البند لمستويات
+
+    Args:
+        item_code: كود البند (مثال: 9-2-1)
+
+    Returns:
+        List[str]: المستويات (مثال: ["9", "2", "1"])
+    """
+    if item_code is None:
+        return []
+    return [s for s in _SEGMENT_SPLIT.split(str(item_code).strip()) if s]
+
+
+def _path_segment(segment: str) -> str:
+    if segment.isdigit():
+        return segment.zfill(SEGMENT_WIDTH)
+    return segment.upper()
+
+
+def build_boq_path(item_code: Optional[str]) -> Tuple[str, Optional[str], int]:
+    """
+    يبنى الـ materialized path لكود البند
+
+    الأجزاء الرقمية بتتعمل padding (9 -> 0009) عشان ترتيب الـ index
+    يطابق ترتيب البنود، وكل فصل يبقى range متصل فى الـ index.
+
+    Args:
+        item_code: كود البند
+
+    Returns:
+        Tuple[str, Optional[str], int]: (path, parent_code, depth)
+    """
+    segments = split_boq_code(item_code)
+    if not segments:
+        return "", None, 0
+
+    path = PATH_SEPARATOR.join(_path_segment(s) for s in segments)
+    parent_code = "-".join(segments[:-1]) or None
+    return path, parent_code, len(segments)
+
+
+def subtree_range(path: str) -> Tuple[str, str]:
+    """
+    حدود الـ range اللى فيها كل البنود الفرعية تحت path
+
+    كل الأبناء بيبدأوا بـ "path." و "/" هو الحرف التالى لـ "." فى ASCII،
+    فالشرط path >= low AND path < high بيستخدم الـ index مباشرة.
+
+    Args:
+        path: الـ path بتاع الفصل
+
+    Returns:
+        Tuple[str, str]: (low, high)
+    """
+    return path + PATH_SEPARATOR, path + chr(ord(PATH_SEPARATOR) + 1)
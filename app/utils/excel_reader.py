@@ -4,70 +4,92 @@ import pandas as pd
 from typing import Dict, Optional, Any
 
 
-def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+# أنماط البحث لكل عمود
+INVOICE_COLUMN_PATTERNS = {
+    "item_code": [
+        "item_code",
+        "code",
+        "item",
+        "boq",
+        "boq_code",
+        "رقم البند",
+        "كود",
+        "رقم بند",
+        "بند",
+    ],
+    "description": [
+        "description",
+        "desc",
+        "تفصيل",
+        "البند",
+        "بيان الأعمال",
+        "وصف",
+        "بنود الأعمال",
+    ],
+    "qty": [
+        "total_qty",
+        "qty",
+        "quantity",
+        "الكمية",
+        "الكمية الحالية",
+        "الجارى",
+        "الجاري",
+        "كمية الأعمال الجارية",
+    ],
+    "percentage": [
+        "percentage",
+        "pct",
+        "نسبة",
+        "نسبة الصرف",
+        "نسبة التنفيذ",
+    ],
+}
+
+
+BOQ_COLUMN_PATTERNS = {
+    "item_code": INVOICE_COLUMN_PATTERNS["item_code"],
+    "description": INVOICE_COLUMN_PATTERNS["description"],
+    "unit": [
+        "unit",
+        "uom",
+        "الوحدة",
+        "وحدة",
+    ],
+    "unit_price": [
+        "unit_price",
+        "price",
+        "rate",
+        "الفئة",
+        "سعر الوحدة",
+        "السعر",
+    ],
+    "is_partial": [
+        "is_partial",
+        "partial",
+        "مجزأ",
+    ],
+}
+
+
+def _match_columns(
+    df: pd.DataFrame,
+    patterns_map: Dict[str, list],
+) -> Dict[str, Optional[str]]:
     """
-    تحديد mapping الأعمدة من DataFrame
+    مطابقة أسماء أعمدة DataFrame مع أنماط البحث
     
     Args:
         df: DataFrame المراد تحليله
+        patterns_map: {field_name: [patterns]}
         
     Returns:
-        Dict: mapping الأعمدة {field_name: column_name}
-        
-    Raises:
-        ValueError: إذا لم يتم العثور على الأعمدة المطلوبة
+        Dict: mapping الأعمدة {field_name: column_name | None}
     """
-    col_map = {
-        "item_code": None,
-        "description": None,
-        "qty": None,
-        "percentage": None
-    }
-    
+    col_map = {key: None for key in patterns_map}
+
     # تحويل أسماء الأعمدة إلى lowercase للمقارنة
     lower_cols = {str(c).strip().lower(): c for c in df.columns}
 
-    # أنماط البحث لكل عمود
-    patterns_map = {
-        "item_code": [
-            "item_code",
-            "code",
-            "item",
-            "boq",
-            "boq_code",
-            "رقم البند",
-            "كود",
-            "رقم بند",
-            "بند",
-        ],
-        "description": [
-            "description",
-            "desc",
-            "تفصيل",
-            "البند",
-            "بيان الأعمال",
-            "وصف",
-            "بنود الأعمال",
-        ],
-        "qty": [
-            "total_qty",
-            "qty",
-            "quantity",
-            "الكمية",
-            "الكمية الحالية",
-            "الجارى",
-            "الجاري",
-            "كمية الأعمال الجارية",
-        ],
-        "percentage": [
-            "percentage",
-            "pct",
-            "نسبة",
-            "نسبة الصرف",
-            "نسبة التنفيذ",
-        ],
-    }
-
     # البحث عن كل عمود
     for key, patterns in patterns_map.items():
         for p in patterns:
@@ -76,6 +98,24 @@ def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
                 col_map[key] = lower_cols[lp]
                 break
 
+    return col_map
+
+
+def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """
+    تحديد mapping الأعمدة من DataFrame
+    
+    Args:
+        df: DataFrame المراد تحليله
+        
+    Returns:
+        Dict: mapping الأعمدة {field_name: column_name}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على الأعمدة المطلوبة
+    """
+    col_map = _match_columns(df, INVOICE_COLUMN_PATTERNS)
+
     # التحقق من وجود الأعمدة الأساسية
     if not col_map["item_code"] or not col_map["qty"]:
         raise ValueError(
@@ -86,12 +126,36 @@ def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
     return col_map
 
 
+def detect_boq_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """
+    تحديد mapping أعمدة ملف المقايسة (BOQ) من DataFrame
+    
+    Args:
+        df: DataFrame المراد تحليله
+        
+    Returns:
+        Dict: mapping الأعمدة {field_name: column_name}
+        
+    Raises:
+        ValueError: إذا لم يتم العثور على الأعمدة المطلوبة
+    """
+    col_map = _match_columns(df, BOQ_COLUMN_PATTERNS)
+
+    if not col_map["item_code"] or not col_map["unit_price"]:
+        raise ValueError(
+            f"الأعمدة المطلوبة (كود البند/الفئة) غير موجودة. "
+            f"الأعمدة المتاحة: {list(df.columns)}"
+        )
+
+    return col_map
+
+
 def read_excel_to_dataframe(
     file_path: str,
     sheet_name: str | int = 0
 ) -> pd.DataFrame:
     """
-    قراءة ملف Excel إلى DataFrame مع معالجة الأخطاء
+    قراءة ملف Excel (أو CSV) إلى DataFrame مع معالجة الأخطاء
     
     Args:
         file_path: مسار ملف Excel
@@ -104,6 +168,8 @@ def read_excel_to_dataframe(
         ValueError: في حالة فشل القراءة
     """
     try:
+        if str(file_path).lower().endswith(".csv"):
+            return pd.read_csv(file_path)
         df = pd.read_excel(file_path, sheet_name=sheet_name)
         return df
     except FileNotFoundError:
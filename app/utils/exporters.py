@@ -0,0 +1,168 @@
+"""Excel (XLSX) / CSV export of report rows without holding them in memory"""
+
+import csv
+import enum
+import importlib.util
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+EXPORT_FORMATS = ("xlsx", "csv")
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+
+# حجم الـ chunk اللى بيتبعت للعميل فى CSV
+_CSV_CHUNK_BYTES = 64 * 1024
+
+Row = Union[Dict[str, Any], Sequence[Any]]
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _row_values(row: Row, columns: Sequence[str]) -> List[Any]:
+    if isinstance(row, dict):
+        return [_plain(row.get(col)) for col in columns]
+    return [_plain(v) for v in row]
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Row]) -> Iterator[bytes]:
+    """
+    تحويل الصفوف لـ CSV فى chunks (مع BOM عشان Excel يقرا العربى صح)
+    """
+    buffer = io.StringIO()
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(_row_values(row, columns))
+        if buffer.tell() >= _CSV_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(
+    path: str,
+    columns: Sequence[str],
+    rows: Iterable[Row],
+    sheet_name: str = "Sheet1",
+) -> int:
+    """
+    كتابة الصفوف لملف XLSX بـ xlsxwriter فى وضع constant_memory
+    
+    فى الوضع ده كل صف بيتكتب على الديسك أول ما يخلص، فالذاكرة ثابتة
+    مهما كان عدد الصفوف (لازم الكتابة تكون صف بصف بالترتيب).
+    
+    Args:
+        path: مسار الملف
+        columns: أسماء الأعمدة (أول صف)
+        rows: الصفوف (dicts أو tuples بنفس ترتيب الأعمدة)
+        sheet_name: اسم الشيت
+        
+    Returns:
+        int: عدد صفوف البيانات
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        sheet = workbook.add_worksheet(sheet_name[:31])
+        header_format = workbook.add_format({"bold": True})
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        sheet.write_row(0, 0, list(columns), header_format)
+
+        count = 0
+        for row_idx, row in enumerate(rows, start=1):
+            for col_idx, value in enumerate(_row_values(row, columns)):
+                if value is None:
+                    continue
+                if isinstance(value, (date, datetime)):
+                    if not isinstance(value, datetime):
+                        value = datetime(value.year, value.month, value.day)
+                    sheet.write_datetime(row_idx, col_idx, value, date_format)
+                else:
+                    sheet.write(row_idx, col_idx, value)
+            count = row_idx
+    finally:
+        workbook.close()
+    return count
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def export_response(
+    fmt: str,
+    columns: Sequence[str],
+    rows: Iterable[Row],
+    filename: str,
+    sheet_name: Optional[str] = None,
+):
+    """
+    بناء response للتصدير بالصيغة المطلوبة
+    
+    CSV بيتبعت streaming أثناء القراءة من الـ cursor. XLSX لازم يتقفل
+    قبل ما يتبعت (zip)، فبيتكتب لملف مؤقت بذاكرة ثابتة وبيتمسح بعد الإرسال.
+    
+    Args:
+        fmt: "xlsx" أو "csv"
+        columns: أسماء الأعمدة
+        rows: الصفوف (ممكن يكون generator من iter_query_rows)
+        filename: اسم الملف بدون امتداد
+        sheet_name: اسم الشيت فى XLSX
+        
+    Returns:
+        StreamingResponse | FileResponse
+        
+    Raises:
+        HTTPException: 400 لصيغة غير مدعومة، 406 لو xlsxwriter مش متثبت
+    """
+    fmt = (fmt or "").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"صيغة التصدير غير مدعومة: {fmt} (المتاح: {', '.join(EXPORT_FORMATS)})",
+        )
+
+    if fmt == "csv":
+        return StreamingResponse(
+            csv_chunks(columns, rows),
+            media_type=CSV_MEDIA_TYPE,
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+
+    if importlib.util.find_spec("xlsxwriter") is None:
+        raise HTTPException(
+            status_code=406,
+            detail="تصدير XLSX غير متاح على السيرفر (xlsxwriter غير مثبت)",
+        )
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_xlsx(path, columns, rows, sheet_name=sheet_name or filename)
+    except Exception:
+        _remove_file(path)
+        raise
+    return FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=f"{filename}.xlsx",
+        background=BackgroundTask(_remove_file, path),
+    )
@@ -0,0 +1,49 @@
+"""ETag / If-None-Match helpers for conditional GET"""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    بناء weak ETag من مجموعة قيم (version + بارامترات الطلب)
+
+    Returns:
+        str: ETag بصيغة W/"..."
+    """
+    raw = "|".join(str(p) for p in parts)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def request_etag(request: Request, *version_parts: Any) -> str:
+    """
+    ETag لطلب GET: المسار + الـ query + الـ Accept + الـ version
+
+    نفس البيانات بفلاتر أو صيغة مختلفة لازم يبقى ليها ETag مختلف.
+    """
+    query = "&".join(sorted(str(request.url.query).split("&")))
+    accept = request.headers.get("accept", "")
+    return make_etag(request.url.path, query, accept, *version_parts)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    مقارنة If-None-Match مع الـ ETag الحالى (weak comparison)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == current:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Response 304 بدون body"""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -35,7 +35,7 @@ def parse_float(value, default: float = 0.0) -> float:
         return default
 
 
-def normalize_trade(trade: str | None) -> str:
+def normalize_trade(trade: str | TradeType | None) -> str:
     """
     يطبع قيمة التخصص لتكون واحدة من:
     CIVIL / ELEC / MECH / ARCH / GENERAL
@@ -52,6 +52,8 @@ def normalize_trade(trade: str | None) -> str:
     """
     if trade is None:
         return TradeType.GENERAL.value
+    if isinstance(trade, TradeType):
+        return trade.value
 
     t = str(trade).strip().upper()
 
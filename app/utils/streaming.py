@@ -0,0 +1,226 @@
+"""Streaming (NDJSON / Arrow IPC) responses for large result sets"""
+
+import enum
+import importlib.util
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_MEDIA_TYPES = {
+    NDJSON_MEDIA_TYPE: "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonlines": "ndjson",
+    ARROW_MEDIA_TYPE: "arrow",
+}
+
+# حجم الـ chunk اللى بيتبعت للعميل فى NDJSON
+_NDJSON_CHUNK_BYTES = 64 * 1024
+
+
+def arrow_available() -> bool:
+    """هل pyarrow متثبت؟"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def negotiate_stream_format(accept: Optional[str]) -> Optional[str]:
+    """
+    تحديد صيغة الـ streaming من الـ Accept header
+
+    Args:
+        accept: قيمة الـ Accept header
+
+    Returns:
+        str | None: "ndjson" أو "arrow"، أو None للـ JSON العادى
+
+    Raises:
+        HTTPException: 406 لو Arrow مطلوب و pyarrow مش متثبت
+    """
+    if not accept:
+        return None
+    for part in accept.split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        fmt = _MEDIA_TYPES.get(media_type)
+        if fmt == "arrow" and not arrow_available():
+            raise HTTPException(
+                status_code=406,
+                detail="Arrow IPC غير متاح على السيرفر (pyarrow غير مثبت)",
+            )
+        if fmt:
+            return fmt
+    return None
+
+
+def _plain_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def plain_row(row) -> Dict[str, Any]:
+    """صف (RowMapping) كـ dict والـ Enums بقيمها"""
+    return {key: _plain_value(value) for key, value in row.items()}
+
+
+def query_rows(db: Session, stmt) -> List[Dict[str, Any]]:
+    """
+    تنفيذ استعلام وإرجاع كل الصفوف كـ dicts (للـ JSON العادى)
+    """
+    return [plain_row(row) for row in db.execute(stmt).mappings()]
+
+
+def iter_query_rows(
+    stmt,
+    batch_size: Optional[int] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[Dict[str, Any]]:
+    """
+    تنفيذ استعلام وإرجاع الصفوف واحد واحد (yield_per)
+
+    الـ generator بيفتح Session خاصة بيه وبيقفلها بعد آخر صف، لأن
+    الـ response بيتبعت بعد ما الـ endpoint يرجع.
+
+    Args:
+        stmt: جملة select
+        batch_size: عدد الصفوف فى كل fetch من الـ cursor
+        session_factory: مصدر الـ Session
+
+    Yields:
+        Dict: الصف كـ dict (الـ Enums بتتحول لقيمها)
+    """
+    batch_size = batch_size or settings.STREAM_BATCH_SIZE
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result.mappings():
+            yield plain_row(row)
+    finally:
+        db.close()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_chunks(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    تحويل الصفوف لـ NDJSON (سطر JSON لكل صف) فى chunks متوسطة الحجم
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(json.dumps(row, ensure_ascii=False, default=_json_default))
+        buffer.write("\n")
+        if buffer.tell() >= _NDJSON_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer = io.StringIO()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def arrow_schema(stmt):
+    """
+    بناء Arrow schema من أنواع أعمدة الاستعلام
+
+    الاستنتاج من أول batch بيفشل لو عمود كله None فى البداية (زى
+    error_message)، فالأنواع بتتاخد من تعريف الأعمدة نفسها.
+    """
+    import pyarrow as pa
+    from sqlalchemy import types
+
+    fields = []
+    for column in stmt.selected_columns:
+        col_type = column.type
+        if isinstance(col_type, types.Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(col_type, types.Integer):
+            arrow_type = pa.int64()
+        elif isinstance(col_type, (types.Float, types.Numeric)):
+            arrow_type = pa.float64()
+        elif isinstance(col_type, types.DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(col_type, types.Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.key, arrow_type))
+    return pa.schema(fields)
+
+
+def arrow_chunks(
+    rows: Iterable[Dict[str, Any]],
+    schema,
+    batch_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    تحويل الصفوف لـ Arrow IPC stream (RecordBatch لكل batch_size صف)
+
+    كل batch بيتكتب ويتبعت فوراً، فالذاكرة ثابتة مهما كان عدد الصفوف.
+    """
+    import pyarrow as pa
+
+    batch_size = batch_size or settings.STREAM_BATCH_SIZE
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def _drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return data
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            batch = []
+            yield _drain()
+
+    if batch:
+        writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+    writer.close()
+    yield _drain()
+
+
+def stream_query(
+    stmt,
+    fmt: str,
+    filename: Optional[str] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> StreamingResponse:
+    """
+    بناء StreamingResponse لاستعلام بالصيغة المطلوبة
+
+    Args:
+        stmt: جملة select
+        fmt: "ndjson" أو "arrow"
+        filename: اسم الملف (اختيارى) للـ Content-Disposition
+        session_factory: مصدر الـ Session
+
+    Returns:
+        StreamingResponse
+    """
+    rows = iter_query_rows(stmt, session_factory=session_factory)
+    if fmt == "arrow":
+        body, media_type = arrow_chunks(rows, arrow_schema(stmt)), ARROW_MEDIA_TYPE
+    else:
+        body, media_type = ndjson_chunks(rows), NDJSON_MEDIA_TYPE
+
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(body, media_type=media_type, headers=headers)
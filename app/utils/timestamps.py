@@ -0,0 +1,8 @@
+"""Timestamps stored in the database (naive UTC)"""
+
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """الوقت الحالى UTC (naive، زى أعمدة DateTime فى القاعدة)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
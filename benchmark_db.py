@@ -0,0 +1,338 @@
+"""
+Benchmark لـ SQLite profiles (app.core.config.SQLITE_PROFILES)
+
+لكل profile: قاعدة مؤقتة جديدة، رفع مستخلصات (import)، اعتمادها
+(approval)، قراءة التقارير، وبعدين رفع + اعتماد مع threads بتقرا
+تقارير فى نفس الوقت (زى المستخدمين الحقيقيين). آخر مرحلة: writers
+بيعدلوا صفوف staging بالتوازى مرة بـ Session لكل thread ومرة عن طريق
+WriteCoordinator (كاتب واحد + group commit)، بعد التأكد إن الـ batch
+بتتعمل لها commit / rollback مرة واحدة.
+
+Usage:
+    python benchmark_db.py
+    python benchmark_db.py --profiles legacy balanced --rows 2000 --invoices 4 --readers 4
+    python benchmark_db.py --writers 8 --write-units 200
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import create_db_engine, create_writer_engine
+from app.db.write_coordinator import GroupCommitSession, WriteCoordinator
+from app.models import StagingInvoiceDetail
+from app.schemas import ProjectCreate
+from app.schemas.staging import StagingRowUpdate
+from app.services import (
+    boq_service,
+    invoice_approval_service,
+    invoice_import_service,
+    projects_service,
+    reports_service,
+    staging_service,
+)
+from app.services.boq_cache import boq_cache
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _item_codes(rows):
+    return [f"{1 + i // 100}-{1 + i % 100}" for i in range(rows)]
+
+
+def _prepare_files(workdir, rows, invoices):
+    codes = _item_codes(rows)
+    boq_path = os.path.join(workdir, "boq.csv")
+    _write_csv(
+        boq_path,
+        ["item_code", "description", "unit", "unit_price"],
+        [[code, f"item {code}", "m", 10.0 + i % 50] for i, code in enumerate(codes)],
+    )
+    invoice_paths = []
+    for n in range(invoices):
+        path = os.path.join(workdir, f"invoice_{n}.csv")
+        _write_csv(
+            path,
+            ["item_code", "description", "qty", "percentage"],
+            [[code, f"item {code}", 1 + (i + n) % 20, 100] for i, code in enumerate(codes)],
+        )
+        invoice_paths.append(path)
+    return boq_path, invoice_paths
+
+
+def _import_and_approve(Session, project_id, number, path, period_start):
+    """رفع مستخلص واعتماده؛ بيرجع (زمن الرفع، زمن الاعتماد)"""
+    db = Session()
+    try:
+        invoice = invoice_import_service.get_or_create_invoice(
+            db, project_id, number, period_start, period_start + timedelta(days=29)
+        )
+        t0 = time.perf_counter()
+        invoice_import_service.import_invoice_excel(db, invoice.id, path, trade_type="CIVIL")
+        t1 = time.perf_counter()
+        invoice_approval_service.build_invoice_details_from_staging(db, invoice.id)
+        t2 = time.perf_counter()
+        return t1 - t0, t2 - t1
+    finally:
+        db.close()
+
+
+def _read_reports(Session, project_id):
+    db = Session()
+    try:
+        reports_service.schedule_matrix(db, project_id, 2025, cumulative=True)
+        reports_service.range_report(db, project_id, date(2025, 1, 10), date(2025, 3, 20))
+        db.execute(
+            reports_service.ledger_query(
+                project_id, date_from=date(2025, 2, 1), date_to=date(2025, 2, 7)
+            )
+        ).all()
+    finally:
+        db.close()
+
+
+def _concurrent_writes(engine, invoice_id, writers, units, coordinator=None):
+    """
+    writers threads كل واحد بيعمل units تعديل staging (commit لكل تعديل)
+    
+    Returns:
+        Tuple[float, int]: (تعديلات/ثانية، عدد أخطاء database is locked)
+    """
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    row_ids = [
+        row_id
+        for (row_id,) in db.query(StagingInvoiceDetail.id).filter(
+            StagingInvoiceDetail.invoice_id == invoice_id
+        )
+    ]
+    db.close()
+    lock_errors = [0]
+
+    def unit(db, n):
+        update = StagingRowUpdate(id=row_ids[n % len(row_ids)], raw_qty=str(n % 97))
+        return staging_service.update_staging_rows_bulk(db, invoice_id, [update])
+
+    def writer(w):
+        for i in range(units):
+            n = w * units + i
+            try:
+                if coordinator is not None:
+                    coordinator.run(unit, n)
+                else:
+                    db = Session()
+                    try:
+                        unit(db, n)
+                    finally:
+                        db.close()
+            except OperationalError:
+                lock_errors[0] += 1
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return writers * units / elapsed, lock_errors[0]
+
+
+def _check_batch_atomic(writer_engine, reader_engine, row_id):
+    """
+    الـ unit بعد الـ RELEASE بتاع الـ SAVEPOINT بتاعها لازم متبانش لـ connection
+    تانية قبل commit الـ batch، ولازم تختفى لو الـ batch اتعملها rollback
+
+    Returns:
+        bool: True لو الـ batch atomic
+    """
+    marker = "atomic-check"
+
+    def visible():
+        with reader_engine.connect() as conn:
+            return conn.scalar(
+                select(StagingInvoiceDetail.raw_qty).where(StagingInvoiceDetail.id == row_id)
+            ) == marker
+
+    db = sessionmaker(bind=writer_engine, class_=GroupCommitSession, autoflush=False)()
+    try:
+        db._unit_savepoint = db.begin_nested()
+        db.execute(
+            update(StagingInvoiceDetail)
+            .where(StagingInvoiceDetail.id == row_id)
+            .values(raw_qty=marker)
+        )
+        db._unit_savepoint.commit()
+        db._unit_savepoint = None
+        before_commit = visible()
+        db.rollback()
+    finally:
+        db.close()
+    return not before_commit and not visible()
+
+
+def run_profile(profile, rows, invoices, report_rounds, readers, writers, write_units):
+    """
+    تشغيل الـ benchmark على profile واحد
+    
+    Returns:
+        dict: نتائج الـ profile
+    """
+    boq_cache.clear()
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}", profile)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        Base.metadata.create_all(engine)
+        boq_path, invoice_paths = _prepare_files(workdir, rows, invoices * 2)
+
+        db = Session()
+        project_id = projects_service.create_project(db, ProjectCreate(name=f"bench-{profile}")).id
+        boq_service.import_boq_file(db, project_id, boq_path)
+        db.close()
+
+        # 1) رفع واعتماد متتالى
+        import_time = approve_time = 0.0
+        for n in range(invoices):
+            t_import, t_approve = _import_and_approve(
+                Session, project_id, n + 1, invoice_paths[n], date(2025, 1, 1) + timedelta(days=30 * n)
+            )
+            import_time += t_import
+            approve_time += t_approve
+
+        # 2) قراءة التقارير
+        t0 = time.perf_counter()
+        for _ in range(report_rounds):
+            _read_reports(Session, project_id)
+        report_time = time.perf_counter() - t0
+
+        # 3) رفع + اعتماد مع قراءات متزامنة
+        stop = threading.Event()
+        reads = [0]
+        lock_errors = [0]
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    _read_reports(Session, project_id)
+                    reads[0] += 1
+                except OperationalError:
+                    lock_errors[0] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for n in range(invoices, invoices * 2):
+            _import_and_approve(
+                Session, project_id, n + 1, invoice_paths[n], date(2025, 1, 1) + timedelta(days=30 * n)
+            )
+        write_time = time.perf_counter() - t0
+        stop.set()
+        for t in threads:
+            t.join()
+        mixed_time = time.perf_counter() - t0
+
+        # 4) كتابات صغيرة متزامنة: Session لكل thread مقابل WriteCoordinator
+        db = Session()
+        staged = invoice_import_service.get_or_create_invoice(
+            db, project_id, invoices * 2 + 1, date(2026, 1, 1), date(2026, 1, 30)
+        )
+        invoice_import_service.import_invoice_excel(
+            db, staged.id, invoice_paths[0], trade_type="CIVIL"
+        )
+        staged_id = staged.id
+        db.close()
+        direct_writes_s, direct_errors = _concurrent_writes(
+            engine, staged_id, writers, write_units
+        )
+        writer_engine = create_writer_engine(engine.url.render_as_string(hide_password=False), profile)
+        db = Session()
+        first_row = db.query(StagingInvoiceDetail.id).filter(
+            StagingInvoiceDetail.invoice_id == staged_id
+        ).first()[0]
+        db.close()
+        batch_atomic = _check_batch_atomic(writer_engine, engine, first_row)
+        coordinator = WriteCoordinator(
+            sessionmaker(
+                bind=writer_engine,
+                class_=GroupCommitSession,
+                autoflush=False,
+                expire_on_commit=False,
+            ),
+            max_batch=settings.WRITE_BATCH_MAX_UNITS,
+            max_wait_ms=settings.WRITE_BATCH_WAIT_MS,
+        )
+        coordinated_writes_s, coordinated_errors = _concurrent_writes(
+            engine, staged_id, writers, write_units, coordinator
+        )
+        coordinator.stop()
+        writer_engine.dispose()
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "import_rows_s": rows * invoices / import_time,
+        "approve_rows_s": rows * invoices / approve_time,
+        "reports_s": report_rounds / report_time,
+        "mixed_write_s": write_time,
+        "mixed_reads_s": reads[0] / mixed_time,
+        "lock_errors": lock_errors[0],
+        "direct_writes_s": direct_writes_s,
+        "direct_errors": direct_errors,
+        "coordinated_writes_s": coordinated_writes_s,
+        "coordinated_errors": coordinated_errors,
+        "batch_atomic": batch_atomic,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite profile benchmark")
+    parser.add_argument("--profiles", nargs="+", default=list(settings.SQLITE_PROFILES))
+    parser.add_argument("--rows", type=int, default=1000, help="بنود لكل مستخلص")
+    parser.add_argument("--invoices", type=int, default=3, help="مستخلصات لكل مرحلة")
+    parser.add_argument("--report-rounds", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=4, help="threads القراءة المتزامنة")
+    parser.add_argument("--writers", type=int, default=8, help="threads الكتابة المتزامنة")
+    parser.add_argument("--write-units", type=int, default=100, help="تعديلات لكل writer")
+    args = parser.parse_args()
+
+    header = (
+        f"{'profile':<10} {'import rows/s':>14} {'approve rows/s':>15} "
+        f"{'reports/s':>10} {'mixed write s':>14} {'mixed reads/s':>14} {'lock errors':>12} "
+        f"{'direct w/s':>11} {'direct err':>11} {'queued w/s':>11} {'queued err':>11} {'atomic':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for profile in args.profiles:
+        r = run_profile(
+            profile, args.rows, args.invoices, args.report_rounds, args.readers,
+            args.writers, args.write_units,
+        )
+        print(
+            f"{r['profile']:<10} {r['import_rows_s']:>14.0f} {r['approve_rows_s']:>15.0f} "
+            f"{r['reports_s']:>10.1f} {r['mixed_write_s']:>14.2f} {r['mixed_reads_s']:>14.1f} "
+            f"{r['lock_errors']:>12} "
+            f"{r['direct_writes_s']:>11.0f} {r['direct_errors']:>11} "
+            f"{r['coordinated_writes_s']:>11.0f} {r['coordinated_errors']:>11} "
+            f"{'yes' if r['batch_atomic'] else 'NO':>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,221 @@
-from sqlalchemy import create_engine, inspect, text
-from database import DATABASE_URL
-
-def check_database():
-    print(f"Checking database at: {DATABASE_URL}")
-    engine = create_engine(DATABASE_URL)
-    inspector = inspect(engine)
-    
-    tables = inspector.get_table_names()
-    print(f"\nFound {len(tables)} tables:")
-    
-    for table in tables:
-        print(f"\n📋 Table: {table}")
-        columns = inspector.get_columns(table)
-        # Print columns
-        col_names = [col['name'] for col in columns]
-        print(f"   Columns: {', '.join(col_names)}")
-        
-        # Print first 5 rows
-        with engine.connect() as conn:
-            result = conn.execute(text(f"SELECT * FROM {table} LIMIT 5"))
-            rows = result.fetchall()
-            if rows:
-                print("   DATA (First 5 rows):")
-                for row in rows:
-                    print(f"   -> {row}")
-            else:
-                print("   -> [Empty Table]")
+"""
+Diagnostics لقاعدة SQLite (مبنى على app.db.session)
+
+الأقسام:
+    tables   عدد الصفوف وحجم كل جدول وindexes بتاعته (dbstat)
+    indexes  إحصائيات ANALYZE (sqlite_stat1) + الـ indexes اللى استعلامات الـ services بتستخدمها
+    plans    الـ full table scans فى استعلامات الـ services (app.db.query_plans)
+    ledger   توزيع صفوف daily_ledger على المستخلصات
+    trades   قيم trade المتخزنة فعلاً فى staging و invoice_details
+    slow     أبطأ الاستعلامات من سجل app/db/instrumentation.py (SLOW_QUERY_LOG)
+
+Usage:
+    python check_db.py
+    python check_db.py --sections tables ledger
+    python check_db.py --url sqlite:///shards/shard_0000.db --top 20
+    python check_db.py --sections plans --verbose
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+import app.models  # noqa: F401
+from app.core.config import settings
+from app.db.instrumentation import read_slow_log
+from app.db.query_plans import check_query_plans
+from app.db.session import create_db_engine
+
+SECTIONS = ("tables", "indexes", "plans", "ledger", "trades", "slow")
+
+_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def _size(num_bytes: Optional[int]) -> str:
+    if num_bytes is None:
+        return "-"
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _percentile(values: List[int], fraction: float) -> int:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _pragma(conn, name: str):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def _title(text: str) -> None:
+    print(f"\n=== {text} ===")
+
+
+# ---------- sections ----------
+
+def report_tables(engine) -> None:
+    _title("Tables")
+    with engine.connect() as conn:
+        page_size = _pragma(conn, "page_size")
+        page_count = _pragma(conn, "page_count")
+        print(
+            f"{_size(page_size * page_count)} ({page_count} pages), "
+            f"freelist {_pragma(conn, 'freelist_count')} pages, "
+            f"auto_vacuum={_pragma(conn, 'auto_vacuum')}, journal_mode={_pragma(conn, 'journal_mode')}"
+        )
+
+        owners = dict(conn.exec_driver_sql(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"
+        ).all())
+        # {table: [data bytes, index bytes]}
+        sizes: Dict[str, List[int]] = {}
+        try:
+            for name, num_bytes in conn.exec_driver_sql(
+                "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+            ):
+                table = owners.get(name, name)
+                sizes.setdefault(table, [0, 0])[0 if table == name else 1] += num_bytes
+        except OperationalError:
+            # SQLite متعملهوش compile بـ SQLITE_ENABLE_DBSTAT_VTAB
+            print("dbstat غير متاح: الأحجام مش هتظهر")
+
+        print(f"{'table':<28} {'rows':>10} {'data':>10} {'indexes':>10}")
+        for table in sorted(inspect(conn).get_table_names()):
+            rows = conn.exec_driver_sql(f'SELECT COUNT(*) FROM "{table}"').scalar()
+            data, indexes = sizes.get(table, (None, None))
+            print(f"{table:<28} {rows:>10} {_size(data):>10} {_size(indexes):>10}")
+
+
+def report_indexes(engine, plans) -> None:
+    _title("Indexes")
+    used: Dict[str, int] = {}
+    for query in plans:
+        for detail in query.plan:
+            match = _INDEX_RE.search(detail)
+            if match:
+                used[match.group(1)] = used.get(match.group(1), 0) + 1
+
+    with engine.connect() as conn:
+        indexes = conn.exec_driver_sql(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' ORDER BY tbl_name, name"
+        ).all()
+        try:
+            stats = dict(
+                ((row.tbl, row.idx), row.stat)
+                for row in conn.exec_driver_sql("SELECT tbl, idx, stat FROM sqlite_stat1")
+            )
+        except OperationalError:
+            stats = {}
+            print("sqlite_stat1 فاضى: شغّل python maintain_db.py --tasks analyze")
+
+    print(f"{'index':<44} {'table':<26} {'plans':>6}  sqlite_stat1")
+    for name, table in indexes:
+        print(f"{name:<44} {table:<26} {used.get(name, 0):>6}  {stats.get((table, name), '')}")
+    unused = [name for name, _ in indexes if name not in used and not name.startswith("sqlite_autoindex")]
+    print(f"{len(unused)} indexes مش مستخدمة فى استعلامات الـ services (app.db.query_plans)")
+
+
+def report_plans(plans, verbose: bool) -> None:
+    _title("Query plans (services)")
+    failures = [query for query in plans if query.full_scans]
+    for query in plans:
+        if not (verbose or query.full_scans):
+            continue
+        status = "FULL SCAN" if query.full_scans else "ok"
+        print(f"[{status}] {query.label}")
+        print("    " + " ".join(query.statement.split())[:300])
+        for detail in query.plan:
+            print(f"      {detail}")
+    print(f"{len(plans)} queries checked, {len(failures)} with full table scans")
+
+
+def report_ledger(engine, top: int) -> None:
+    _title("Ledger rows per invoice")
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT invoice_id, COUNT(*) FROM daily_ledger GROUP BY invoice_id"
+        ).all()
+    if not rows:
+        print("daily_ledger فاضى")
+        return
+    counts = sorted(count for _, count in rows)
+    print(
+        f"{len(counts)} invoices, {sum(counts)} rows: min {counts[0]}, "
+        f"p50 {_percentile(counts, 0.5)}, p90 {_percentile(counts, 0.9)}, "
+        f"p99 {_percentile(counts, 0.99)}, max {counts[-1]}, avg {sum(counts) / len(counts):.1f}"
+    )
+    for invoice_id, count in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"  invoice {invoice_id}: {count}")
+
+
+def report_trades(engine) -> None:
+    _title("Stored trade values")
+    with engine.connect() as conn:
+        for table in ("staging_invoice_details", "invoice_details"):
+            for trade, count in conn.exec_driver_sql(
+                f"SELECT trade, COUNT(*) FROM {table} GROUP BY trade ORDER BY trade"
+            ):
+                print(f"{table:<26} {trade!r:<16} {count}")
+
+
+def report_slow(top: int) -> None:
+    _title(f"Slow queries ({settings.SLOW_QUERY_LOG}, >= {settings.SLOW_QUERY_MS:g} ms)")
+    rows = read_slow_log(limit=top)
+    if not rows:
+        print("مفيش استعلامات بطيئة متسجلة (QUERY_INSTRUMENTATION=1 على السيرفر)")
+        return
+    for row in rows:
+        print(f"max {row['max_ms']:>9.1f} ms  avg {row['avg_ms']:>9.1f} ms  x{row['count']:<5} last {row['last_at']}")
+        print(f"    {row['statement'][:300]}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SQLite database diagnostics")
+    parser.add_argument("--url", default=settings.DATABASE_URL, help="DATABASE_URL")
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--top", type=int, default=10, help="عدد الصفوف فى القوائم")
+    parser.add_argument("--verbose", action="store_true", help="خطة كل استعلام فى plans")
+    args = parser.parse_args(argv)
+
+    if not args.url.startswith("sqlite"):
+        print("check_db.py خاص بـ SQLite")
+        return 1
+
+    database = make_url(args.url).database
+    if database and database != ":memory:" and not os.path.exists(database):
+        print(f"الملف مش موجود: {database}")
+        return 1
+
+    engine = create_db_engine(args.url)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    try:
+        sections = set(args.sections)
+        plans = check_query_plans() if sections & {"indexes", "plans"} else []
+        if "tables" in sections:
+            report_tables(engine)
+        if "indexes" in sections:
+            report_indexes(engine, plans)
+        if "plans" in sections:
+            report_plans(plans, args.verbose)
+        if "ledger" in sections:
+            report_ledger(engine, args.top)
+        if "trades" in sections:
+            report_trades(engine)
+        if "slow" in sections:
+            report_slow(args.top)
+    finally:
+        engine.dispose()
+    return 0
+
 
 if __name__ == "__main__":
-    check_database()
+    sys.exit(main())
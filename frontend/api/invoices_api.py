@@ -10,8 +10,12 @@ def upload_invoice(files, data):
         data=data,
     )
 
-def get_staging_data(invoice_id: int):
-    return requests.get(f"{API_BASE_URL}/invoices/{invoice_id}/staging")
+def get_staging_data(invoice_id: int, params: dict = None, etag: str = None):
+    return requests.get(
+        f"{API_BASE_URL}/invoices/{invoice_id}/staging",
+        params=params or {},
+        headers={"If-None-Match": etag} if etag else {},
+    )
 
 def update_staging_data(invoice_id: int, payload: list):
     return requests.put(
@@ -19,11 +23,54 @@ def update_staging_data(invoice_id: int, payload: list):
         json=payload,
     )
 
+def patch_staging_data(invoice_id: int, base_version: int, changes: list):
+    return requests.patch(
+        f"{API_BASE_URL}/invoices/{invoice_id}/staging",
+        json={"base_version": base_version, "changes": changes},
+    )
+
 def approve_invoice(invoice_id: int):
     return requests.post(f"{API_BASE_URL}/invoices/{invoice_id}/approve")
 
-def get_schedule_report(project_id: int, month: int, year: int):
+def get_schedule_report(project_id: int, month: int, year: int, etag: str = None):
     return requests.get(
         f"{API_BASE_URL}/reports/schedule/{project_id}",
         params={"month": month, "year": year},
+        headers={"If-None-Match": etag} if etag else {},
     )
+
+def get_schedule_matrix(project_id: int, year: int, trade: str = None,
+                        cumulative: bool = False, etag: str = None):
+    params = {"year": year, "cumulative": cumulative}
+    if trade:
+        params["trade"] = trade
+    return requests.get(
+        f"{API_BASE_URL}/reports/schedule-matrix/{project_id}",
+        params=params,
+        headers={"If-None-Match": etag} if etag else {},
+    )
+
+def get_range_report(project_id: int, date_from: str, date_to: str, weekly: bool = False):
+    kind = "weekly" if weekly else "range"
+    return requests.get(
+        f"{API_BASE_URL}/reports/{kind}/{project_id}",
+        params={"date_from": date_from, "date_to": date_to},
+    )
+
+def export_report(path: str, params: dict = None, fmt: str = "xlsx"):
+    return requests.get(
+        f"{API_BASE_URL}/{path}",
+        params={**(params or {}), "format": fmt},
+    )
+
+def get_s_curve(project_id: int, by_trade: bool = False, points: int = None):
+    params = {"by_trade": by_trade}
+    if points:
+        params["points"] = points
+    return requests.get(
+        f"{API_BASE_URL}/reports/s-curve/{project_id}",
+        params=params,
+    )
+
+def get_portfolio_report():
+    return requests.get(f"{API_BASE_URL}/reports/portfolio")
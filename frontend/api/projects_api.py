@@ -14,3 +14,13 @@ def add_boq_item(project_id: int, item_data: dict):
         f"{API_BASE_URL}/projects/{project_id}/boq",
         json=item_data,
     )
+
+def upload_boq_file(project_id: int, files, data=None):
+    return requests.post(
+        f"{API_BASE_URL}/projects/{project_id}/boq/upload",
+        files=files,
+        data=data or {},
+    )
+
+def get_project_invoices(project_id: int):
+    return requests.get(f"{API_BASE_URL}/projects/{project_id}/invoices")
@@ -3,3 +3,4 @@
 API_BASE_URL = "http://127.0.0.1:8000/api/v1"
 PAGE_TITLE = "Mini ERP - Construction"
 LAYOUT = "wide"
+STAGING_PAGE_SIZE = 500
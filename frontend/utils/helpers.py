@@ -1,5 +1,17 @@
 """Helper functions for frontend"""
 
+import pandas as pd
+
+# الأعمدة القابلة للتعديل فى شاشة مراجعة الـ staging
+EDITABLE_STAGING_COLUMNS = [
+    "include_in_invoice",
+    "raw_item_code",
+    "raw_description",
+    "raw_qty",
+    "raw_percentage",
+]
+
+
 def get_col_letter(n):
     """Convert number to Excel column letter (0 -> A, 1 -> B, etc.)"""
     string_n = ""
@@ -8,3 +20,39 @@ def get_col_letter(n):
         string_n = chr(65 + remainder) + string_n
         n -= 1
     return string_n
+
+
+def _cell_value(value, column):
+    """Convert a DataFrame cell to a JSON-safe value for the API"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        # خلية اتمسحت: نص فاضى (None معناها "بدون تغيير" فى الـ API)
+        return False if column == "include_in_invoice" else ""
+    if column == "include_in_invoice":
+        return bool(value)
+    return str(value)
+
+
+def diff_frames(original, edited, key="id", columns=None):
+    """
+    Compare the edited frame against the original snapshot.
+
+    Returns one dict per changed row holding the key and only the changed
+    cells, e.g. [{"id": 5, "raw_qty": "12"}].
+    """
+    columns = columns or EDITABLE_STAGING_COLUMNS
+    cols = [c for c in columns if c in original.columns and c in edited.columns]
+    if not cols or original.empty:
+        return []
+
+    before = original.set_index(key)[cols]
+    after = edited.set_index(key)[cols].reindex(before.index)
+
+    changed = (before != after) & ~(before.isna() & after.isna())
+    changed_rows = changed.index[changed.any(axis=1)]
+
+    changes = []
+    for row_id in changed_rows:
+        mask = changed.loc[row_id]
+        cells = {c: _cell_value(after.at[row_id, c], c) for c in mask.index[mask]}
+        changes.append({key: int(row_id), **cells})
+    return changes
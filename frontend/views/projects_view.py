@@ -1,11 +1,12 @@
 """Projects View"""
 
 import streamlit as st
+import pandas as pd
 from frontend.api import client, projects_api
 
 def render_projects_view():
     st.header("🛠️ تأسيس المشاريع")
-    tab1, tab2 = st.tabs(["مشروع جديد", "إضافة بنود"])
+    tab1, tab2, tab3 = st.tabs(["مشروع جديد", "إضافة بنود", "المستخلصات"])
 
     # ----- تبويب مشروع جديد -----
     with tab1:
@@ -52,5 +53,44 @@ def render_projects_view():
                             st.error(f"فشل الإضافة: {res.text}")
                     except Exception as e:
                         st.error(f"خطأ اتصال: {e}")
+
+            # ----- رفع مقايسة كاملة -----
+            st.markdown("---")
+            boq_file = st.file_uploader(
+                "رفع مقايسة كاملة (Excel / CSV)", type=["xlsx", "xls", "csv"]
+            )
+            if boq_file and st.button("رفع المقايسة"):
+                try:
+                    files = {"file": (boq_file.name, boq_file.getvalue())}
+                    res = projects_api.upload_boq_file(pid, files)
+                    if res.status_code == 200:
+                        result = res.json()
+                        st.success(result.get("message", "تم الرفع"))
+                        if result.get("errors"):
+                            st.dataframe(result["errors"])
+                    else:
+                        st.error(f"فشل الرفع: {res.text}")
+                except Exception as e:
+                    st.error(f"خطأ اتصال: {e}")
+        else:
+            st.warning("يرجى إنشاء مشروع أولاً.")
+
+    # ----- تبويب المستخلصات -----
+    with tab3:
+        proj_map = client.fetch_projects_list()
+        if proj_map:
+            sel_proj = st.selectbox("المشروع", proj_map.keys(), key="invoices_project")
+            pid = proj_map[sel_proj]
+            try:
+                res = projects_api.get_project_invoices(pid)
+                if res.status_code == 200 and res.json():
+                    df = pd.DataFrame(res.json()).drop(columns=["trades"])
+                    st.dataframe(df)
+                elif res.status_code == 200:
+                    st.info("لا توجد مستخلصات لهذا المشروع.")
+                else:
+                    st.error(res.text)
+            except Exception as e:
+                st.error(f"خطأ اتصال: {e}")
         else:
             st.warning("يرجى إنشاء مشروع أولاً.")
@@ -3,6 +3,8 @@
 import streamlit as st
 import pandas as pd
 from frontend.api import client, invoices_api
+from frontend.config import STAGING_PAGE_SIZE
+from frontend.utils.helpers import diff_frames
 
 def render_reports_view():
     st.header("📊 الاعتماد والتقارير")
@@ -26,31 +28,83 @@ def _render_approval_tab():
         "رقم المستخلص للمراجعة", value=1, min_value=1
     )
 
-    # زرار جلب البيانات
+    errors_only = st.checkbox("عرض الصفوف اللى فيها أخطاء فقط", value=False)
+
+    # زرار جلب البيانات (أول صفحة)
     if col_btn.button("جلب البيانات للمراجعة"):
-        try:
-            res = invoices_api.get_staging_data(iid)
-            if res.status_code == 200:
-                data = res.json()
-                if data:
-                    st.session_state["staging_rows"] = data
-                    st.success(f"تم جلب {len(data)} صف من الـ Staging ✅")
-                else:
-                    st.session_state["staging_rows"] = []
-                    st.warning("لا توجد بيانات لهذا المستخلص.")
-            else:
-                st.error(f"خطأ في الجلب: {res.text}")
-        except Exception as e:
-            st.error(f"فشل الاتصال: {e}")
+        st.session_state["staging_cursors"] = [None]
+        _fetch_staging_page(iid, None, errors_only)
 
     rows = st.session_state.get("staging_rows", [])
 
     if rows:
+        _render_page_controls(iid, errors_only)
         _render_staging_table(rows, iid)
     else:
         st.info("من فضلك أدخل رقم المستخلص واضغط (جلب البيانات للمراجعة).")
 
 
+def _fetch_staging_page(iid, cursor, errors_only=False):
+    params = {"limit": STAGING_PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    if errors_only:
+        params["errors_only"] = True
+
+    # نسخة محفوظة من نفس الصفحة: نبعت الـ ETag ولو مفيش تغيير نستخدمها
+    cache = st.session_state.setdefault("staging_cache", {})
+    cache_key = (iid, cursor, errors_only)
+    cached = cache.get(cache_key)
+
+    try:
+        res = invoices_api.get_staging_data(
+            iid, params, etag=cached["etag"] if cached else None
+        )
+        if res.status_code == 304 and cached:
+            page = cached
+        elif res.status_code == 200:
+            page = {
+                "etag": res.headers.get("ETag"),
+                "rows": res.json(),
+                "version": int(res.headers.get("X-Staging-Version", 0)),
+                "next_cursor": res.headers.get("X-Next-Cursor"),
+            }
+            if page["etag"]:
+                cache[cache_key] = page
+        else:
+            st.error(f"خطأ في الجلب: {res.text}")
+            return
+    except Exception as e:
+        st.error(f"فشل الاتصال: {e}")
+        return
+
+    data = page["rows"]
+    st.session_state["staging_version"] = page["version"]
+    st.session_state["staging_next_cursor"] = page["next_cursor"]
+    if data:
+        st.session_state["staging_rows"] = data
+        st.success(f"تم جلب {len(data)} صف من الـ Staging ✅")
+    else:
+        st.session_state["staging_rows"] = []
+        st.warning("لا توجد بيانات لهذا المستخلص.")
+
+
+def _render_page_controls(iid, errors_only):
+    cursors = st.session_state.setdefault("staging_cursors", [None])
+    next_cursor = st.session_state.get("staging_next_cursor")
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    col_page.caption(f"الصفحة {len(cursors)}")
+    if col_prev.button("⬅️ الصفحة السابقة", disabled=len(cursors) <= 1):
+        cursors.pop()
+        _fetch_staging_page(iid, cursors[-1], errors_only)
+        st.rerun()
+    if col_next.button("الصفحة التالية ➡️", disabled=not next_cursor):
+        cursors.append(next_cursor)
+        _fetch_staging_page(iid, next_cursor, errors_only)
+        st.rerun()
+
+
 def _render_staging_table(rows, iid):
     df = pd.DataFrame(rows)
 
@@ -99,15 +153,12 @@ def _render_staging_table(rows, iid):
     # زرار حفظ التعديلات
     with col_save:
         if st.button("💾 حفظ التعديلات في الـ Staging", use_container_width=True):
-            try:
-                payload = edited_df.to_dict(orient="records")
-                res = invoices_api.update_staging_data(iid, payload)
-                if res.status_code == 200:
-                    st.success("تم حفظ التعديلات في الـ Staging بنجاح ✅")
-                else:
-                    st.error(f"خطأ في الحفظ: {res.text}")
-            except Exception as e:
-                st.error(f"فشل الاتصال عند الحفظ: {e}")
+            # نبعت الخلايا المعدّلة فقط مش الجدول كله
+            changes = diff_frames(display_df, edited_df)
+            if not changes:
+                st.info("لا توجد تعديلات للحفظ.")
+            else:
+                _save_staging_changes(iid, changes)
 
     # زرار الاعتماد النهائي
     with col_approve:
@@ -125,6 +176,40 @@ def _render_staging_table(rows, iid):
             except Exception as e:
                 st.error(f"فشل الاتصال عند الاعتماد: {e}")
 
+    _render_export(
+        "تصدير بنود المستخلص المعتمدة",
+        f"invoices/{iid}/details/export",
+        {},
+        f"invoice_{iid}_details",
+        key="export_details",
+    )
+
+
+def _save_staging_changes(iid, changes):
+    try:
+        res = invoices_api.patch_staging_data(
+            iid, st.session_state.get("staging_version", 0), changes
+        )
+        if res.status_code == 200:
+            result = res.json()
+            st.session_state["staging_version"] = result["version"]
+            # تطبيق التعديلات على النسخة المحلية بدل إعادة الجلب
+            by_id = {c["id"]: c for c in changes}
+            for row in st.session_state.get("staging_rows", []):
+                if row.get("id") in by_id:
+                    row.update(by_id[row["id"]])
+            st.success(
+                f"تم حفظ {result['updated_count']} صف في الـ Staging بنجاح ✅"
+            )
+        elif res.status_code == 409:
+            st.error(
+                "تم تعديل البيانات من مستخدم آخر. اضغط (جلب البيانات للمراجعة) ثم أعد التعديل."
+            )
+        else:
+            st.error(f"خطأ في الحفظ: {res.text}")
+    except Exception as e:
+        st.error(f"فشل الاتصال عند الحفظ: {e}")
+
 
 def _render_reports_tab():
     proj_map = client.fetch_projects_list()
@@ -136,9 +221,23 @@ def _render_reports_tab():
         year = c2.number_input("السنة", value=2025)
         if st.button("عرض التقرير"):
             try:
-                res = invoices_api.get_schedule_report(pid, month, year)
-                if res.status_code == 200:
+                cache = st.session_state.setdefault("report_cache", {})
+                cache_key = (pid, month, year)
+                cached = cache.get(cache_key)
+                res = invoices_api.get_schedule_report(
+                    pid, month, year, etag=cached["etag"] if cached else None
+                )
+                if res.status_code == 304 and cached:
+                    data = cached["data"]
+                elif res.status_code == 200:
                     data = res.json()
+                    if res.headers.get("ETag"):
+                        cache[cache_key] = {"etag": res.headers["ETag"], "data": data}
+                else:
+                    data = None
+                    st.error(res.text)
+
+                if data is not None:
                     if data:
                         df = pd.DataFrame(data)
                         st.table(df)
@@ -146,9 +245,167 @@ def _render_reports_tab():
                             st.bar_chart(df.set_index("item_code")["total_qty"])
                     else:
                         st.info("لا توجد بيانات لهذه الفترة.")
-                else:
-                    st.error(res.text)
             except Exception as e:
                 st.error(f"فشل الاتصال: {e}")
+        _render_export(
+            "تصدير تقرير الشهر",
+            f"reports/schedule/{pid}/export",
+            {"month": month, "year": int(year)},
+            f"schedule_{pid}_{int(year)}_{month:02d}",
+            key="export_schedule",
+        )
+        _render_year_matrix(pid, int(year))
+        _render_export(
+            "تصدير تقرير السنة",
+            f"reports/schedule-matrix/{pid}/export",
+            {"year": int(year)},
+            f"schedule_matrix_{pid}_{int(year)}",
+            key="export_matrix",
+        )
+        _render_custom_period(pid)
+        _render_s_curve(pid)
+        _render_portfolio()
     else:
         st.warning("لا توجد مشاريع لعرض التقارير.")
+
+
+def _render_year_matrix(pid, year):
+    st.markdown("---")
+    st.subheader("تقرير السنة (بند × شهر)")
+    c1, c2 = st.columns(2)
+    trade = c1.selectbox(
+        "التخصص", ["", "CIVIL", "ELEC", "MECH", "ARCH", "GENERAL"],
+        key="matrix_trade",
+    )
+    cumulative = c2.checkbox("تراكمى", value=False, key="matrix_cumulative")
+    if not st.button("عرض تقرير السنة"):
+        return
+    try:
+        cache = st.session_state.setdefault("report_cache", {})
+        cache_key = ("matrix", pid, year, trade, cumulative)
+        cached = cache.get(cache_key)
+        res = invoices_api.get_schedule_matrix(
+            pid, year, trade=trade or None, cumulative=cumulative,
+            etag=cached["etag"] if cached else None,
+        )
+        if res.status_code == 304 and cached:
+            data = cached["data"]
+        elif res.status_code == 200:
+            data = res.json()
+            if res.headers.get("ETag"):
+                cache[cache_key] = {"etag": res.headers["ETag"], "data": data}
+        else:
+            st.error(res.text)
+            return
+
+        if not data["items"]:
+            st.info("لا توجد بيانات لهذه السنة.")
+            return
+        matrix = data["cum_qty"] if cumulative else data["qty"]
+        df = pd.DataFrame(
+            matrix,
+            index=[i["item_code"] for i in data["items"]],
+            columns=data["months"],
+        )
+        st.dataframe(df)
+    except Exception as e:
+        st.error(f"فشل الاتصال: {e}")
+
+
+def _render_custom_period(pid):
+    st.markdown("---")
+    st.subheader("تقرير مدة مخصصة")
+    c1, c2, c3 = st.columns(3)
+    date_from = c1.date_input("من", key="range_from")
+    date_to = c2.date_input("إلى", key="range_to")
+    weekly = c3.checkbox("أسبوع بأسبوع", value=False, key="range_weekly")
+    if not st.button("عرض تقرير المدة"):
+        return
+    try:
+        res = invoices_api.get_range_report(
+            pid, date_from.isoformat(), date_to.isoformat(), weekly=weekly
+        )
+        if res.status_code != 200:
+            st.error(res.text)
+            return
+        data = res.json()
+        if weekly:
+            if not data["items"]:
+                st.info("لا توجد بيانات لهذه الفترة.")
+                return
+            st.dataframe(pd.DataFrame(
+                data["qty"],
+                index=[i["item_code"] for i in data["items"]],
+                columns=[w["start"] for w in data["weeks"]],
+            ))
+        elif data:
+            st.table(pd.DataFrame(data))
+        else:
+            st.info("لا توجد بيانات لهذه الفترة.")
+    except Exception as e:
+        st.error(f"فشل الاتصال: {e}")
+
+
+def _render_export(label, path, params, filename, key):
+    c1, c2 = st.columns([1, 2])
+    fmt = c1.selectbox("الصيغة", ["xlsx", "csv"], key=f"{key}_fmt")
+    if c2.button(label, key=f"{key}_btn"):
+        try:
+            res = invoices_api.export_report(path, params, fmt)
+            if res.status_code == 200:
+                st.download_button(
+                    "⬇️ تحميل الملف",
+                    data=res.content,
+                    file_name=f"{filename}.{fmt}",
+                    key=f"{key}_download",
+                )
+            else:
+                st.error(res.text)
+        except Exception as e:
+            st.error(f"فشل الاتصال: {e}")
+
+
+def _render_s_curve(pid):
+    st.markdown("---")
+    st.subheader("منحنى التقدم التراكمى (S-Curve)")
+    by_trade = st.checkbox("منحنى لكل تخصص", value=False, key="s_curve_by_trade")
+    if not st.button("عرض المنحنى"):
+        return
+    try:
+        res = invoices_api.get_s_curve(pid, by_trade=by_trade, points=60)
+        if res.status_code != 200:
+            st.error(res.text)
+            return
+        series = res.json()["series"]
+        if not series:
+            st.info("لا توجد بيانات معتمدة لهذا المشروع.")
+            return
+        df = pd.concat(
+            [pd.Series(s["cum_value"], index=s["periods"], name=s["trade"]) for s in series],
+            axis=1,
+        ).sort_index().ffill().fillna(0.0)
+        st.line_chart(df)
+    except Exception as e:
+        st.error(f"فشل الاتصال: {e}")
+
+
+def _render_portfolio():
+    st.markdown("---")
+    st.subheader("ملخص كل المشاريع")
+    if not st.button("عرض الملخص"):
+        return
+    try:
+        res = invoices_api.get_portfolio_report()
+        if res.status_code != 200:
+            st.error(res.text)
+            return
+        data = res.json()
+        totals = data["totals"]
+        c1, c2, c3 = st.columns(3)
+        c1.metric("المشاريع", totals["projects"])
+        c2.metric("المستخلصات المعتمدة", f"{totals['approved_count']} / {totals['invoice_count']}")
+        c3.metric("إجمالى القيمة", f"{totals['total_value']:,.2f}")
+        df = pd.DataFrame(data["projects"]).drop(columns=["by_trade"], errors="ignore")
+        st.table(df)
+    except Exception as e:
+        st.error(f"فشل الاتصال: {e}")
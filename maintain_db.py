@@ -0,0 +1,93 @@
+"""
+صيانة قاعدة SQLite يدوياً (نفس مهام الـ scheduler فى app/db/maintenance.py)
+
+المهام: analyze (ANALYZE كامل)، optimize (PRAGMA optimize)،
+incremental_vacuum (رجوع الصفحات الفاضية للـ filesystem)، quick_check.
+كل مهمة بتتسجل فى جدول maintenance_log بمدتها ونتيجتها.
+
+القواعد اللى اتعملت قبل auto_vacuum=INCREMENTAL محتاجة
+--enable-incremental-vacuum مرة واحدة (VACUUM كامل، بيقفل القاعدة لحد ما يخلص).
+
+Usage:
+    python maintain_db.py
+    python maintain_db.py --tasks analyze quick_check
+    python maintain_db.py --enable-incremental-vacuum
+    python maintain_db.py --log 20
+    python maintain_db.py --url sqlite:///shards/shard_0000.db
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.maintenance import TASKS, run_maintenance
+from app.db.session import create_db_engine
+from app.models import MaintenanceLog
+
+
+def enable_incremental_vacuum(engine) -> None:
+    """تحويل قاعدة موجودة لـ auto_vacuum=INCREMENTAL (الـ PRAGMA بيتطبق بعد VACUUM)"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+
+def print_log(engine, limit: int) -> None:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(MaintenanceLog.__table__)
+            .order_by(MaintenanceLog.started_at.desc(), MaintenanceLog.id.desc())
+            .limit(limit)
+        ).all()
+    if not rows:
+        print("maintenance_log فاضى")
+        return
+    print(f"{'started_at':<20} {'trigger':<9} {'task':<19} {'status':<8} {'ms':>10}  detail")
+    for row in rows:
+        started = row.started_at.isoformat(sep=" ", timespec="seconds")
+        print(
+            f"{started:<20} {row.trigger:<9} {row.task:<19} {row.status:<8} "
+            f"{row.duration_ms:>10.1f}  {row.detail or ''}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run SQLite maintenance tasks")
+    parser.add_argument("--url", default=settings.DATABASE_URL, help="DATABASE_URL")
+    parser.add_argument("--tasks", nargs="+", choices=TASKS, default=list(TASKS))
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="PRAGMA auto_vacuum=INCREMENTAL + VACUUM (مرة واحدة للقواعد القديمة)",
+    )
+    parser.add_argument("--log", type=int, metavar="N", help="عرض آخر N تشغيل بس")
+    args = parser.parse_args(argv)
+
+    engine = create_db_engine(args.url)
+    try:
+        if args.log:
+            print_log(engine, args.log)
+            return 0
+        if args.enable_incremental_vacuum:
+            print("VACUUM (auto_vacuum=INCREMENTAL) ...")
+            enable_incremental_vacuum(engine)
+
+        try:
+            results = run_maintenance(engine, args.tasks, trigger="manual")
+        except ValueError as e:
+            print(str(e))
+            return 1
+        for result in results:
+            print(
+                f"{result['task']:<19} {result['status']:<8} "
+                f"{result['duration_ms']:>10.1f} ms  {result['detail'] or ''}"
+            )
+        return 1 if any(result["status"] == "error" for result in results) else 0
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
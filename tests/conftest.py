@@ -0,0 +1,67 @@
+"""Fixtures مشتركة للـ tests (alembic على قواعد مؤقتة)"""
+
+import os
+import shutil
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED_DATABASE = os.path.join(ROOT, "construction_system.db")
+
+
+def _alembic_config() -> Config:
+    return Config(os.path.join(ROOT, "alembic.ini"))
+
+
+@pytest.fixture
+def alembic_head() -> str:
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+@pytest.fixture
+def alembic_run(monkeypatch):
+    """
+    تشغيل أمر alembic (upgrade / downgrade) على قاعدة معينة
+
+    alembic/env.py بياخد الـ URL من settings.DATABASE_URL، فالـ fixture
+    بتغيره للـ URL المطلوب طول الـ test.
+    """
+    def run(url: str, action: str = "upgrade", revision: str = "head") -> None:
+        monkeypatch.setattr(settings, "DATABASE_URL", url)
+        getattr(command, action)(_alembic_config(), revision)
+
+    return run
+
+
+@pytest.fixture
+def shipped_database_url(tmp_path):
+    """نسخة من construction_system.db (من قبل alembic) فى مجلد مؤقت"""
+    path = tmp_path / "shipped.db"
+    shutil.copyfile(SHIPPED_DATABASE, path)
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture
+def empty_database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'empty.db'}"
+
+
+@pytest.fixture
+def sqlite_engine():
+    """engine لـ URL معين بيتقفل فى آخر الـ test"""
+    engines = []
+
+    def make(url: str):
+        engine = create_engine(url)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
@@ -0,0 +1,126 @@
+"""الأرشفة: الـ staging بيتنسخ مضغوط، والـ catalog بيعرف المشاريع المؤرشفة"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import archive
+from app.db.session import create_db_engine, create_writer_engine
+from app.db.sharding import ShardRouter
+from app.db.write_coordinator import GroupCommitSession, WriteCoordinator
+from app.models import (
+    CatalogProject,
+    DailyLedger,
+    InvoiceLog,
+    InvoiceStatus,
+    Project,
+    StagingInvoiceDetail,
+    StagingSnapshot,
+)
+from app.models.enums import RowType, TradeType
+from app.services import staging_retention_service
+
+
+@pytest.fixture
+def database(alembic_run, empty_database_url):
+    alembic_run(empty_database_url)
+    engine = create_db_engine(empty_database_url)
+    writer_engine = create_writer_engine(empty_database_url)
+    writer = WriteCoordinator(
+        sessionmaker(bind=writer_engine, class_=GroupCommitSession, expire_on_commit=False),
+        max_batch=8,
+        max_wait_ms=0,
+    )
+    yield engine, writer
+    writer.stop()
+    writer_engine.dispose()
+    engine.dispose()
+
+
+def _seed_project(engine, rows):
+    with sessionmaker(bind=engine)() as db:
+        project = Project(name="مشروع")
+        db.add(project)
+        db.flush()
+        invoice = InvoiceLog(
+            project_id=project.id, invoice_number=1, status=InvoiceStatus.APPROVED
+        )
+        db.add(invoice)
+        db.flush()
+        db.add_all(
+            StagingInvoiceDetail(
+                invoice_id=invoice.id,
+                row_index=index,
+                raw_item_code="1-1",
+                raw_description=description,
+                raw_qty="5",
+                trade=TradeType.CIVIL,
+                row_type=RowType.ITEM,
+                is_valid=True,
+            )
+            for index, description in enumerate(rows)
+        )
+        db.add(DailyLedger(
+            project_id=project.id,
+            invoice_id=invoice.id,
+            entry_date=date(2025, 1, 1),
+            distributed_qty=5.0,
+        ))
+        db.commit()
+        return project.id, invoice.id
+
+
+def test_archive_stores_staging_compressed(database):
+    engine, writer = database
+    descriptions = [f"حفر وردم بالتربة الناتجة - بند {i}" for i in range(200)]
+    project_id, invoice_id = _seed_project(engine, descriptions)
+
+    result = archive.archive_project(project_id, engine, writer)
+
+    assert result["compacted_rows"] == len(descriptions)
+    assert result["compressed_bytes"] < result["raw_bytes"] / 5
+    archive_db = engine.url.database.replace(".db", ".archive.db")
+    archive_engine = create_engine(f"sqlite:///{archive_db}")
+    with archive_engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(StagingInvoiceDetail)) == 0
+        assert conn.scalar(select(func.count()).select_from(StagingSnapshot)) == 1
+        assert conn.scalar(select(func.count()).select_from(DailyLedger)) == 1
+    archive_engine.dispose()
+    with engine.connect() as conn:
+        for name in archive.ARCHIVED_TABLES:
+            assert conn.scalar(text(f"SELECT COUNT(*) FROM {name}")) == 0
+
+    # الصفوف بتتقرا من الأرشيف من غير استرجاع
+    factory = archive.route_project(sessionmaker(bind=engine), engine, project_id)
+    with factory() as db:
+        rows = staging_retention_service.get_snapshot_rows(db, invoice_id)
+    assert [row["raw_description"] for row in rows] == descriptions
+    assert rows[0]["trade"] == "CIVIL"
+
+
+def test_catalog_lists_archived_projects(tmp_path):
+    catalog_url = f"sqlite:///{tmp_path / 'catalog.db'}"
+    # catalog اتعمل قبل عمود archived
+    old_catalog = create_engine(catalog_url)
+    with old_catalog.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE catalog_projects "
+            "(id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, location VARCHAR, shard VARCHAR NOT NULL)"
+        ))
+        conn.execute(text("INSERT INTO catalog_projects VALUES (1, 'قديم', NULL, 'shard_0000')"))
+    old_catalog.dispose()
+
+    router = ShardRouter(catalog_url, str(tmp_path / "shards"))
+    try:
+        new_id = router.register_project("جديد")
+        router.set_archived(1, True)
+
+        assert [p.id for p in router.list_projects()] == [1, new_id]
+        assert [p.id for p in router.list_projects(archived=True)] == [1]
+        assert [p.id for p in router.list_projects(archived=False)] == [new_id]
+        with router.CatalogSession() as db:
+            assert db.get(CatalogProject, new_id).archived is False
+    finally:
+        router.dispose()
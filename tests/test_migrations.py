@@ -0,0 +1,96 @@
+"""alembic migrations: من الصفر، من القاعدة اللى فى الـ repo، والأكواد المكررة"""
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+
+import app.models  # noqa: F401
+from app.db.base import Base
+
+
+def _schema_drift(engine):
+    with engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+
+def _version(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def test_upgrade_empty_database(alembic_run, alembic_head, empty_database_url, sqlite_engine):
+    alembic_run(empty_database_url)
+
+    engine = sqlite_engine(empty_database_url)
+    assert _version(engine) == alembic_head
+    assert _schema_drift(engine) == []
+
+    alembic_run(empty_database_url, "downgrade", "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+
+
+def test_upgrade_shipped_database(alembic_run, alembic_head, shipped_database_url, sqlite_engine):
+    engine = sqlite_engine(shipped_database_url)
+    with engine.connect() as conn:
+        projects = conn.execute(text("SELECT COUNT(*) FROM projects")).scalar()
+
+    alembic_run(shipped_database_url)
+
+    assert _version(engine) == alembic_head
+    assert _schema_drift(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM projects")).scalar() == projects
+        assert conn.execute(text("SELECT COUNT(*) FROM boq_items WHERE path IS NULL")).scalar() == 0
+
+
+def _seed_boq_items(engine, items):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO projects (id, name) VALUES (1, 'p')"))
+        conn.execute(
+            text(
+                "INSERT INTO boq_items (id, project_id, item_code, description, unit, unit_price) "
+                "VALUES (:id, 1, :code, :description, 'm3', :price)"
+            ),
+            items,
+        )
+        conn.execute(text("INSERT INTO invoice_details (id, boq_item_id) VALUES (1, 2)"))
+
+
+def test_identical_duplicate_codes_are_merged(
+    alembic_run, alembic_head, empty_database_url, sqlite_engine
+):
+    alembic_run(empty_database_url, revision="0002")
+    engine = sqlite_engine(empty_database_url)
+    _seed_boq_items(engine, [
+        {"id": 1, "code": "9-1", "description": "حفر", "price": 10.0},
+        {"id": 2, "code": "9-1", "description": "حفر", "price": 10.0},
+        {"id": 3, "code": "9-2", "description": "ردم", "price": 5.0},
+    ])
+
+    alembic_run(empty_database_url)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM boq_items ORDER BY id")).scalars().all() == [1, 3]
+        assert conn.execute(text("SELECT boq_item_id FROM invoice_details")).scalar() == 1
+    assert _version(engine) == alembic_head
+
+
+def test_conflicting_duplicate_codes_stop_the_upgrade(
+    alembic_run, empty_database_url, sqlite_engine
+):
+    alembic_run(empty_database_url, revision="0002")
+    engine = sqlite_engine(empty_database_url)
+    _seed_boq_items(engine, [
+        {"id": 1, "code": "9-1", "description": "حفر", "price": 10.0},
+        {"id": 2, "code": "9-1", "description": "حفر صخرى", "price": 25.0},
+    ])
+
+    with pytest.raises(RuntimeError, match="9-1"):
+        alembic_run(empty_database_url)
+
+    # مفيش حاجة اتعدلت والقاعدة واقفة قبل 0003
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM boq_items")).scalar() == 2
+        assert conn.execute(text("SELECT boq_item_id FROM invoice_details")).scalar() == 2
+    assert _version(engine) == "0002"
@@ -0,0 +1,141 @@
+"""
+مسار PostgreSQL: الـ migrations، COPY فى bulk_insert، و asyncpg
+
+بيشتغل بس لو TEST_POSTGRESQL_URL متحدد (قاعدة للتجربة بس؛ الـ schema
+public بتتمسح وتتعمل من جديد) والـ drivers من requirements-postgres.txt متسطبة.
+"""
+
+import asyncio
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app.db import bulk
+from app.db.async_session import create_async_db_engine
+from app.models.enums import RowType, TradeType
+from app.models.invoice import InvoiceLog
+from app.models.ledger import DailyLedger
+from app.models.project import Project
+from app.models.staging import StagingInvoiceDetail
+
+POSTGRESQL_URL = os.environ.get("TEST_POSTGRESQL_URL")
+
+pytestmark = pytest.mark.skipif(
+    not POSTGRESQL_URL, reason="TEST_POSTGRESQL_URL مش متحدد"
+)
+
+
+@pytest.fixture
+def pg_engine(alembic_run):
+    """قاعدة PostgreSQL فاضية عليها alembic upgrade head"""
+    pytest.importorskip("psycopg2")
+    engine = create_engine(POSTGRESQL_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    alembic_run(POSTGRESQL_URL)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def invoice(pg_engine):
+    with Session(pg_engine) as db:
+        project = Project(name="مشروع")
+        db.add(project)
+        db.flush()
+        invoice = InvoiceLog(project_id=project.id, invoice_number=1)
+        db.add(invoice)
+        db.commit()
+        return project.id, invoice.id
+
+
+def test_bulk_insert_copies_staging_rows(pg_engine, invoice, monkeypatch):
+    _, invoice_id = invoice
+    copies = []
+    copy_into = bulk._copy_into
+    monkeypatch.setattr(
+        bulk, "_copy_into", lambda *args: copies.append(args[1].name) or copy_into(*args)
+    )
+    rows = [
+        {
+            "invoice_id": invoice_id,
+            "row_index": 0,
+            "raw_item_code": "1-1",
+            "raw_description": "حفر\tبعمق 2م\nفى التربة\\الصخرية",
+            "raw_qty": "12.5",
+            "trade": TradeType.CIVIL,
+            "row_type": RowType.ITEM,
+            "is_valid": True,
+        },
+        {
+            "invoice_id": invoice_id,
+            "row_index": 1,
+            "raw_item_code": None,
+            "raw_description": "إجمالى\r\n",
+            "raw_qty": None,
+            "trade": TradeType.CIVIL,
+            "row_type": RowType.TOTAL,
+            "is_valid": False,
+        },
+    ]
+
+    with Session(pg_engine) as db:
+        assert bulk.bulk_insert(db, StagingInvoiceDetail, rows, batch_size=1) == 2
+        db.commit()
+
+    assert copies == ["staging_invoice_details", "staging_invoice_details"]
+    with Session(pg_engine) as db:
+        stored = db.scalars(
+            select(StagingInvoiceDetail).order_by(StagingInvoiceDetail.row_index)
+        ).all()
+        for row, expected in zip(stored, rows):
+            for column, value in expected.items():
+                assert getattr(row, column) == value
+            # default الـ model اتكتب رغم إن COPY مبيعرفوش
+            assert row.include_in_invoice is True
+
+
+def test_copy_payload_into_daily_ledger(pg_engine, invoice):
+    project_id, invoice_id = invoice
+    columns = ["project_id", "invoice_id", "boq_item_id", "entry_date", "distributed_qty"]
+    rows = [
+        {"project_id": project_id, "invoice_id": invoice_id, "entry_date": date(2024, 2, 29),
+         "distributed_qty": 0.125},
+        {"project_id": project_id, "invoice_id": invoice_id, "entry_date": date(2024, 3, 1),
+         "distributed_qty": 1e-7},
+    ]
+
+    with Session(pg_engine) as db:
+        bulk._copy_into(db, DailyLedger.__table__, columns, bulk.copy_payload(rows, columns))
+        db.commit()
+
+    with pg_engine.connect() as conn:
+        stored = conn.execute(
+            text(
+                "SELECT boq_item_id, entry_date, distributed_qty "
+                "FROM daily_ledger ORDER BY entry_date"
+            )
+        ).all()
+    assert stored == [(None, date(2024, 2, 29), 0.125), (None, date(2024, 3, 1), 1e-7)]
+
+
+def test_async_engine_uses_asyncpg(pg_engine, invoice):
+    pytest.importorskip("asyncpg")
+    project_id, _ = invoice
+
+    async def read_project_name():
+        engine = create_async_db_engine(POSTGRESQL_URL)
+        try:
+            async with engine.connect() as conn:
+                assert engine.dialect.driver == "asyncpg"
+                return await conn.scalar(
+                    select(Project.name).where(Project.id == project_id)
+                )
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(read_project_name()) == "مشروع"
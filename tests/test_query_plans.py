@@ -0,0 +1,14 @@
+"""مفيش full table scan فى استعلامات الـ services على قاعدة متعملها migrate"""
+
+from app.db.query_plans import check_query_plans
+
+
+def test_service_queries_use_indexes(alembic_run, empty_database_url):
+    # الـ indexes من الـ migrations مش من create_all
+    alembic_run(empty_database_url)
+
+    queries = check_query_plans(empty_database_url)
+
+    assert queries
+    full_scans = {query.label: query.full_scans for query in queries if query.full_scans}
+    assert full_scans == {}
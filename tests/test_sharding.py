@@ -0,0 +1,82 @@
+"""الـ catalog مبيفضلش فيه مشاريع / مستخلصات الـ shard عمل لها rollback"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.db import sharding
+from app.db.sharding import ShardRouter
+from app.models import CatalogInvoice, CatalogProject, InvoiceLog, Project
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = ShardRouter(f"sqlite:///{tmp_path / 'catalog.db'}", str(tmp_path / "shards"))
+    yield router
+    router.dispose()
+
+
+@pytest.fixture
+def project_id(router):
+    project_id = router.register_project("مشروع")
+    with router.project_shard(project_id).session_factory() as db:
+        db.add(Project(id=project_id, name="مشروع"))
+        db.commit()
+    return project_id
+
+
+def _catalog_count(router, model):
+    with router.CatalogSession() as db:
+        return db.scalar(select(func.count()).select_from(model))
+
+
+def test_rolled_back_invoice_is_removed_from_catalog(router, project_id):
+    with router.project_shard(project_id).session_factory() as db:
+        invoice = InvoiceLog(project_id=project_id, invoice_number=1)
+        db.add(invoice)
+        db.flush()
+        invoice_id = invoice.id
+        db.rollback()
+
+    assert _catalog_count(router, CatalogInvoice) == 0
+    assert router.invoice_project(invoice_id) is None
+
+
+def test_failed_writer_unit_is_removed_from_catalog(router, project_id):
+    writer = router.project_shard(project_id).writer
+
+    def add_invoice(db, invoice_number, fail):
+        invoice = InvoiceLog(project_id=project_id, invoice_number=invoice_number)
+        db.add(invoice)
+        db.flush()
+        if fail:
+            raise ValueError("فشل بعد حجز المعرّف")
+        db.commit()
+        return invoice.id
+
+    # الـ units فى نفس الـ batch: الفاشلة بترجع من الـ SAVEPOINT بتاعها بس
+    failed = writer.submit(add_invoice, 1, True)
+    stored = writer.submit(add_invoice, 2, False)
+    # النتيجة الناجحة بترجع بعد commit الـ batch (والتنضيف بيحصل معاه)
+    stored_id = stored.result()
+    with pytest.raises(ValueError):
+        failed.result()
+
+    with router.CatalogSession() as db:
+        assert db.scalars(select(CatalogInvoice.id)).all() == [stored_id]
+
+
+def test_failed_shard_insert_unregisters_project(router, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(sharding, "shard_router", router)
+    # بقايا فى الـ shard بنفس الـ id اللى الـ catalog هيديه للمشروع الجاى
+    with router.shard(router.shard_key(1)).session_factory() as db:
+        db.add(Project(id=1, name="قديم"))
+        db.commit()
+
+    client = TestClient(app, raise_server_exceptions=False)
+    assert client.post("/api/v1/projects/", json={"name": "جديد"}).status_code == 500
+
+    assert _catalog_count(router, CatalogProject) == 0
+    assert router.project_shard(1) is None